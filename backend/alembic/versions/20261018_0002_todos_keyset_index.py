@@ -0,0 +1,29 @@
+"""Composite index for keyset-paginated todo listing
+
+Revision ID: 20261018_0002
+Revises: 20240506_0001
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261018_0002"
+down_revision = "20240506_0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_todos_owner_id_created_at_id",
+        "todos",
+        ["owner_id", sa.text("created_at DESC"), "id"],
+    )
+    # The composite index has owner_id as its leading column, so the single-column one is redundant.
+    op.drop_index("ix_todos_owner_id", table_name="todos")
+
+
+def downgrade() -> None:
+    op.create_index("ix_todos_owner_id", "todos", ["owner_id"])
+    op.drop_index("ix_todos_owner_id_created_at_id", table_name="todos")
@@ -0,0 +1,71 @@
+"""Full-text search over todo titles and descriptions
+
+Revision ID: 20261018_0004
+Revises: 20261018_0003
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = "20261018_0004"
+down_revision = "20261018_0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+        # Stored generated column: rewrites the table once, then maintained by Postgres on write.
+        op.execute(
+            """
+            ALTER TABLE todos ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'A')
+                || setweight(to_tsvector('english', coalesce(description, '')), 'B')
+            ) STORED
+            """
+        )
+        op.execute("CREATE INDEX ix_todos_owner_id_search_vector ON todos USING gin (owner_id, search_vector)")
+    else:
+        op.execute(
+            """
+            CREATE VIRTUAL TABLE todos_fts
+            USING fts5(title, description, content='todos', tokenize='porter unicode61')
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER todos_fts_insert AFTER INSERT ON todos BEGIN
+                INSERT INTO todos_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER todos_fts_delete AFTER DELETE ON todos BEGIN
+                INSERT INTO todos_fts (todos_fts, rowid, title, description)
+                VALUES ('delete', old.rowid, old.title, old.description);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER todos_fts_update AFTER UPDATE OF title, description ON todos BEGIN
+                INSERT INTO todos_fts (todos_fts, rowid, title, description)
+                VALUES ('delete', old.rowid, old.title, old.description);
+                INSERT INTO todos_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description);
+            END
+            """
+        )
+        op.execute("INSERT INTO todos_fts (todos_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX ix_todos_owner_id_search_vector")
+        op.execute("ALTER TABLE todos DROP COLUMN search_vector")
+    else:
+        op.execute("DROP TRIGGER todos_fts_update")
+        op.execute("DROP TRIGGER todos_fts_delete")
+        op.execute("DROP TRIGGER todos_fts_insert")
+        op.execute("DROP TABLE todos_fts")
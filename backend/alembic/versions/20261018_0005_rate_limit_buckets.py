@@ -0,0 +1,32 @@
+"""Shared token buckets for rate limiting
+
+Revision ID: 20261018_0005
+Revises: 20261018_0004
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261018_0005"
+down_revision = "20261018_0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Bucket state is disposable: on PostgreSQL skip the WAL for it.
+    prefixes = ["UNLOGGED"] if op.get_bind().dialect.name == "postgresql" else []
+    op.create_table(
+        "rate_limit_buckets",
+        sa.Column("key", sa.String(length=255), primary_key=True),
+        sa.Column("tokens", sa.Float(), nullable=False),
+        sa.Column("refilled_at", sa.Float(), nullable=False),
+        prefixes=prefixes,
+    )
+    op.create_index("ix_rate_limit_buckets_refilled_at", "rate_limit_buckets", ["refilled_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_rate_limit_buckets_refilled_at", table_name="rate_limit_buckets")
+    op.drop_table("rate_limit_buckets")
@@ -0,0 +1,37 @@
+"""Per-row todo versions and tombstones for delta sync
+
+Revision ID: 20261018_0006
+Revises: 20261018_0005
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261018_0006"
+down_revision = "20261018_0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows predate sync tokens; version 0 is covered by every full sync.
+    op.add_column("todos", sa.Column("version", sa.Integer(), nullable=False, server_default=sa.text("0")))
+    op.create_index("ix_todos_owner_id_version", "todos", ["owner_id", "version", "id"])
+    op.create_table(
+        "todo_tombstones",
+        sa.Column("todo_id", sa.String(), primary_key=True),
+        sa.Column("owner_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_todo_tombstones_owner_id_version", "todo_tombstones", ["owner_id", "version"])
+    op.create_index("ix_todo_tombstones_deleted_at", "todo_tombstones", ["deleted_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_todo_tombstones_deleted_at", table_name="todo_tombstones")
+    op.drop_index("ix_todo_tombstones_owner_id_version", table_name="todo_tombstones")
+    op.drop_table("todo_tombstones")
+    op.drop_index("ix_todos_owner_id_version", table_name="todos")
+    op.drop_column("todos", "version")
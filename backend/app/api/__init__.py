@@ -1,10 +1,11 @@
 from fastapi import APIRouter
 
-from .routes import auth, health, todos
+from .routes import auth, debug, health, todos
 
 api_router = APIRouter()
 api_router.include_router(health.router)
 api_router.include_router(auth.router)
 api_router.include_router(todos.router)
+api_router.include_router(debug.router)
 
 __all__ = ["api_router"]
@@ -1,10 +1,24 @@
+from typing import AsyncIterator
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.core.config import get_settings
+from app.core.timing import timed
+from app.db.session import (
+    DBSession,
+    bind_principal,
+    get_async_db,
+    get_db,
+    open_read_session,
+    release,
+    run_sync,
+)
 from app.models import User
-from app.services.security import decode_access_token
+from app.services import principals, users
+from app.services.principals import TokenClaims
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
@@ -13,19 +27,83 @@ def get_session(session: Session = Depends(get_db)) -> Session:
     return session
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    session: Session = Depends(get_session),
-) -> User:
-    subject = decode_access_token(token)
-    if subject is None:
+async def get_async_session(session: AsyncSession = Depends(get_async_db)) -> AsyncSession:
+    return session
+
+
+# Routes depend on whichever flavour DATABASE_ASYNC selects; both satisfy ``DBSession``.
+get_db_session = get_async_session if get_settings().database_async else get_session
+
+
+def _inactive_user() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
+
+
+def get_token_claims(token: str = Depends(oauth2_scheme)) -> TokenClaims:
+    with timed("auth"):
+        claims = principals.decode_token(token)
+    if claims is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return claims
+
 
-    user = session.get(User, subject)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+async def get_read_session(
+    claims: TokenClaims = Depends(get_token_claims),
+    session: DBSession = Depends(get_db_session),
+) -> AsyncIterator[DBSession]:
+    """Session for read-only routes: a healthy replica, unless the caller wrote recently.
+
+    Otherwise it is the primary session the rest of the request uses, so nothing changes
+    when no replicas are configured.
+    """
+    replica_session = open_read_session(claims.subject)
+    if replica_session is None:
+        yield session
+        return
+    try:
+        yield replica_session
+    finally:
+        await release(replica_session)
+
+
+async def _load_user(claims: TokenClaims, session: DBSession) -> User:
+    user = principals.get_user(claims.subject)
+    if user is None:
+        # Sessions connect lazily, so a cache hit never checks out a pooled connection.
+        db_user = await run_sync(session, users.get_user, claims.subject)
+        if not db_user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        user = principals.remember_user(db_user)
 
     if not user.is_active:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
+        raise _inactive_user()
 
     return user
+
+
+async def get_current_user(
+    claims: TokenClaims = Depends(get_token_claims),
+    session: DBSession = Depends(get_db_session),
+) -> User:
+    bind_principal(session, claims.subject)
+    with timed("auth"):
+        return await _load_user(claims, session)
+
+
+async def get_current_user_id(
+    claims: TokenClaims = Depends(get_token_claims),
+    session: DBSession = Depends(get_db_session),
+) -> str:
+    """Authorize a request that only needs the caller's id.
+
+    With ``JWT_EMBED_ACTIVE`` enabled an ``act`` claim is trusted as-is, so the common case
+    needs neither the database nor a warm principal cache.
+    """
+    bind_principal(session, claims.subject)
+    if principals.is_deactivated(claims.subject):
+        raise _inactive_user()
+    if claims.is_active and get_settings().jwt_embed_active:
+        return claims.subject
+    with timed("auth"):
+        user = await _load_user(claims, session)
+    return user.id
@@ -1,3 +1,3 @@
-from . import auth, health, todos
+from . import auth, debug, health, metrics, todos
 
-__all__ = ["auth", "health", "todos"]
+__all__ = ["auth", "debug", "health", "metrics", "todos"]
@@ -1,45 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.db.session import DBSession, run_sync
 from app.models import User
 from app.schemas import Token, UserCreate, UserRead
-from app.services import security
+from app.services import security, users
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def register_user(payload: UserCreate, session: Session = Depends(deps.get_session)) -> User:
-    existing = session.query(User).filter(User.email == payload.email).first()
+async def register_user(payload: UserCreate, session: DBSession = Depends(deps.get_db_session)) -> UserRead:
+    existing = await run_sync(session, users.get_user_by_email, payload.email)
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
-    user = User(
-        email=payload.email,
-        full_name=payload.full_name,
-        password_hash=security.get_password_hash(payload.password),
-    )
-    session.add(user)
-    session.commit()
-    session.refresh(user)
-    return user
+    password_hash = await security.hash_password(payload.password)
+    return await run_sync(session, users.create_user, payload.email, payload.full_name, password_hash)
 
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(deps.get_session),
+    session: DBSession = Depends(deps.get_db_session),
 ) -> Token:
-    user = security.authenticate_user(session, form_data.username, form_data.password)
+    user = await security.authenticate_user(session, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
 
-    token = security.create_access_token(user.id)
+    token = security.create_access_token(user.id, is_active=user.is_active)
     return Token(access_token=token)
 
 
 @router.get("/me", response_model=UserRead)
-def read_current_user(current_user: User = Depends(deps.get_current_user)) -> User:
+async def read_current_user(current_user: User = Depends(deps.get_current_user)) -> User:
     return current_user
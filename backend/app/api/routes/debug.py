@@ -0,0 +1,29 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.core import profiling
+from app.core.config import get_settings
+
+
+def require_profiling_token(x_profile_token: Optional[str] = Header(None)) -> None:
+    # Indistinguishable from a missing route unless profiling is enabled and the token matches.
+    if not profiling.authorized(x_profile_token):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+router = APIRouter(prefix="/debug", tags=["debug"], dependencies=[Depends(require_profiling_token)])
+
+
+@router.get("/profile", response_class=PlainTextResponse, include_in_schema=False)
+async def profile_process(seconds: float = Query(10.0, gt=0)) -> PlainTextResponse:
+    """Sample every thread's stack for ``seconds`` and return them as collapsed stacks."""
+    max_seconds = get_settings().profiling_max_seconds
+    if seconds > max_seconds:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"seconds must be at most {max_seconds:g}")
+    try:
+        report = await profiling.sample_process(seconds)
+    except profiling.ProfilerBusy as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    return PlainTextResponse(report, headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'})
@@ -1,8 +1,47 @@
-from fastapi import APIRouter
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, Response, status
+
+from app.db.session import get_pool_status
+from app.services import readiness
+
+from .debug import require_profiling_token
 
 router = APIRouter(prefix="/healthz", tags=["health"])
 
 
-@router.get("", summary="Liveness/Readiness probe")
-def healthcheck() -> dict[str, str]:
+# Async so the answer never waits for a threadpool thread; it checks nothing else, so a replica
+# that is only overloaded (or paused in GC) is not restarted. Overload is for readiness to report.
+@router.get("", summary="Liveness probe")
+@router.get("/live", summary="Liveness probe")
+async def healthcheck() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@router.get(
+    "/ready",
+    summary="Readiness probe",
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "A check failed; send traffic elsewhere"}},
+)
+async def readiness_check(response: Response) -> Dict[str, Any]:
+    checks = await readiness.check()
+    ready = all(check.ok for check in checks.values())
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        response.headers["Retry-After"] = "1"
+    return {
+        "status": "ready" if ready else "unavailable",
+        "checks": {name: {"ok": check.ok, **check.detail} for name, check in checks.items()},
+    }
+
+
+# Pool sizes and wait times help plan an overload, so they are for operators holding the
+# profiling token only.
+@router.get(
+    "/pool",
+    summary="Database connection pool statistics",
+    dependencies=[Depends(require_profiling_token)],
+    include_in_schema=False,
+)
+def pool_stats() -> Dict[str, Any]:
+    return get_pool_status()
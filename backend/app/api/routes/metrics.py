@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+
+from app.core import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def read_metrics() -> Response:
+    content, content_type = metrics.render()
+    return Response(content=content, media_type=content_type)
@@ -1,70 +1,330 @@
-from typing import List
+import time
+from typing import Dict, List, Literal, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import structlog
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
 from app.api import deps
-from app.models import Todo, User
-from app.schemas import TodoCreate, TodoRead, TodoUpdate
+from app.core.config import get_settings
+from app.core.etag import etag_matches, make_etag
+from app.core.serialization import json_response, records
+from app.db.session import DBSession, release, run_sync
+from app.models import Todo
+from app.schemas import (
+    TodoBatchRequest,
+    TodoBatchResult,
+    TodoChanges,
+    TodoCreate,
+    TodoFilters,
+    TodoImportResult,
+    TodoRead,
+    TodoSearchHit,
+    TodoUpdate,
+)
+from app.services import events, exports, imports, search
+from app.services import todos as todo_service
+from app.services.pagination import (
+    InvalidCursor,
+    decode_cursor,
+    decode_offset_cursor,
+    decode_sync_token,
+    encode_cursor,
+    encode_offset_cursor,
+    encode_sync_token,
+)
 
 router = APIRouter(prefix="/todos", tags=["todos"])
+logger = structlog.get_logger(__name__)
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+# Ranked results are offset-paged; going deeper means re-ranking ever more rows per page.
+MAX_SEARCH_OFFSET = 1000
+# Let browsers keep the body but revalidate with If-None-Match on every use.
+CACHE_CONTROL = "private, no-cache"
+IMPORT_CONTENT_TYPES = {"application/x-ndjson": "ndjson", "application/jsonl": "ndjson", "text/csv": "csv"}
+IMPORT_PROGRESS_INTERVAL = 5.0
+EXPORT_PARTITION_SIZE = 1000
+
+
+def _not_found() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Todo not found")
+
+
+async def _collection_etag(session: DBSession, user_id: str) -> str:
+    # Read before the rows: if a write lands in between, the ETag is older than the body and the
+    # next revalidation simply refetches, rather than pinning stale content.
+    version = await run_sync(session, todo_service.get_collection_version, user_id)
+    return make_etag(user_id, version)
 
-def _get_user_todo(session: Session, todo_id: str, user_id: str) -> Todo:
-    todo = session.query(Todo).filter(Todo.id == todo_id, Todo.owner_id == user_id).first()
-    if not todo:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Todo not found")
-    return todo
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
 
 
 @router.get("", response_model=List[TodoRead])
-def list_todos(
-    session: Session = Depends(deps.get_session),
-    current_user: User = Depends(deps.get_current_user),
-) -> List[Todo]:
-    return (
-        session.query(Todo)
-        .filter(Todo.owner_id == current_user.id)
-        .order_by(Todo.created_at.desc())
-        .all()
+async def list_todos(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    filters: TodoFilters = Depends(),
+    session: DBSession = Depends(deps.get_read_session),
+    current_user_id: str = Depends(deps.get_current_user_id),
+) -> Response:
+    """Return one page of the user's todos, newest first.
+
+    Pages are keyed on ``(created_at, id)``. When more rows exist, the opaque cursor for
+    the next page is returned in the ``X-Next-Cursor`` header. Responses carry a weak ETag
+    of the user's collection version; a matching ``If-None-Match`` gets a 304 without the
+    rows being read. The body is encoded straight from the selected columns.
+    """
+    etag = await _collection_etag(session, current_user_id)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return _not_modified(etag)
+
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    rows, has_more = await run_sync(
+        session, todo_service.list_todos, current_user_id, limit=limit, after=after, filters=filters
     )
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if has_more:
+        last = rows[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return json_response(records(rows, todo_service.READ_FIELDS), headers=headers)
 
 
 @router.post("", response_model=TodoRead, status_code=status.HTTP_201_CREATED)
-def create_todo(
+async def create_todo(
     payload: TodoCreate,
-    session: Session = Depends(deps.get_session),
-    current_user: User = Depends(deps.get_current_user),
-) -> Todo:
-    todo = Todo(**payload.model_dump(), owner_id=current_user.id)
-    session.add(todo)
-    session.commit()
-    session.refresh(todo)
+    session: DBSession = Depends(deps.get_db_session),
+    current_user_id: str = Depends(deps.get_current_user_id),
+) -> TodoRead:
+    return await run_sync(session, todo_service.create_todo, current_user_id, payload)
+
+
+@router.post("/batch", response_model=TodoBatchResult)
+async def batch_todos(
+    payload: TodoBatchRequest,
+    session: DBSession = Depends(deps.get_db_session),
+    current_user_id: str = Depends(deps.get_current_user_id),
+) -> TodoBatchResult:
+    """Apply many creates/updates/deletes (plus an optional bulk action) in one transaction."""
+    return await run_sync(session, todo_service.apply_batch, current_user_id, payload)
+
+
+@router.get("/search", response_model=List[TodoSearchHit])
+async def search_todos(
+    q: str = Query(..., min_length=1, max_length=256),
+    limit: int = Query(DEFAULT_SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: DBSession = Depends(deps.get_read_session),
+    current_user_id: str = Depends(deps.get_current_user_id),
+) -> Response:
+    """Full-text search over titles and descriptions, best match first.
+
+    Every word must match; the last one may be a prefix. Hits carry a ``rank`` and a
+    ``snippet`` with matches wrapped in ``<mark>``. More pages are signalled by
+    ``X-Next-Cursor`` as for ``GET /todos``.
+    """
+    offset = 0
+    if cursor is not None:
+        try:
+            offset = decode_offset_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        if offset >= MAX_SEARCH_OFFSET:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    hits, has_more = await run_sync(
+        session, search.search_todos, current_user_id, q, limit=limit, offset=offset
+    )
+    headers: Dict[str, str] = {}
+    if has_more and offset + limit < MAX_SEARCH_OFFSET:
+        headers[NEXT_CURSOR_HEADER] = encode_offset_cursor(offset + limit)
+    # The hits were just built by the service; returning them directly skips re-validation.
+    return json_response(hits, headers=headers)
+
+
+@router.get("/changes", response_model=TodoChanges)
+async def list_changes(
+    since: Optional[str] = Query(None, description="next_token from the previous sync"),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: DBSession = Depends(deps.get_read_session),
+    current_user_id: str = Depends(deps.get_current_user_id),
+) -> Response:
+    """Todos created or updated, and ids of todos deleted, since the sync token ``since``.
+
+    Without ``since`` this is a full sync: every todo, and the client replaces what it has.
+    Keep ``next_token`` for the next sync; while ``has_more`` is true, call again straight
+    away with it. A sync with nothing new costs one primary-key lookup. Deletions are only
+    remembered for ``SYNC_TOMBSTONE_RETENTION_DAYS``, so older tokens get a 410 and the
+    client must sync in full.
+    """
+    token = None
+    if since is not None:
+        try:
+            token = decode_sync_token(since)
+        except InvalidCursor:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token")
+        if time.time() - token.issued_at > get_settings().sync_tombstone_retention_days * 86400:
+            raise HTTPException(status_code=status.HTTP_410_GONE, detail="Sync token expired; sync in full")
+
+    rows, deleted, next_token = await run_sync(
+        session, todo_service.list_changes, current_user_id, token, limit=limit
+    )
+    return json_response(
+        {
+            "todos": records(rows, todo_service.READ_FIELDS),
+            "deleted": deleted,
+            "next_token": encode_sync_token(next_token),
+            "has_more": next_token.after is not None,
+        }
+    )
+
+
+@router.post("/import", response_model=TodoImportResult)
+async def import_todos(
+    request: Request,
+    format: Optional[Literal["ndjson", "csv"]] = Query(None, description="Defaults from Content-Type"),
+    session: DBSession = Depends(deps.get_db_session),
+    current_user_id: str = Depends(deps.get_current_user_id),
+) -> TodoImportResult:
+    """Bulk-create todos from an NDJSON or CSV (header row) request body.
+
+    The body is parsed as it streams in and written in batches within one transaction; rows
+    that fail validation are skipped and reported.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = format or IMPORT_CONTENT_TYPES.get(content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send application/x-ndjson or text/csv, or pass ?format=",
+        )
+
+    last_report = time.monotonic()
+
+    def report(rows: int, elapsed: float) -> None:
+        nonlocal last_report
+        if time.monotonic() - last_report >= IMPORT_PROGRESS_INTERVAL:
+            last_report = time.monotonic()
+            logger.info("todos.import.progress", rows=rows, rows_per_second=round(rows / elapsed))
+
+    settings = get_settings()
+    start = time.perf_counter()
+    try:
+        result = await imports.import_todos_stream(
+            session,
+            current_user_id,
+            request.stream(),
+            fmt,
+            batch_size=settings.import_batch_size,
+            max_rows=settings.import_max_rows,
+            progress=report,
+        )
+    except imports.ImportTooLarge as exc:
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=str(exc))
+    except imports.ImportFormatError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "todos.import.complete",
+        imported=result.imported,
+        skipped=result.skipped,
+        seconds=round(elapsed, 3),
+        rows_per_second=round(result.imported / elapsed) if elapsed else None,
+    )
+    return result
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_todos(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    session: DBSession = Depends(deps.get_read_session),
+    current_user_id: str = Depends(deps.get_current_user_id),
+) -> StreamingResponse:
+    """Stream all of the user's todos, newest first, as NDJSON or CSV."""
+    return StreamingResponse(
+        exports.export_todos(session, current_user_id, format, EXPORT_PARTITION_SIZE),
+        media_type=exports.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="todos.{format}"'},
+    )
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_todo_events(
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    session: DBSession = Depends(deps.get_db_session),
+    current_user_id: str = Depends(deps.get_current_user_id),
+) -> StreamingResponse:
+    """Server-sent events for the user's todo changes.
+
+    Emits ``created``/``updated`` (the todo) and ``deleted`` (its id) events whose ids are
+    collection versions, so a reconnect sending ``Last-Event-ID`` resumes where it left off.
+    A ``resync`` event means changes were missed and the client should reload the list.
+    """
+    # From the primary, not a replica: a lagging version would replay events the client has seen.
+    version = await run_sync(session, todo_service.get_collection_version, current_user_id)
+    await release(session)
+    resume_from = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    return StreamingResponse(
+        events.stream(
+            events.get_hub(), current_user_id, version, resume_from, get_settings().events_keepalive_seconds
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{todo_id}", response_model=TodoRead)
+async def read_todo(
+    todo_id: str,
+    request: Request,
+    response: Response,
+    session: DBSession = Depends(deps.get_read_session),
+    current_user_id: str = Depends(deps.get_current_user_id),
+) -> Union[Todo, Response]:
+    etag = await _collection_etag(session, current_user_id)
+    # Looked up even for a matching If-None-Match: the collection ETag says nothing about
+    # whether this id exists for the user.
+    todo = await run_sync(session, todo_service.get_todo, todo_id, current_user_id)
+    if todo is None:
+        raise _not_found()
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return _not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
     return todo
 
 
 @router.patch("/{todo_id}", response_model=TodoRead)
-def update_todo(
+async def update_todo(
     todo_id: str,
     payload: TodoUpdate,
-    session: Session = Depends(deps.get_session),
-    current_user: User = Depends(deps.get_current_user),
-) -> Todo:
-    todo = _get_user_todo(session, todo_id, current_user.id)
-    for field, value in payload.model_dump(exclude_unset=True).items():
-        setattr(todo, field, value)
-    session.add(todo)
-    session.commit()
-    session.refresh(todo)
+    session: DBSession = Depends(deps.get_db_session),
+    current_user_id: str = Depends(deps.get_current_user_id),
+) -> TodoRead:
+    todo = await run_sync(session, todo_service.update_todo, todo_id, current_user_id, payload)
+    if todo is None:
+        raise _not_found()
     return todo
 
 
 @router.delete("/{todo_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_todo(
+async def delete_todo(
     todo_id: str,
-    session: Session = Depends(deps.get_session),
-    current_user: User = Depends(deps.get_current_user),
+    session: DBSession = Depends(deps.get_db_session),
+    current_user_id: str = Depends(deps.get_current_user_id),
 ) -> None:
-    todo = _get_user_todo(session, todo_id, current_user.id)
-    session.delete(todo)
-    session.commit()
+    if not await run_sync(session, todo_service.delete_todo, todo_id, current_user_id):
+        raise _not_found()
@@ -0,0 +1,142 @@
+"""Response body encodings negotiated from ``Accept-Encoding`` for ``CompressionMiddleware``.
+
+gzip is always available; zstd and br need ``zstandard`` and ``brotli`` (the ``speedups``
+extra) and are preferred, in that order, when the client accepts them equally. Levels are
+tuned for dynamic responses: ``COMPRESSION_ZSTD_LEVEL``, ``COMPRESSION_BROTLI_QUALITY`` and
+``COMPRESSION_GZIP_LEVEL``. An ``Encoder`` compresses one response: a streamed body is
+flushed after every chunk, so each chunk reaches the client as soon as the app sends it.
+"""
+import zlib
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from .config import Settings
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard ships with the ``speedups`` extra
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli ships with the ``speedups`` extra
+    brotli = None
+
+# Media types worth compressing besides ``text/*``; everything else (images, archives, ...)
+# already is compressed or is not text.
+COMPRESSIBLE_TYPES = frozenset(
+    {
+        "application/json",
+        "application/x-ndjson",
+        "application/javascript",
+        "application/xml",
+        "image/svg+xml",
+    }
+)
+
+
+class Encoder(ABC):
+    """Incremental compressor for one response body."""
+
+    @abstractmethod
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compress ``data`` and flush it; ``final`` also ends the stream."""
+
+
+class GzipEncoder(Encoder):
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(mode)
+
+
+class BrotliEncoder(Encoder):
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        compressed = self._compressor.process(data)
+        return compressed + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class ZstdEncoder(Encoder):
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        mode = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._compressor.compress(data) + self._compressor.flush(mode)
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Encodings this process can produce, most preferred first."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return tuple(encodings)
+
+
+def encoder(encoding: str, settings: Settings) -> Encoder:
+    if encoding == "zstd":
+        return ZstdEncoder(settings.compression_zstd_level)
+    if encoding == "br":
+        return BrotliEncoder(settings.compression_brotli_quality)
+    return GzipEncoder(settings.compression_gzip_level)
+
+
+def _weights(accept_encoding: str) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+    return weights
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept_encoding: str, encodings: Tuple[str, ...]) -> Optional[str]:
+    """The encoding of ``encodings`` the client weighs highest, ties going to the earlier one.
+
+    None when the client accepts none of them (``q=0``), including through ``*``. Clients
+    send a handful of distinct headers, so results are cached.
+    """
+    weights = _weights(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for encoding in encodings:
+        weight = weights.get(encoding, wildcard)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compressible(content_type: str) -> bool:
+    """Whether a body of ``content_type`` is text worth compressing.
+
+    Server-sent events are not: a compressor would hold each event back until it flushes.
+    """
+    media_type = content_type.partition(";")[0].strip().lower()
+    if media_type == "text/event-stream":
+        return False
+    return (
+        media_type.startswith("text/")
+        or media_type in COMPRESSIBLE_TYPES
+        or media_type.endswith("+json")
+        or media_type.endswith("+xml")
+    )
@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import List, Optional, Union
+from typing import List, Literal, Optional, Union
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
@@ -9,9 +9,88 @@ class Settings(BaseSettings):
     app_name: str = "Azure Todo API"
     app_env: str = Field("local", alias="APP_ENV")
     log_level: str = Field("INFO", alias="LOG_LEVEL")
+    log_async: bool = Field(True, alias="LOG_ASYNC")
+    log_queue_size: int = Field(10_000, ge=1, alias="LOG_QUEUE_SIZE")
+    log_access_sample_rate: float = Field(1.0, ge=0, le=1, alias="LOG_ACCESS_SAMPLE_RATE")
     database_url: str = Field(..., alias="DATABASE_URL")
+    database_async: bool = Field(False, alias="DATABASE_ASYNC")
+    db_pool_size: int = Field(5, ge=1, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, ge=0, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(30.0, gt=0, alias="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(1800, alias="DB_POOL_RECYCLE")
+    db_pgbouncer: bool = Field(False, alias="DB_PGBOUNCER")
+    # Connections opened at startup so the first requests after a cold start skip the handshake.
+    db_pool_prewarm: int = Field(0, ge=0, alias="DB_POOL_PREWARM")
+    # Comma-separated read replicas for GET routes, taken in turn while they pass health checks.
+    database_replica_urls: Union[List[str], str] = Field(default_factory=list, alias="DATABASE_REPLICA_URLS")
+    db_replica_check_seconds: float = Field(5.0, gt=0, alias="DB_REPLICA_CHECK_SECONDS")
+    # After a write, the user's reads stay on the primary this long so replication lag cannot hide
+    # their own change; size it above the replicas' usual lag. Other API processes only honour it
+    # for clients that send back the ``X-Read-Primary-Until`` header from the write's response.
+    db_read_your_writes_seconds: float = Field(5.0, ge=0, alias="DB_READ_YOUR_WRITES_SECONDS")
     jwt_secret: str = Field(..., alias="JWT_SECRET")
     access_token_expire_minutes: int = Field(60, alias="ACCESS_TOKEN_EXPIRE_MINUTES")
+    bcrypt_rounds: int = Field(12, ge=4, le=31, alias="BCRYPT_ROUNDS")
+    password_hash_workers: Optional[int] = Field(None, ge=1, alias="PASSWORD_HASH_WORKERS")
+    password_hash_max_pending: int = Field(64, ge=1, alias="PASSWORD_HASH_MAX_PENDING")
+    principal_cache_size: int = Field(10_000, ge=0, alias="PRINCIPAL_CACHE_SIZE")
+    principal_cache_ttl_seconds: float = Field(30.0, ge=0, alias="PRINCIPAL_CACHE_TTL_SECONDS")
+    # When enabled, tokens carry the user's is_active flag and todo routes trust it without a
+    # database lookup, so a deactivation on another replica only takes effect once the token
+    # expires. Deactivations seen by this process are enforced immediately.
+    jwt_embed_active: bool = Field(False, alias="JWT_EMBED_ACTIVE")
+    # Deactivated or deleted users remembered for a token lifetime to enforce the above. Kept apart
+    # from PRINCIPAL_CACHE_SIZE, which may be 0; overflowing it forgets the oldest deactivations.
+    deactivated_principals_max: int = Field(100_000, ge=1, alias="DEACTIVATED_PRINCIPALS_MAX")
+    # "postgres" fans todo change events out to every replica via LISTEN/NOTIFY; "memory" only
+    # reaches streams connected to the replica that handled the write.
+    events_backend: Literal["memory", "postgres"] = Field("memory", alias="EVENTS_BACKEND")
+    events_replay_size: int = Field(256, ge=1, alias="EVENTS_REPLAY_SIZE")
+    events_replay_ttl_seconds: float = Field(600.0, gt=0, alias="EVENTS_REPLAY_TTL_SECONDS")
+    events_keepalive_seconds: float = Field(15.0, gt=0, alias="EVENTS_KEEPALIVE_SECONDS")
+    # Deleted todos are remembered this long for ``GET /todos/changes``; older sync tokens are
+    # refused (410) and the client must sync in full.
+    sync_tombstone_retention_days: int = Field(30, ge=1, alias="SYNC_TOMBSTONE_RETENTION_DAYS")
+    import_batch_size: int = Field(2_000, ge=1, alias="IMPORT_BATCH_SIZE")
+    import_max_rows: int = Field(1_000_000, ge=1, alias="IMPORT_MAX_ROWS")
+    # Token buckets as "<requests>/<second|minute|hour|day>"; an empty value disables the rule.
+    # "memory" limits each process on its own; "database" shares buckets between replicas.
+    rate_limit_enabled: bool = Field(True, alias="RATE_LIMIT_ENABLED")
+    rate_limit_backend: Literal["memory", "database"] = Field("memory", alias="RATE_LIMIT_BACKEND")
+    rate_limit_auth: str = Field("10/minute", alias="RATE_LIMIT_AUTH")
+    rate_limit_writes: str = Field("120/minute", alias="RATE_LIMIT_WRITES")
+    rate_limit_max_keys: int = Field(100_000, ge=1, alias="RATE_LIMIT_MAX_KEYS")
+    # Statements slower than this are logged with their shape and request id; 0 disables.
+    db_slow_query_ms: float = Field(200.0, ge=0, alias="DB_SLOW_QUERY_MS")
+    # A statement shape repeated this often in one request is reported as a likely N+1.
+    db_n_plus_one_threshold: int = Field(10, ge=2, alias="DB_N_PLUS_ONE_THRESHOLD")
+    # Adds a Server-Timing header (db, auth, app) to every response; exposes internals.
+    debug_profiling: bool = Field(False, alias="DEBUG_PROFILING")
+    # Admin CPU profiling (X-Profile header, /debug/profile) and /healthz/pool are off unless a
+    # token is set; requests present it as X-Profile-Token.
+    profiling_token: Optional[str] = Field(None, alias="PROFILING_TOKEN")
+    profiling_max_seconds: float = Field(30.0, gt=0, le=300, alias="PROFILING_MAX_SECONDS")
+    # ``GET /healthz/ready`` answers 503, so the load balancer sends traffic elsewhere, while the
+    # primary fails a ``SELECT 1`` (run at most once per interval) or while this process is at
+    # capacity: that share of the pool (size plus overflow) or of PASSWORD_HASH_MAX_PENDING in
+    # use, or the event loop running timers this late.
+    readiness_db_check_seconds: float = Field(5.0, gt=0, alias="READINESS_DB_CHECK_SECONDS")
+    readiness_db_timeout_seconds: float = Field(2.0, gt=0, alias="READINESS_DB_TIMEOUT_SECONDS")
+    readiness_max_pool_utilization: float = Field(1.0, gt=0, le=1, alias="READINESS_MAX_POOL_UTILIZATION")
+    readiness_max_hash_queue: float = Field(1.0, gt=0, le=1, alias="READINESS_MAX_HASH_QUEUE")
+    readiness_max_loop_lag_ms: float = Field(500.0, gt=0, alias="READINESS_MAX_LOOP_LAG_MS")
+    # JSON written at build time by ``scripts.export_openapi``; served instead of generating the
+    # schema on the first /docs or /openapi.json request.
+    openapi_schema_path: Optional[str] = Field(None, alias="OPENAPI_SCHEMA_PATH")
+    # Text responses of at least COMPRESSION_MIN_SIZE bytes are compressed with zstd, br or gzip,
+    # whichever the client accepts (zstd and br need the ``speedups`` extra). Levels trade CPU
+    # per response for bytes on the wire; see ``benchmarks.compression``.
+    compression_enabled: bool = Field(True, alias="COMPRESSION_ENABLED")
+    compression_min_size: int = Field(1024, ge=0, alias="COMPRESSION_MIN_SIZE")
+    compression_gzip_level: int = Field(5, ge=1, le=9, alias="COMPRESSION_GZIP_LEVEL")
+    compression_brotli_quality: int = Field(4, ge=0, le=11, alias="COMPRESSION_BROTLI_QUALITY")
+    compression_zstd_level: int = Field(1, ge=1, le=22, alias="COMPRESSION_ZSTD_LEVEL")
+    metrics_enabled: bool = Field(True, alias="METRICS_ENABLED")
     cors_origins: Union[List[str], str] = Field(default="http://localhost:5173", alias="CORS_ORIGINS")
     cors_origin_regex: Optional[str] = Field(
         default=r"^https://[a-z0-9]+\.z[0-9]+\.web\.core\.windows\.net$",
@@ -22,7 +101,7 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = False
 
-    @field_validator("cors_origins", mode="after")
+    @field_validator("cors_origins", "database_replica_urls", mode="after")
     @classmethod
     def split_origins(cls, value: Union[List[str], str]) -> List[str]:
         if isinstance(value, str):
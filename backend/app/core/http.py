@@ -0,0 +1,10 @@
+"""Helpers over raw ASGI scopes, for code that runs before a ``Request`` exists."""
+from typing import Any, Mapping, Optional
+
+
+def request_header(scope: Mapping[str, Any], name: bytes) -> Optional[str]:
+    """The first value of header ``name`` (lower-case bytes, as ASGI sends names), if present."""
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
@@ -1,33 +1,233 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
-from typing import Any, Dict
+import threading
+from typing import Any, Callable, Dict, List, Optional, TextIO
 
 import structlog
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ships with the ``speedups`` extra
+    orjson = None
 
-def configure_logging(level: str = "INFO") -> None:
+from app.core.metrics import LOG_LINES_DROPPED
+
+_STOP = object()
+_writer: Optional["BatchingLogWriter"] = None
+
+
+def _dumps(obj: Any, **kwargs: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, default=str).decode()
+    kwargs.setdefault("default", str)
+    return json.dumps(obj, **kwargs)
+
+
+class BatchingLogWriter:
+    """Writes log lines from a background thread so request handlers never block on stdout.
+
+    Lines go into a bounded queue; when it is full (the collector is not keeping up) new lines
+    are dropped and counted instead of applying backpressure to the request path.
+    """
+
+    def __init__(
+        self,
+        stream: TextIO,
+        max_queue: int = 10_000,
+        batch_size: int = 512,
+        flush_interval: float = 0.05,
+    ) -> None:
+        self._stream = stream
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._dropped_lock = threading.Lock()
+        self._stream_lock = threading.Lock()
+        self.closed = False
+        self.dropped = 0
+        self._unreported_drops = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, line: str) -> None:
+        if self.closed:
+            # Loggers cached before shutdown still hold the writer; write them through directly.
+            self._write([line])
+            return
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+                self._unreported_drops += 1
+            LOG_LINES_DROPPED.inc()
+
+    def _drain(self, first: Any) -> List[str]:
+        batch = [first]
+        while len(batch) < self._batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self._flush_interval)
+            except queue.Empty:
+                continue
+            batch = self._drain(first)
+            stop = _STOP in batch
+            lines = [line for line in batch if line is not _STOP]
+            with self._dropped_lock:
+                if self._unreported_drops:
+                    lines.append(_dumps({"event": "log.dropped", "level": "warning", "count": self._unreported_drops}))
+                    self._unreported_drops = 0
+            if lines:
+                self._write(lines)
+            if stop:
+                return
+
+    def _write(self, lines: List[str]) -> None:
+        with self._stream_lock:
+            try:
+                self._stream.write("\n".join(lines) + "\n")
+                self._stream.flush()
+            except (OSError, ValueError):
+                pass
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Flush queued lines and stop the writer thread; later lines are written synchronously.
+
+        Waits at most ``timeout``: if the stream is stuck, queued lines are abandoned.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return  # the thread is stuck writing; it is a daemon and dies with the process
+        self._thread.join(timeout)
+
+
+class QueuedLogger:
+    """structlog logger that hands rendered lines to a ``BatchingLogWriter``."""
+
+    def __init__(self, writer: BatchingLogWriter) -> None:
+        self._writer = writer
+
+    def msg(self, message: str) -> None:
+        self._writer.write(message)
+
+    log = debug = info = warn = warning = error = critical = exception = fatal = msg
+
+
+class QueuedHandler(logging.Handler):
+    """Routes stdlib logging (uvicorn, SQLAlchemy, ...) through the same writer."""
+
+    def __init__(self, writer: BatchingLogWriter) -> None:
+        super().__init__()
+        self._writer = writer
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._writer.write(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+def sample_access_logs(rate: float, rand: Callable[[], float] = random.random):
+    """Processor keeping only a ``rate`` fraction of ``request.complete`` lines for 2xx responses.
+
+    Errors, redirects and every other event are always kept.
+    """
+
+    def processor(logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        if (
+            rate < 1.0
+            and event_dict.get("event") == "request.complete"
+            and 200 <= event_dict.get("status_code", 0) < 300
+            and rand() >= rate
+        ):
+            raise structlog.DropEvent
+        return event_dict
+
+    return processor
+
+
+def configure_logging(
+    level: str = "INFO",
+    *,
+    async_writer: bool = True,
+    queue_size: int = 10_000,
+    access_sample_rate: float = 1.0,
+) -> None:
     """Configure structlog and standard logging for JSON output."""
+    global _writer
 
     timestamper = structlog.processors.TimeStamper(fmt="iso")
 
+    if async_writer:
+        # Reused across reconfiguration: loggers cached on first use keep a reference to it.
+        if _writer is None:
+            _writer = BatchingLogWriter(sys.stdout, max_queue=queue_size)
+        queued_logger = QueuedLogger(_writer)
+        logger_factory: Callable[..., Any] = lambda *args: queued_logger  # noqa: E731
+        handler: logging.Handler = QueuedHandler(_writer)
+    else:
+        logger_factory = structlog.PrintLoggerFactory(sys.stdout)
+        handler = logging.StreamHandler(sys.stdout)
+
     structlog.configure(
         processors=[
+            sample_access_logs(access_sample_rate),
             structlog.contextvars.merge_contextvars,
             structlog.processors.add_log_level,
             timestamper,
             structlog.processors.format_exc_info,
             structlog.processors.dict_tracebacks,
-            structlog.processors.JSONRenderer(),
+            structlog.processors.JSONRenderer(serializer=_dumps),
         ],
         wrapper_class=structlog.make_filtering_bound_logger(getattr(logging, level.upper(), logging.INFO)),
+        logger_factory=logger_factory,
         cache_logger_on_first_use=True,
     )
 
-    handler = logging.StreamHandler(sys.stdout)
     handler.setFormatter(logging.Formatter("%(message)s"))
     logging.basicConfig(level=level.upper(), handlers=[handler], force=True)
 
 
+def flush_logging() -> None:
+    """Drain the background writer; called on shutdown.
+
+    Standard logging goes back to a synchronous stdout handler, so lines logged after the
+    lifespan ends (uvicorn's shutdown messages) are still written.
+    """
+    global _writer
+    if _writer is None:
+        return
+    _writer.close()
+    _writer = None
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, QueuedHandler):
+            stream_handler = logging.StreamHandler(sys.stdout)
+            stream_handler.setFormatter(handler.formatter)
+            root.removeHandler(handler)
+            root.addHandler(stream_handler)
+
+
+atexit.register(flush_logging)
+
+
 def bind_request_context(**ctx: Dict[str, Any]) -> None:
     structlog.contextvars.bind_contextvars(**ctx)
 
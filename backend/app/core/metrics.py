@@ -0,0 +1,146 @@
+"""Prometheus metrics for the API.
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set (required when running several uvicorn workers),
+prometheus_client writes samples to per-process files in that directory and ``render``
+aggregates them, so any worker can answer a scrape for the whole replica.
+"""
+import os
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template, method and status code.",
+    ["method", "route", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served.",
+    multiprocess_mode="livesum",
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database statements executed per request.",
+    ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent executing database statements per request.",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_SLOW_QUERIES = Counter(
+    "db_slow_queries_total",
+    "Statements slower than DB_SLOW_QUERY_MS.",
+)
+DB_N_PLUS_ONE = Counter(
+    "db_n_plus_one_total",
+    "Requests that repeated one statement shape at least DB_N_PLUS_ONE_THRESHOLD times.",
+    ["route"],
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Time waited to check out a pooled database connection.",
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Pooled database connections by state (checked_out, checked_in, overflow, size).",
+    ["engine", "state"],
+    multiprocess_mode="livesum",
+)
+DB_REPLICA_HEALTHY = Gauge(
+    "db_replica_healthy",
+    "1 when the read replica passed its last health check, else 0.",
+    ["replica"],
+    multiprocess_mode="livemin",
+)
+DB_READ_SESSIONS = Counter(
+    "db_read_sessions_total",
+    "Read-only sessions by where they were routed (replica, primary_recent_write, primary_fallback).",
+    ["target"],
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Wall time of bcrypt operations including queueing in the hashing pool.",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+JWT_SECONDS = Histogram(
+    "jwt_seconds",
+    "Time spent encoding or decoding access tokens.",
+    ["operation"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025),
+)
+TODO_EVENT_STREAMS = Gauge(
+    "todo_event_streams",
+    "Open GET /todos/stream connections.",
+    multiprocess_mode="livesum",
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected with 429 by rate limit rule.",
+    ["rule"],
+)
+RATE_LIMIT_BACKEND_ERRORS = Counter(
+    "rate_limit_backend_errors_total",
+    "Rate limit checks that failed in the backend and let the request through.",
+)
+RESPONSE_COMPRESSION_BYTES = Counter(
+    "response_compression_bytes_total",
+    "Response body bytes before (identity) and after compression, by encoding.",
+    ["encoding", "stage"],
+)
+EVENT_LOOP_LAG_SECONDS = Gauge(
+    "event_loop_lag_seconds",
+    "How late the event loop last ran a timer.",
+    multiprocess_mode="livemax",
+)
+READINESS_FAILURES = Counter(
+    "readiness_failures_total",
+    "Readiness probes answered 503, by failing check (database, pool, event_loop, hashing).",
+    ["check"],
+)
+
+LOG_LINES_DROPPED = Counter(
+    "log_lines_dropped_total",
+    "Log lines discarded because the log writer queue was full.",
+)
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def render() -> Tuple[bytes, str]:
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the shared directory on shutdown."""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(os.getpid())
@@ -1,14 +1,41 @@
+import cProfile
+import math
+import time
 import uuid
-from typing import Callable
+from typing import Any, Callable, Optional
 
 import structlog
-from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
 
+from app.db.instrumentation import QueryStats, start_request_stats
+from app.db.replicas import READ_PRIMARY_HEADER, start_request_writes
+from app.db.session import get_replicas, update_pool_metrics
+
+from . import compression, metrics, profiling
 from . import logging as logging_utils
+from .config import get_settings
+from .http import request_header
+from .timing import server_timing, start_timings
+
+REQUEST_ID_HEADER = b"x-request-id"
+MAX_REQUEST_ID_LENGTH = 128
+# Chunks at least this large are compressed in a worker thread (the codecs release the GIL).
+COMPRESSION_OFFLOAD_SIZE = 128 * 1024
+_QUERY_STATS_KEY = "app.query_stats"
+
+access_logger = structlog.get_logger("app.access")
+db_logger = structlog.get_logger("app.db")
+
 
+class RequestLoggingMiddleware:
+    """Assigns a request ID, binds it to the log context and emits one access log line.
 
-class RequestIDMiddleware:
-    """Ensures every request has a request ID and binds it to the log context."""
+    Pure ASGI: the request ID is read straight from ``scope["headers"]`` and no ``Request``
+    object, extra task or response stream is created, so streaming responses pass through.
+    The access line carries the request's query count and database time; statement shapes
+    repeated ``DB_N_PLUS_ONE_THRESHOLD`` times are logged as likely N+1 queries. With
+    ``DEBUG_PROFILING`` responses also get a ``Server-Timing`` header.
+    """
 
     def __init__(self, app):
         self.app = app
@@ -18,24 +45,333 @@ class RequestIDMiddleware:
             await self.app(scope, receive, send)
             return
 
-        request = Request(scope, receive=receive)
-        request_id = request.headers.get("x-request-id") or str(uuid.uuid4())
+        request_id = request_header(scope, REQUEST_ID_HEADER)
+        if not request_id or len(request_id) > MAX_REQUEST_ID_LENGTH:
+            request_id = str(uuid.uuid4())
+        request_id_header = (REQUEST_ID_HEADER, request_id.encode("latin-1"))
         logging_utils.bind_request_context(request_id=request_id)
+        settings = get_settings()
+        query_stats = request_query_stats(scope)
+        timings = start_timings() if settings.debug_profiling else None
+
+        status_code = 500
 
         async def send_wrapper(message):
-            if message.get("type") == "http.response.start":
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
                 headers = message.setdefault("headers", [])
-                headers.append((b"x-request-id", request_id.encode()))
+                headers.append(request_id_header)
+                if timings is not None:
+                    value = server_timing(time.perf_counter() - start, query_stats.seconds, query_stats.count, timings)
+                    headers.append((b"server-timing", value.encode("latin-1")))
             await send(message)
 
+        start = time.perf_counter()
         try:
             await self.app(scope, receive, send_wrapper)
         finally:
+            access_logger.info(
+                "request.complete",
+                method=scope["method"],
+                path=scope["path"],
+                status_code=status_code,
+                duration_ms=round((time.perf_counter() - start) * 1000, 3),
+                db_queries=query_stats.count,
+                db_ms=round(query_stats.seconds * 1000, 3),
+            )
+            for shape, count in query_stats.repeated(settings.db_n_plus_one_threshold):
+                route = route_template(scope)
+                metrics.DB_N_PLUS_ONE.labels(route).inc()
+                db_logger.warning("db.n_plus_one", statement=shape, count=count, route=route, request_id=request_id)
             logging_utils.clear_request_context()
 
 
-async def log_requests(request: Request, call_next: Callable[[Request], Response]) -> Response:
-    logger = structlog.get_logger().bind(path=request.url.path, method=request.method)
-    response = await call_next(request)
-    logger.info("request.complete", status_code=response.status_code)
-    return response
+def request_query_stats(scope) -> QueryStats:
+    """The request's query stats, started by whichever middleware sees the request first."""
+    stats = scope.get(_QUERY_STATS_KEY)
+    if stats is None:
+        stats = scope[_QUERY_STATS_KEY] = start_request_stats()
+    return stats
+
+
+def route_template(scope) -> str:
+    """The matched route's path template, keeping metric label cardinality bounded."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Records per-route request counts, latency and database usage for Prometheus."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):  # type: ignore[override]
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        query_stats = request_query_stats(scope)
+        metrics.REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.REQUESTS_IN_PROGRESS.dec()
+            route = route_template(scope)
+            method = scope["method"]
+            metrics.REQUESTS.labels(method, route, str(status_code)).inc()
+            metrics.REQUEST_LATENCY.labels(method, route).observe(elapsed)
+            metrics.REQUEST_DB_QUERIES.labels(route).observe(query_stats.count)
+            metrics.REQUEST_DB_SECONDS.labels(route).observe(query_stats.seconds)
+            update_pool_metrics()
+
+
+class RateLimitMiddleware:
+    """Answers 429 with ``Retry-After`` when ``get_limiter().check(scope)`` rejects a request.
+
+    Runs before routing, so rejected requests never reach authentication or the database.
+    """
+
+    def __init__(self, app, get_limiter: Callable[[], Any]):
+        self.app = app
+        self.get_limiter = get_limiter
+
+    async def __call__(self, scope, receive, send):  # type: ignore[override]
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rejection = await self.get_limiter().check(scope)
+        if rejection is None:
+            await self.app(scope, receive, send)
+            return
+
+        metrics.RATE_LIMIT_REJECTIONS.labels(rejection.rule).inc()
+        retry_after = str(max(1, math.ceil(rejection.retry_after))).encode()
+        await _respond(send, 429, b'{"detail":"Too many requests, retry later"}', [(b"retry-after", retry_after)])
+
+
+class ReadYourWritesMiddleware:
+    """Hands the read-your-writes window to clients so it holds across API processes.
+
+    A response to a request that committed a write for its user carries ``X-Read-Primary-Until``
+    (a Unix time ``DB_READ_YOUR_WRITES_SECONDS`` ahead); a request that sends it back reads from
+    the primary until then. Does nothing unless read replicas are configured.
+    """
+
+    header = READ_PRIMARY_HEADER.lower().encode()
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):  # type: ignore[override]
+        window = get_settings().db_read_your_writes_seconds
+        if scope["type"] != "http" or not window or not get_replicas():
+            await self.app(scope, receive, send)
+            return
+
+        writes = start_request_writes(request_header(scope, self.header))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and writes.wrote:
+                message["headers"].append((self.header, f"{time.time() + window:.3f}".encode()))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class ProfilingMiddleware:
+    """Profiles a request sent with ``X-Profile`` and a valid ``X-Profile-Token``.
+
+    The response body is replaced by the profile (see ``app.core.profiling``); the status the
+    app produced is returned in ``X-Profiled-Status``. Unless ``PROFILING_TOKEN`` is set the
+    cost per request is one settings lookup.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):  # type: ignore[override]
+        if scope["type"] != "http" or not profiling.enabled():
+            await self.app(scope, receive, send)
+            return
+        mode = request_header(scope, b"x-profile")
+        if mode is None or not profiling.authorized(request_header(scope, b"x-profile-token")):
+            await self.app(scope, receive, send)
+            return
+        if mode not in profiling.MODES:
+            detail = f'{{"detail":"X-Profile must be one of {", ".join(profiling.MODES)}"}}'
+            await _respond(send, 400, detail.encode())
+            return
+        try:
+            profiling.claim()
+        except profiling.ProfilerBusy:
+            await _respond(send, 409, b'{"detail":"A profile is already running"}')
+            return
+
+        status_code = 500
+
+        async def discard_body(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        try:
+            if mode == "cprofile":
+                profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    await self.app(scope, receive, discard_body)
+                finally:
+                    profile.disable()
+                report = profiling.pstats_report(profile)
+            else:
+                sampler = profiling.StackSampler()
+                sampler.start()
+                try:
+                    await self.app(scope, receive, discard_body)
+                finally:
+                    samples = sampler.stop()
+                report = profiling.collapsed(samples)
+        finally:
+            profiling.release()
+        await _respond(
+            send,
+            200,
+            report.encode(),
+            [(b"x-profiled-status", str(status_code).encode())],
+            content_type=b"text/plain; charset=utf-8",
+        )
+
+
+class CompressionMiddleware:
+    """Compresses text responses with the encoding the client prefers (``app.core.compression``).
+
+    Left alone: bodies under ``COMPRESSION_MIN_SIZE`` (judged by ``Content-Length`` or, for a
+    response sent in one piece, its body), responses that are already encoded, ask for
+    ``no-transform``, are not text or are server-sent events, and ``HEAD`` requests. Streamed
+    bodies are compressed as the app sends them, one output chunk per input chunk, and large
+    chunks are compressed in a worker thread so the event loop keeps serving other requests.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.encodings = compression.available_encodings()
+
+    async def __call__(self, scope, receive, send):  # type: ignore[override]
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        settings = get_settings()
+        min_size = settings.compression_min_size
+        accept_encoding = request_header(scope, b"accept-encoding")
+        encoding = compression.negotiate(accept_encoding, self.encodings) if accept_encoding else None
+        held: Optional[dict] = None
+        encoder: Optional[compression.Encoder] = None
+
+        async def send_wrapper(message):
+            nonlocal held, encoder
+            if message["type"] == "http.response.start":
+                if not _compressible_response(message, min_size):
+                    await send(message)
+                    return
+                _add_vary(message["headers"])
+                if encoding is None:
+                    await send(message)
+                else:
+                    held = message  # until the first chunk shows whether the body is big enough
+                return
+            if message["type"] != "http.response.body" or (held is None and encoder is None):
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if held is not None and encoder is None:
+                if not more_body and len(body) < min_size:
+                    await send(held)
+                    await send(message)
+                    held = None
+                    return
+                encoder = compression.encoder(encoding, settings)
+
+            if len(body) >= COMPRESSION_OFFLOAD_SIZE:
+                compressed = await run_in_threadpool(encoder.compress, body, not more_body)
+            else:
+                compressed = encoder.compress(body, not more_body)
+            metrics.RESPONSE_COMPRESSION_BYTES.labels(encoding, "identity").inc(len(body))
+            metrics.RESPONSE_COMPRESSION_BYTES.labels(encoding, "compressed").inc(len(compressed))
+
+            if held is not None:
+                held["headers"] = _encoded_headers(held["headers"], encoding, None if more_body else len(compressed))
+                await send(held)
+                held = None
+            await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _compressible_response(message, min_size: int) -> bool:
+    if message["status"] < 200 or message["status"] in (204, 206, 304):
+        return False
+    content_type = None
+    for key, value in message.setdefault("headers", []):
+        key = key.lower()
+        if key == b"content-encoding":
+            return False
+        if key == b"cache-control" and b"no-transform" in value.lower():
+            return False
+        if key == b"content-length" and int(value) < min_size:
+            return False
+        if key == b"content-type":
+            content_type = value.decode("latin-1")
+    return content_type is not None and compression.compressible(content_type)
+
+
+def _add_vary(headers) -> None:
+    for index, (key, value) in enumerate(headers):
+        if key.lower() == b"vary":
+            if value.strip() != b"*" and b"accept-encoding" not in value.lower():
+                headers[index] = (key, value + b", Accept-Encoding")
+            return
+    headers.append((b"vary", b"Accept-Encoding"))
+
+
+def _encoded_headers(headers, encoding: str, content_length: Optional[int]):
+    """``headers`` for the encoded body; a strong ETag is weakened as it names the identity bytes."""
+    encoded = []
+    for key, value in headers:
+        lowered = key.lower()
+        if lowered == b"content-length":
+            continue
+        if lowered == b"etag" and value.startswith(b'"'):
+            value = b"W/" + value
+        encoded.append((key, value))
+    encoded.append((b"content-encoding", encoding.encode()))
+    if content_length is not None:
+        encoded.append((b"content-length", str(content_length).encode()))
+    return encoded
+
+
+async def _respond(send, status: int, body: bytes, headers=(), content_type: bytes = b"application/json") -> None:
+    """Send a complete response from middleware that answers without calling the app."""
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode()), *headers],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,21 @@
+"""bcrypt primitives, kept apart from the rest of the app for the hashing pool.
+
+``hashing`` runs these in spawned worker processes, which import the function's module
+before their first job. Defined here, that is bcrypt alone rather than the whole
+``app.services`` package (SQLAlchemy, the models, FastAPI and jose).
+"""
+from typing import Optional
+
+import bcrypt
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+
+
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
+    if rounds is None:
+        from app.core.config import get_settings
+
+        rounds = get_settings().bcrypt_rounds
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
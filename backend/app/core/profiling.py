@@ -0,0 +1,114 @@
+"""Admin-only CPU profiling for a live replica; off unless ``PROFILING_TOKEN`` is set.
+
+Two modes, both authorized by the token in ``X-Profile-Token``:
+
+* One request, by sending ``X-Profile: cprofile`` or ``X-Profile: collapsed`` with it
+  (``ProfilingMiddleware``). The response body is replaced by the profile.
+* The whole process for a few seconds, with ``GET /debug/profile?seconds=N``.
+
+``cprofile`` traces the event loop thread deterministically and prints pstats sorted by
+cumulative time. Other requests interleaved on the loop show up too, and work handed to the
+threadpool does not. ``collapsed`` samples the stacks of every thread and prints them in the
+collapsed format that flamegraph.pl and speedscope read. Only one profile runs at a time.
+"""
+import asyncio
+import cProfile
+import hmac
+import io
+import pstats
+import sys
+import threading
+from collections import Counter
+from types import FrameType
+from typing import List, Optional
+
+from app.core.config import get_settings
+
+MODES = ("cprofile", "collapsed")
+SAMPLE_INTERVAL = 0.005
+PSTATS_LIMIT = 80
+
+_active = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """Another profile is already running in this process."""
+
+
+def enabled() -> bool:
+    return bool(get_settings().profiling_token)
+
+
+def authorized(token: Optional[str]) -> bool:
+    expected = get_settings().profiling_token
+    return bool(expected and token and hmac.compare_digest(token.encode(), expected.encode()))
+
+
+def claim() -> None:
+    if not _active.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+
+
+def release() -> None:
+    _active.release()
+
+
+def _stack(frame: Optional[FrameType]) -> List[str]:
+    names = []
+    while frame is not None:
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}")
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+class StackSampler:
+    """Samples every thread's Python stack from a background thread until stopped."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> "Counter[str]":
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    stack = ";".join([names.get(ident, str(ident)), *_stack(frame)])
+                    self.samples[stack.replace(" ", "_")] += 1
+
+
+def collapsed(samples: "Counter[str]") -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+def pstats_report(profile: cProfile.Profile, limit: int = PSTATS_LIMIT) -> str:
+    stream = io.StringIO()
+    pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
+
+
+async def sample_process(seconds: float) -> str:
+    """Collapsed stacks of all threads sampled for ``seconds``."""
+    claim()
+    try:
+        sampler = StackSampler()
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            samples = sampler.stop()
+        return collapsed(samples)
+    finally:
+        release()
@@ -0,0 +1,53 @@
+"""JSON encoding for response bodies.
+
+FastAPI's default path validates a returned object against ``response_model``, encodes it to
+plain Python values and hands those to the stdlib ``json`` module. Hot read endpoints skip all
+of that: they select exactly the response fields as row tuples and return ``json_response``
+over plain dicts, encoded once by orjson (the ``speedups`` extra) or, without it, by ``json``
+with the same output. ``response_model`` is still declared on those routes for the OpenAPI
+schema; FastAPI does not re-validate a ``Response`` returned directly.
+"""
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ships with the ``speedups`` extra
+    orjson = None
+
+# ``FastAPI(default_response_class=...)``: ``ORJSONResponse`` requires orjson at render time.
+DefaultResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON; datetimes as ISO 8601, like Pydantic's JSON mode for naive values."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def records(rows: Iterable[Sequence[Any]], fields: Sequence[str]) -> List[Dict[str, Any]]:
+    """Row tuples as dicts keyed by ``fields`` (the columns' order in the SELECT)."""
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def json_response(
+    content: Any,
+    *,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """A JSON response encoded as-is, bypassing ``response_model`` validation."""
+    return Response(dumps(content), status_code=status_code, headers=headers, media_type="application/json")
@@ -0,0 +1,39 @@
+"""Per-request time breakdown reported in the ``Server-Timing`` header (``DEBUG_PROFILING``).
+
+Code paths worth attributing wrap themselves in ``timed(name)``; outside a profiled request
+that is a single context variable lookup. Database time comes from the query stats instead.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def start_timings() -> Dict[str, float]:
+    """Begin collecting for the current request; shared by reference with threadpool workers."""
+    timings: Dict[str, float] = {}
+    _timings.set(timings)
+    return timings
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def server_timing(total: float, db_seconds: float, db_queries: int, timings: Dict[str, float]) -> str:
+    """``Server-Timing`` value; ``app`` is time not spent waiting on the database."""
+    entries = [f'db;dur={db_seconds * 1000:.3f};desc="{db_queries} queries"']
+    entries.extend(f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings.items())
+    entries.append(f"app;dur={max(0.0, total - db_seconds) * 1000:.3f}")
+    return ", ".join(entries)
@@ -0,0 +1,109 @@
+import re
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+from app.core.metrics import DB_SLOW_QUERIES
+
+logger = structlog.get_logger(__name__)
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+|\?|%s")
+_PLACEHOLDER_LIST = re.compile(r"\(\?(?:, \?)+\)")
+_VALUES_ROWS = re.compile(r"(\(\?(?:, \?)*\))(?:, \(\?(?:, \?)*\))+")
+
+
+@lru_cache(maxsize=1024)
+def statement_shape(statement: str) -> str:
+    """``statement`` with whitespace collapsed and bind placeholders, IN lists and VALUES rows folded.
+
+    Statements that differ only in the number of bound values share one shape, and the
+    shape never contains parameter values, so it is safe to log.
+    """
+    shape = " ".join(statement.split())
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _VALUES_ROWS.sub(r"\1, ...", shape)
+    return _PLACEHOLDER_LIST.sub("(?, ...)", shape)
+
+
+class QueryStats:
+    """Statements executed and time spent in the database on behalf of one request."""
+
+    __slots__ = ("count", "seconds", "shapes")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        # Executions per statement shape, for N+1 detection.
+        self.shapes: Dict[str, int] = {}
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Shapes executed at least ``threshold`` times, most frequent first."""
+        return sorted(
+            ((shape, count) for shape, count in self.shapes.items() if count >= threshold),
+            key=lambda item: -item[1],
+        )
+
+
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def start_request_stats() -> QueryStats:
+    """Begin collecting query stats for the current request context.
+
+    The object is shared by reference, so statements run from threadpool workers (which
+    receive a copy of the context) still accumulate into it.
+    """
+    stats = QueryStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def current_request_stats() -> Optional[QueryStats]:
+    return _request_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        if not executemany:  # batches repeat by design
+            shape = statement_shape(statement)
+            stats.shapes[shape] = stats.shapes.get(shape, 0) + 1
+
+    slow_query_ms = get_settings().db_slow_query_ms
+    if slow_query_ms and elapsed * 1000 >= slow_query_ms:
+        DB_SLOW_QUERIES.inc()
+        logger.warning(
+            "db.slow_query",
+            statement=statement_shape(statement),
+            duration_ms=round(elapsed * 1000, 3),
+            executemany=executemany,
+            request_id=structlog.contextvars.get_contextvars().get("request_id"),
+        )
+
+
+def _handle_error(exception_context) -> None:
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start_time"):
+        connection.info["query_start_time"].pop()
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """Attach cursor-execute hooks; pass ``AsyncEngine.sync_engine`` for async engines."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+    return engine
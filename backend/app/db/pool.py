@@ -0,0 +1,126 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+from app.core.config import Settings
+from app.core.metrics import DB_POOL_CHECKOUT_SECONDS, DB_POOL_CONNECTIONS
+
+
+class CheckoutStats:
+    """Running totals for connection checkouts, shared by every instrumented pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+
+checkout_stats = CheckoutStats()
+
+
+class _TimedCheckoutMixin:
+    """Measures how long callers wait for a connection (queueing plus pre-ping)."""
+
+    def connect(self):  # type: ignore[no-untyped-def]
+        start = time.perf_counter()
+        try:
+            connection = super().connect()  # type: ignore[misc]
+        except exc.TimeoutError:
+            checkout_stats.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        elapsed = time.perf_counter() - start
+        checkout_stats.observe(elapsed)
+        DB_POOL_CHECKOUT_SECONDS.observe(elapsed)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(settings: Settings, use_async: bool = False, url: Optional[str] = None) -> Dict[str, Any]:
+    """Keyword arguments for ``create_engine``/``create_async_engine`` from ``Settings``.
+
+    ``url`` defaults to the primary's; replicas pass their own.
+    """
+    url = url or settings.database_url
+    connect_args: Dict[str, Any] = {}
+    options: Dict[str, Any] = {"pool_pre_ping": True, "connect_args": connect_args}
+
+    if url.startswith("sqlite"):
+        if not use_async:
+            connect_args["check_same_thread"] = False
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            # In-memory databases live inside a single connection; keep SQLAlchemy's default pool.
+            return options
+
+    if settings.db_pgbouncer:
+        # pgbouncer (transaction pooling) already multiplexes server connections and cannot
+        # track per-connection prepared statements, so skip both app-side pooling and psycopg's
+        # automatic statement preparation.
+        options["poolclass"] = NullPool
+        if url.startswith("postgresql"):
+            connect_args["prepare_threshold"] = None
+        return options
+
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if use_async else TimedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+    return options
+
+
+def describe_pool(name: str, pool: Pool) -> Dict[str, Any]:
+    status: Dict[str, Any] = {"engine": name, "pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    return status
+
+
+def record_pool_gauges(pools: Dict[str, Optional[Pool]]) -> None:
+    for name, pool in pools.items():
+        if isinstance(pool, QueuePool):
+            DB_POOL_CONNECTIONS.labels(name, "size").set(pool.size())
+            DB_POOL_CONNECTIONS.labels(name, "checked_out").set(pool.checkedout())
+            DB_POOL_CONNECTIONS.labels(name, "checked_in").set(pool.checkedin())
+            DB_POOL_CONNECTIONS.labels(name, "overflow").set(max(pool.overflow(), 0))
+
+
+def pool_status(pools: Dict[str, Optional[Pool]]) -> Dict[str, Any]:
+    engines: List[Dict[str, Any]] = [describe_pool(name, pool) for name, pool in pools.items() if pool is not None]
+    return {
+        "engines": engines,
+        "checkouts": checkout_stats.checkouts,
+        "checkout_timeouts": checkout_stats.timeouts,
+        "checkout_wait_seconds_total": round(checkout_stats.wait_seconds_total, 6),
+        "checkout_wait_seconds_max": round(checkout_stats.wait_seconds_max, 6),
+    }
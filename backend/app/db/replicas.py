@@ -0,0 +1,228 @@
+"""Read replicas for GET routes, and the read-your-writes window that bypasses them.
+
+``DATABASE_REPLICA_URLS`` lists replicas; requests take the healthy ones in turn. A
+background task probes every replica each ``DB_REPLICA_CHECK_SECONDS`` and takes failing
+ones out of rotation until they answer again. When none is healthy, reads go to the primary.
+
+Replicas lag the primary, so a user who just wrote would not see the change on one. Every
+commit made on behalf of a user marks them as a recent writer, and their reads stay on the
+primary for ``DB_READ_YOUR_WRITES_SECONDS``. This process remembers the mark itself, and the
+response to the write carries it to the client as ``X-Read-Primary-Until`` (a Unix time):
+requests that send it back keep their reads on the primary whichever API process or replica
+of the API handles them.
+"""
+import asyncio
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+import structlog
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import Pool
+
+from app.core.metrics import DB_REPLICA_HEALTHY
+
+logger = structlog.get_logger(__name__)
+
+MAX_RECENT_WRITERS = 100_000
+READ_PRIMARY_HEADER = "X-Read-Primary-Until"
+
+
+class Replica:
+    """One replica's engines (created on first use) and its last health check result."""
+
+    def __init__(
+        self,
+        name: str,
+        make_engine: Callable[[], Any],
+        make_async_engine: Callable[[], AsyncEngine],
+    ) -> None:
+        self.name = name
+        self.healthy = False
+        self._make_engine = make_engine
+        self._make_async_engine = make_async_engine
+        self._engine: Any = None
+        self._async_engine: Optional[AsyncEngine] = None
+        self._session_local: Optional[sessionmaker] = None
+        self._async_session_local: Optional[async_sessionmaker] = None
+
+    @property
+    def engine(self) -> Any:
+        if self._engine is None:
+            self._engine = self._make_engine()
+        return self._engine
+
+    @property
+    def async_engine(self) -> AsyncEngine:
+        if self._async_engine is None:
+            self._async_engine = self._make_async_engine()
+        return self._async_engine
+
+    def open(self, use_async: bool) -> Any:
+        """A new session on this replica; it connects on first use."""
+        if use_async:
+            if self._async_session_local is None:
+                self._async_session_local = async_sessionmaker(
+                    bind=self.async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+                )
+            return self._async_session_local()
+        if self._session_local is None:
+            self._session_local = sessionmaker(bind=self.engine, autoflush=False, class_=Session)
+        return self._session_local()
+
+    def pools(self) -> Dict[str, Optional[Pool]]:
+        return {
+            self.name: self._engine.pool if self._engine is not None else None,
+            f"{self.name}-async": self._async_engine.sync_engine.pool if self._async_engine is not None else None,
+        }
+
+    async def dispose(self) -> None:
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+        if self._engine is not None:
+            self._engine.dispose()
+
+    async def probe(self, use_async: bool, timeout: float) -> bool:
+        try:
+            if use_async:
+                await asyncio.wait_for(self._probe_async(), timeout)
+            else:
+                await asyncio.wait_for(run_in_threadpool(self._probe_sync), timeout)
+        except Exception as exc:
+            if self.healthy:
+                logger.warning("db.replica_unhealthy", replica=self.name, error=type(exc).__name__)
+            self._set_health(False)
+            return False
+        if not self.healthy:
+            logger.info("db.replica_healthy", replica=self.name)
+        self._set_health(True)
+        return True
+
+    def _set_health(self, healthy: bool) -> None:
+        self.healthy = healthy
+        DB_REPLICA_HEALTHY.labels(self.name).set(1 if healthy else 0)
+
+    def _probe_sync(self) -> None:
+        with self.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    async def _probe_async(self) -> None:
+        async with self.async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+
+class ReplicaSet:
+    """Round-robin over the healthy replicas, kept current by a health check task."""
+
+    def __init__(self, replicas: List[Replica]) -> None:
+        self.replicas = replicas
+        self._turn = itertools.count()
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    async def check(self, use_async: bool, timeout: float) -> None:
+        await asyncio.gather(*(replica.probe(use_async, timeout) for replica in self.replicas))
+
+    async def start(self, use_async: bool, interval: float) -> None:
+        """Check every replica once, then keep checking every ``interval`` seconds."""
+        if not self.replicas or self._task is not None:
+            return
+        await self.check(use_async, interval)
+        self._task = asyncio.create_task(self._run(use_async, interval), name="db-replica-health")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def dispose(self) -> None:
+        await self.stop()
+        for replica in self.replicas:
+            await replica.dispose()
+
+    async def _run(self, use_async: bool, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.check(use_async, interval)
+
+
+class RecentWriters:
+    """Users who committed a write in the last ``window`` seconds (this process only)."""
+
+    def __init__(
+        self, window: float, max_users: int = MAX_RECENT_WRITERS, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.window = window
+        self.max_users = max_users
+        self._clock = clock
+        self._lock = threading.Lock()
+        # user id -> deadline; the window is fixed, so the order of insertion is deadline order.
+        self._until: "OrderedDict[str, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._until)
+
+    def note(self, user_id: str) -> None:
+        if self.window <= 0:
+            return
+        now = self._clock()
+        with self._lock:
+            self._until.pop(user_id, None)
+            self._until[user_id] = now + self.window
+            while self._until and (len(self._until) > self.max_users or next(iter(self._until.values())) <= now):
+                self._until.popitem(last=False)
+
+    def recent(self, user_id: str) -> bool:
+        until = self._until.get(user_id)
+        return until is not None and until > self._clock()
+
+
+class RequestWrites:
+    """One request's read-your-writes marker: the deadline the client sent and whether it wrote."""
+
+    def __init__(self, until: Optional[float]) -> None:
+        self.until = until
+        self.wrote = False
+
+    def recent(self, window: float, now: float) -> bool:
+        # A deadline further out than a fresh write would set is not one this API issued.
+        return self.until is not None and now < self.until <= now + window
+
+
+_request_writes: ContextVar[Optional[RequestWrites]] = ContextVar("request_writes", default=None)
+
+
+def start_request_writes(header: Optional[str]) -> RequestWrites:
+    """Begin tracking writes for the current request, given its ``X-Read-Primary-Until`` value.
+
+    The object is shared by reference, so commits made from threadpool workers still mark it.
+    """
+    try:
+        until: Optional[float] = float(header) if header else None
+    except ValueError:
+        until = None
+    writes = RequestWrites(until)
+    _request_writes.set(writes)
+    return writes
+
+
+def current_request_writes() -> Optional[RequestWrites]:
+    return _request_writes.get()
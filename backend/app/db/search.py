@@ -0,0 +1,50 @@
+"""Full-text search objects for ``todos``.
+
+PostgreSQL gets a stored generated ``tsvector`` column over the title (weight A) and the
+description (weight B). A GIN index on ``(owner_id, search_vector)`` (via ``btree_gin``) means
+one user's matches come from a single index scan instead of filtering every user's hits.
+SQLite, used in tests and local dev, gets an external-content FTS5 table kept in sync by
+triggers.
+
+Migration ``20261018_0004`` creates these on existing databases. The hooks below cover
+``metadata.create_all``.
+"""
+from sqlalchemy import DDL, Table, event
+
+TS_CONFIG = "english"
+
+POSTGRES_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS btree_gin",
+    f"""ALTER TABLE todos ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{TS_CONFIG}', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('{TS_CONFIG}', coalesce(description, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_todos_owner_id_search_vector ON todos USING gin (owner_id, search_vector)",
+)
+
+SQLITE_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts
+        USING fts5(title, description, content='todos', tokenize='porter unicode61')""",
+    """CREATE TRIGGER IF NOT EXISTS todos_fts_insert AFTER INSERT ON todos BEGIN
+        INSERT INTO todos_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS todos_fts_delete AFTER DELETE ON todos BEGIN
+        INSERT INTO todos_fts (todos_fts, rowid, title, description)
+        VALUES ('delete', old.rowid, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS todos_fts_update AFTER UPDATE OF title, description ON todos BEGIN
+        INSERT INTO todos_fts (todos_fts, rowid, title, description)
+        VALUES ('delete', old.rowid, old.title, old.description);
+        INSERT INTO todos_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description);
+    END""",
+)
+SQLITE_DROP_DDL = ("DROP TABLE IF EXISTS todos_fts",)
+
+
+def attach(table: Table) -> None:
+    for statement in POSTGRES_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in SQLITE_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    for statement in SQLITE_DROP_DDL:
+        event.listen(table, "after_drop", DDL(statement).execute_if(dialect="sqlite"))
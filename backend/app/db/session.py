@@ -1,29 +1,226 @@
-from contextlib import contextmanager
-from typing import Iterator
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, TypeVar, Union
 
-from sqlalchemy import create_engine
+import structlog
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from app.core.config import get_settings
+from app.core.metrics import DB_READ_SESSIONS
+from app.db.instrumentation import instrument_engine
+from app.db.pool import engine_options, pool_status, record_pool_gauges
+from app.db.replicas import RecentWriters, Replica, ReplicaSet, current_request_writes
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+DBSession = Union[Session, AsyncSession]
 
 _engine = None
 _SessionLocal = None
+_async_engine = None
+_AsyncSessionLocal = None
+_replicas: Optional[ReplicaSet] = None
+_recent_writers: Optional[RecentWriters] = None
+
+# ``Session.info`` key naming the user a request's writes are made for.
+PRINCIPAL_KEY = "app.principal"
+
+
+def _database_url(use_async: bool = False, database_url: Optional[str] = None) -> str:
+    database_url = database_url or get_settings().database_url
+    if database_url.startswith("postgresql://"):
+        # psycopg 3 serves both modes; create_async_engine selects its async dialect.
+        database_url = database_url.replace("postgresql://", "postgresql+psycopg://", 1)
+    elif use_async and database_url.startswith("sqlite://"):
+        database_url = database_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return database_url
 
 
 def get_engine():
     global _engine
     if _engine is None:
-        settings = get_settings()
-        connect_args = {}
-        if settings.database_url.startswith("sqlite"):
-            connect_args["check_same_thread"] = False
-        database_url = settings.database_url
-        if database_url.startswith("postgresql://"):
-            database_url = database_url.replace("postgresql://", "postgresql+psycopg://", 1)
-        _engine = create_engine(database_url, connect_args=connect_args, pool_pre_ping=True)
+        _engine = instrument_engine(create_engine(_database_url(), **engine_options(get_settings())))
     return _engine
 
 
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            _database_url(use_async=True), **engine_options(get_settings(), use_async=True)
+        )
+        instrument_engine(_async_engine.sync_engine)
+    return _async_engine
+
+
+async def prewarm(connections: int) -> int:
+    """Open up to ``connections`` pooled connections to the primary before traffic arrives.
+
+    Capped at ``DB_POOL_SIZE``, since overflow connections would be closed again on return.
+    Returns how many were opened; failures are logged and leave the pool to connect lazily.
+    """
+    use_async = get_settings().database_async
+    engine = get_async_engine() if use_async else get_engine()
+    pool = engine.sync_engine.pool if use_async else engine.pool
+    if not isinstance(pool, QueuePool):
+        return 0
+    count = min(connections, pool.size())
+    if count <= 0:
+        return 0
+    try:
+        if use_async:
+            await _prewarm_async(engine, count)
+        else:
+            await run_in_threadpool(_prewarm_sync, engine, count)
+    except Exception as exc:
+        logger.warning("db.prewarm_failed", error=type(exc).__name__)
+        return 0
+    return count
+
+
+async def _prewarm_async(engine: Any, count: int) -> None:
+    # Held open together, so the pool has to create ``count`` distinct connections.
+    connections = [engine.connect() for _ in range(count)]
+    results = await asyncio.gather(*(connection.start() for connection in connections), return_exceptions=True)
+    opened = [connection for connection, result in zip(connections, results) if not isinstance(result, BaseException)]
+    await asyncio.gather(*(connection.close() for connection in opened))
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+def _prewarm_sync(engine: Any, count: int) -> None:
+    opened = []
+    try:
+        for _ in range(count):
+            opened.append(engine.connect())
+    finally:
+        for connection in opened:
+            connection.close()
+
+
+async def dispose_engines() -> None:
+    """Close every pooled connection (primary and replicas); engines are recreated on next use."""
+    global _engine, _SessionLocal, _async_engine, _AsyncSessionLocal, _replicas
+    if _replicas is not None:
+        await _replicas.dispose()
+        _replicas = None
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine, _AsyncSessionLocal = None, None
+    if _engine is not None:
+        _engine.dispose()
+        _engine, _SessionLocal = None, None
+
+
+def _replica(index: int, url: str) -> Replica:
+    def make_engine() -> Any:
+        return instrument_engine(create_engine(_database_url(False, url), **engine_options(get_settings(), url=url)))
+
+    def make_async_engine() -> Any:
+        engine = create_async_engine(
+            _database_url(True, url), **engine_options(get_settings(), use_async=True, url=url)
+        )
+        instrument_engine(engine.sync_engine)
+        return engine
+
+    return Replica(f"replica-{index}", make_engine, make_async_engine)
+
+
+def get_replicas() -> ReplicaSet:
+    """The ``DATABASE_REPLICA_URLS`` replicas; empty when none are configured."""
+    global _replicas
+    if _replicas is None:
+        _replicas = ReplicaSet([_replica(i, url) for i, url in enumerate(get_settings().database_replica_urls)])
+    return _replicas
+
+
+def get_recent_writers() -> RecentWriters:
+    global _recent_writers
+    if _recent_writers is None:
+        _recent_writers = RecentWriters(get_settings().db_read_your_writes_seconds)
+    return _recent_writers
+
+
+def reset_replicas() -> None:
+    global _replicas, _recent_writers
+    _replicas = None
+    _recent_writers = None
+
+
+def bind_principal(session: DBSession, user_id: str) -> None:
+    """Attribute the session's commits to ``user_id`` for read-your-writes routing."""
+    session.info[PRINCIPAL_KEY] = user_id
+
+
+@event.listens_for(Session, "after_commit")
+def _note_writer(session: Session) -> None:
+    user_id = session.info.get(PRINCIPAL_KEY)
+    if user_id is not None:
+        get_recent_writers().note(user_id)
+        writes = current_request_writes()
+        if writes is not None:
+            writes.wrote = True
+
+
+def open_read_session(user_id: str) -> Optional[DBSession]:
+    """A new session on a healthy replica for ``user_id``'s reads, or None to read from the primary.
+
+    Users who wrote within ``DB_READ_YOUR_WRITES_SECONDS``, as remembered by this process or
+    by the client's ``X-Read-Primary-Until`` header, stay on the primary. The caller closes
+    the session with ``release``.
+    """
+    replicas = get_replicas()
+    if not replicas:
+        return None
+    writes = current_request_writes()
+    client_wrote = writes is not None and writes.recent(get_settings().db_read_your_writes_seconds, time.time())
+    if client_wrote or get_recent_writers().recent(user_id):
+        DB_READ_SESSIONS.labels("primary_recent_write").inc()
+        return None
+    replica = replicas.choose()
+    if replica is None:
+        DB_READ_SESSIONS.labels("primary_fallback").inc()
+        return None
+    DB_READ_SESSIONS.labels("replica").inc()
+    return replica.open(get_settings().database_async)
+
+
+def _pools() -> Dict[str, Any]:
+    pools = {
+        "sync": _engine.pool if _engine is not None else None,
+        "async": _async_engine.sync_engine.pool if _async_engine is not None else None,
+    }
+    if _replicas is not None:
+        for replica in _replicas.replicas:
+            pools.update(replica.pools())
+    return pools
+
+
+def get_pool_status() -> Dict[str, Any]:
+    """Pool occupancy and checkout wait statistics for the engines created so far."""
+    return pool_status(_pools())
+
+
+def pool_utilization() -> float:
+    """Largest share of a primary pool's connections (size plus overflow) checked out."""
+    settings = get_settings()
+    capacity = settings.db_pool_size + settings.db_max_overflow
+    pools = _pools()
+    primary = (pools["sync"], pools["async"])
+    return max((pool.checkedout() / capacity for pool in primary if isinstance(pool, QueuePool)), default=0.0)
+
+
+def update_pool_metrics() -> None:
+    record_pool_gauges(_pools())
+
+
 def get_session_local():
     global _SessionLocal
     if _SessionLocal is None:
@@ -31,6 +228,17 @@ def get_session_local():
     return _SessionLocal
 
 
+def get_async_session_local():
+    global _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        # expire_on_commit=False: attributes must stay loaded once we are back outside the
+        # greenlet, otherwise response serialization would trigger an implicit (sync) refresh.
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=get_async_engine(), autoflush=False, expire_on_commit=False, class_=AsyncSession
+        )
+    return _AsyncSessionLocal
+
+
 def get_db() -> Iterator[Session]:
     session = get_session_local()()
     try:
@@ -39,6 +247,11 @@ def get_db() -> Iterator[Session]:
         session.close()
 
 
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with get_async_session_local()() as session:
+        yield session
+
+
 @contextmanager
 def session_scope() -> Iterator[Session]:
     session = get_session_local()()
@@ -50,3 +263,38 @@ def session_scope() -> Iterator[Session]:
         raise
     finally:
         session.close()
+
+
+@asynccontextmanager
+async def async_session_scope() -> AsyncIterator[AsyncSession]:
+    async with get_async_session_local()() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+async def run_sync(session: DBSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run ``fn(sync_session, *args, **kwargs)`` without blocking the event loop.
+
+    Data access is written once against the sync ``Session`` API. With an ``AsyncSession``
+    the function runs through ``AsyncSession.run_sync`` (async driver, no thread); with a
+    plain ``Session`` it is dispatched to the threadpool as FastAPI does for sync routes.
+    """
+    if isinstance(session, AsyncSession):
+        return await session.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, session, *args, **kwargs)
+
+
+async def release(session: DBSession) -> None:
+    """End the session's transaction and return its connection to the pool.
+
+    The session stays usable. Long-lived responses such as event streams call this so they do
+    not pin a pooled connection until the client disconnects.
+    """
+    if isinstance(session, AsyncSession):
+        await session.close()
+    else:
+        await run_in_threadpool(session.close)
@@ -1,16 +1,76 @@
-from fastapi import FastAPI
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.api import api_router
+from app.api.routes import metrics as metrics_routes
+from app.core import metrics
 from app.core.config import get_settings
-from app.core.logging import configure_logging
-from app.core.middleware import RequestIDMiddleware, log_requests
+from app.core.logging import configure_logging, flush_logging
+from app.core.middleware import (
+    CompressionMiddleware,
+    MetricsMiddleware,
+    ProfilingMiddleware,
+    RateLimitMiddleware,
+    ReadYourWritesMiddleware,
+    RequestLoggingMiddleware,
+)
+from app.core.serialization import DefaultResponse
+from app.db.replicas import READ_PRIMARY_HEADER
+from app.db.session import dispose_engines, get_replicas, prewarm
+from app.services import events, hashing, ratelimit, readiness, security
+from app.services.hashing import HashingOverloaded
 
 settings = get_settings()
-configure_logging(settings.log_level)
+configure_logging(
+    settings.log_level,
+    async_writer=settings.log_async,
+    queue_size=settings.log_queue_size,
+    access_sample_rate=settings.log_access_sample_rate,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    if settings.rate_limit_enabled:
+        ratelimit.get_limiter()  # fail fast on malformed RATE_LIMIT_* values
+    # Loaded in the background: token routes need it, health probes do not.
+    asyncio.get_running_loop().run_in_executor(None, security.load_jwt)
+    await events.get_broker().start()
+    await get_replicas().start(settings.database_async, settings.db_replica_check_seconds)
+    if settings.db_pool_prewarm:
+        await prewarm(settings.db_pool_prewarm)
+    await readiness.get_monitor().start()
+    yield
+    await readiness.get_monitor().stop()
+    await get_replicas().stop()
+    await events.get_broker().stop()
+    await dispose_engines()
+    hashing.shutdown()
+    metrics.mark_process_dead()
+    flush_logging()
+
 
-app = FastAPI(title=settings.app_name)
-app.add_middleware(RequestIDMiddleware)
+app = FastAPI(title=settings.app_name, lifespan=lifespan, default_response_class=DefaultResponse)
+
+
+def _precomputed_openapi() -> Dict[str, Any]:
+    if app.openapi_schema is None:
+        app.openapi_schema = json.loads(Path(settings.openapi_schema_path).read_bytes())
+    return app.openapi_schema
+
+
+if settings.openapi_schema_path:
+    app.openapi = _precomputed_openapi  # type: ignore[method-assign]
+if settings.rate_limit_enabled:
+    # Added first so it runs inside CORS and browsers can read the 429.
+    app.add_middleware(RateLimitMiddleware, get_limiter=ratelimit.get_limiter)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -18,10 +78,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Retry-After", READ_PRIMARY_HEADER],
 )
 
 app.include_router(api_router)
-app.middleware("http")(log_requests)
+app.add_middleware(ReadYourWritesMiddleware)
+if settings.compression_enabled:
+    # Outside CORS so its headers are kept; inside profiling so profiles include compression.
+    app.add_middleware(CompressionMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(RequestLoggingMiddleware)
+if settings.metrics_enabled:
+    app.include_router(metrics_routes.router)
+    app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(HashingOverloaded)
+async def hashing_overloaded_handler(request: Request, exc: HashingOverloaded) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Authentication is temporarily overloaded, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
 
 
 @app.get("/", tags=["root"])
@@ -1,4 +1,5 @@
-from .todo import Todo
+from .rate_limit import RateLimitBucket
+from .todo import Todo, TodoTombstone
 from .user import User
 
-__all__ = ["User", "Todo"]
+__all__ = ["User", "Todo", "TodoTombstone", "RateLimitBucket"]
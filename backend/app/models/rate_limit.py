@@ -0,0 +1,12 @@
+from sqlmodel import Field, SQLModel
+
+
+class RateLimitBucket(SQLModel, table=True):
+    """Shared token bucket state for ``RATE_LIMIT_BACKEND=database``."""
+
+    __tablename__ = "rate_limit_buckets"
+
+    key: str = Field(primary_key=True, max_length=255)
+    tokens: float
+    # Epoch seconds of the last refill; rows idle for a full refill period are swept.
+    refilled_at: float = Field(index=True)
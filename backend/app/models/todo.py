@@ -2,21 +2,52 @@ from datetime import datetime
 from typing import Optional
 from uuid import uuid4
 
+from sqlalchemy import Index, desc
 from sqlmodel import Field, Relationship, SQLModel
 
+from app.db import search
+
 
 class Todo(SQLModel, table=True):
     __tablename__ = "todos"
+    __table_args__ = (
+        # Serves the keyset-paginated list query: owner filter + (created_at DESC, id) ordering.
+        Index("ix_todos_owner_id_created_at_id", "owner_id", desc("created_at"), "id"),
+        # Serves ``GET /todos/changes``: owner filter + (version, id) ordering.
+        Index("ix_todos_owner_id_version", "owner_id", "version", "id"),
+    )
 
     id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, index=True)
-    owner_id: str = Field(foreign_key="users.id", index=True)
+    owner_id: str = Field(foreign_key="users.id")
     title: str
     description: Optional[str] = None
     is_completed: bool = Field(default=False)
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
-    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    # ``onupdate`` also applies to Core ``update()`` statements that do not set it themselves.
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow, nullable=False, sa_column_kwargs={"onupdate": datetime.utcnow}
+    )
+    # The owner's ``todos_version`` claimed by the transaction that last wrote this row.
+    version: int = Field(default=0, nullable=False, sa_column_kwargs={"server_default": "0"})
 
     owner: "User" = Relationship(back_populates="todos")
 
 
+# Full-text search column/index (PostgreSQL) or FTS5 table (SQLite), outside the ORM mapping.
+search.attach(Todo.__table__)
+
+
+class TodoTombstone(SQLModel, table=True):
+    """A deleted todo, kept so ``GET /todos/changes`` can tell clients to drop it."""
+
+    __tablename__ = "todo_tombstones"
+    __table_args__ = (Index("ix_todo_tombstones_owner_id_version", "owner_id", "version"),)
+
+    todo_id: str = Field(primary_key=True)
+    owner_id: str = Field(foreign_key="users.id")
+    version: int
+    # Tombstones older than ``SYNC_TOMBSTONE_RETENTION_DAYS`` are pruned.
+    deleted_at: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
+
+
 from .user import User  # noqa: E402
@@ -13,6 +13,8 @@ class User(SQLModel, table=True):
     full_name: str
     password_hash: str
     is_active: bool = Field(default=True)
+    # Bumped by every todo write; lets conditional GETs be answered without reading todos.
+    todos_version: int = Field(default=0, nullable=False, sa_column_kwargs={"server_default": "0"})
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
 
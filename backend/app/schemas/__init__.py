@@ -1,13 +1,42 @@
 from .auth import Token, TokenPayload
-from .todo import TodoBase, TodoCreate, TodoRead, TodoUpdate
+from .todo import (
+    TodoBase,
+    TodoBatchCreate,
+    TodoBatchDelete,
+    TodoBatchItemResult,
+    TodoBatchRequest,
+    TodoBatchResult,
+    TodoBatchUpdate,
+    TodoChanges,
+    TodoCreate,
+    TodoFilters,
+    TodoImport,
+    TodoImportError,
+    TodoImportResult,
+    TodoRead,
+    TodoSearchHit,
+    TodoUpdate,
+)
 from .user import UserBase, UserCreate, UserRead
 
 __all__ = [
     "Token",
     "TokenPayload",
     "TodoBase",
+    "TodoBatchCreate",
+    "TodoBatchDelete",
+    "TodoBatchItemResult",
+    "TodoBatchRequest",
+    "TodoBatchResult",
+    "TodoBatchUpdate",
+    "TodoChanges",
     "TodoCreate",
+    "TodoFilters",
+    "TodoImport",
+    "TodoImportError",
+    "TodoImportResult",
     "TodoRead",
+    "TodoSearchHit",
     "TodoUpdate",
     "UserBase",
     "UserCreate",
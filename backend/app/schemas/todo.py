@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, List, Literal, Optional, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
 
 class TodoBase(BaseModel):
@@ -20,6 +20,15 @@ class TodoUpdate(BaseModel):
     is_completed: Optional[bool] = None
 
 
+class TodoFilters(BaseModel):
+    is_completed: Optional[bool] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    updated_after: Optional[datetime] = None
+    updated_before: Optional[datetime] = None
+    title_prefix: Optional[str] = None
+
+
 class TodoRead(TodoBase):
     id: str
     created_at: datetime
@@ -27,3 +36,88 @@ class TodoRead(TodoBase):
 
     class Config:
         from_attributes = True
+
+
+class TodoChanges(BaseModel):
+    todos: List[TodoRead]
+    deleted: List[str]
+    next_token: str
+    has_more: bool
+
+
+class TodoSearchHit(TodoRead):
+    rank: float
+    # Matching fragment as HTML: the text is escaped and matches are wrapped in <mark>...</mark>.
+    snippet: Optional[str] = None
+
+
+class TodoBatchCreate(BaseModel):
+    op: Literal["create"]
+    data: TodoCreate
+
+
+class TodoBatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: str
+    data: TodoUpdate
+
+
+class TodoBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: str
+
+
+TodoBatchOperation = Annotated[Union[TodoBatchCreate, TodoBatchUpdate, TodoBatchDelete], Field(discriminator="op")]
+
+
+class TodoBatchRequest(BaseModel):
+    """Operations are applied set-wise (creates, then updates, then deletes), then ``action``.
+
+    That order is only unobservable when no two operations name the same todo, so such
+    batches are rejected rather than applied in an order the client did not ask for.
+    """
+
+    operations: List[TodoBatchOperation] = Field(default_factory=list, max_length=1000)
+    action: Optional[Literal["complete_all", "delete_completed"]] = None
+
+    @model_validator(mode="after")
+    def _one_operation_per_todo(self) -> "TodoBatchRequest":
+        seen = set()
+        for op in self.operations:
+            todo_id = getattr(op, "id", None)
+            if todo_id is None:
+                continue
+            if todo_id in seen:
+                raise ValueError(f"todo {todo_id} appears in more than one operation")
+            seen.add(todo_id)
+        return self
+
+
+class TodoBatchItemResult(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[str] = None
+    status: Literal["ok", "not_found"]
+    todo: Optional[TodoRead] = None
+
+
+class TodoBatchResult(BaseModel):
+    results: List[TodoBatchItemResult]
+    action_ids: List[str] = Field(default_factory=list)
+
+
+class TodoImport(TodoBase):
+    """One imported row; timestamps from the source system are kept when present."""
+
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class TodoImportError(BaseModel):
+    line: int
+    detail: str
+
+
+class TodoImportResult(BaseModel):
+    imported: int
+    skipped: int
+    errors: List[TodoImportError] = Field(default_factory=list)
@@ -1,3 +1,29 @@
-from . import security
+from . import (
+    events,
+    exports,
+    hashing,
+    imports,
+    pagination,
+    principals,
+    ratelimit,
+    readiness,
+    search,
+    security,
+    todos,
+    users,
+)
 
-__all__ = ["security"]
+__all__ = [
+    "events",
+    "exports",
+    "hashing",
+    "imports",
+    "pagination",
+    "principals",
+    "ratelimit",
+    "readiness",
+    "search",
+    "security",
+    "todos",
+    "users",
+]
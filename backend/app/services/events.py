@@ -0,0 +1,338 @@
+"""Per-user change feed behind ``GET /todos/stream``.
+
+Todo writes stage ``TodoEvent``s on the SQLAlchemy session and a broker publishes them once
+the transaction commits:
+
+* ``MemoryBroker`` (single replica) hands them to this process's ``EventHub`` from an
+  ``after_commit`` hook.
+* ``PostgresBroker`` (several replicas) sends them with ``pg_notify`` inside the writing
+  transaction, so they are delivered only on commit; every replica LISTENs and feeds its hub.
+
+Event ids are the user's ``todos_version`` after the change, so they are ordered per user and
+mean the same on every replica; a reconnect carrying ``Last-Event-ID`` is replayed from the
+hub's buffer of recent events, or told to ``resync`` when the buffer no longer reaches back.
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, List, NamedTuple, Optional, Set
+
+import structlog
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.metrics import TODO_EVENT_STREAMS
+
+logger = structlog.get_logger(__name__)
+
+CHANNEL = "todo_events"
+# NOTIFY payloads are capped at 8000 bytes; stay clear of it and leave room for framing.
+MAX_NOTIFY_PAYLOAD = 7500
+# Users whose recent events are kept for replay; least recently written are evicted first.
+MAX_REPLAY_USERS = 10_000
+_PENDING_KEY = "pending_todo_events"
+# How long EventSource clients wait before reconnecting.
+RETRY_MILLISECONDS = 3000
+
+
+class TodoEvent(NamedTuple):
+    id: int
+    owner_id: str
+    type: str  # "created" | "updated" | "deleted"
+    todo_id: str
+    todo: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+
+RESYNC = object()
+
+
+class Subscription:
+    """One stream's queue; filled on its event loop and drained by the SSE response."""
+
+    def __init__(self, owner_id: str, max_queue: int) -> None:
+        self.owner_id = owner_id
+        self.queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=max_queue)
+        self._loop = asyncio.get_running_loop()
+
+    def deliver(self, item: Any) -> None:
+        """Thread-safe: may be called from threadpool workers or the LISTEN task."""
+        try:
+            self._loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:  # loop already closed; the stream is gone
+            pass
+
+    def _put(self, item: Any) -> None:
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # The client is not keeping up: drop what is queued and have it reload instead.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class EventHub:
+    """Fans committed events out to this process's subscribers and keeps recent ones for replay."""
+
+    def __init__(self, replay_size: int, replay_ttl: float, queue_size: int = 256) -> None:
+        self._replay_size = replay_size
+        self._queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._recent: TTLCache[str, Deque[TodoEvent]] = TTLCache(MAX_REPLAY_USERS, replay_ttl)
+
+    def subscribe(self, owner_id: str) -> Subscription:
+        subscription = Subscription(owner_id, self._queue_size)
+        with self._lock:
+            self._subscribers.setdefault(owner_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.owner_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.owner_id]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def dispatch(self, events: Iterable[TodoEvent]) -> None:
+        deliveries = []
+        with self._lock:
+            for todo_event in events:
+                buffer = self._recent.get(todo_event.owner_id)
+                if buffer is None:
+                    buffer = deque(maxlen=self._replay_size)
+                    self._recent.set(todo_event.owner_id, buffer)
+                buffer.append(todo_event)
+                if len(buffer) > 1 and buffer[-2].id > todo_event.id:
+                    # Concurrent commits can finish their hooks out of order.
+                    ordered = sorted(buffer, key=lambda item: item.id)
+                    buffer.clear()
+                    buffer.extend(ordered)
+                for subscription in self._subscribers.get(todo_event.owner_id, ()):
+                    deliveries.append((subscription, todo_event))
+        for subscription, todo_event in deliveries:
+            subscription.deliver(todo_event)
+
+    def replay(self, owner_id: str, after: int) -> Optional[List[TodoEvent]]:
+        """Buffered events newer than ``after``, or ``None`` if some may have been evicted."""
+        with self._lock:
+            buffer = self._recent.get(owner_id)
+            if buffer is None:
+                return None
+            if buffer[0].id > after + 1:
+                return None
+            return [todo_event for todo_event in buffer if todo_event.id > after]
+
+    def resync_all(self) -> None:
+        """Forget buffered events and tell every subscriber to reload (events may have been lost)."""
+        with self._lock:
+            self._recent.clear()
+            subscriptions = [sub for subscribers in self._subscribers.values() for sub in subscribers]
+        for subscription in subscriptions:
+            subscription.deliver(RESYNC)
+
+
+class MemoryBroker:
+    """Publishes to the local hub after commit; only correct with a single replica."""
+
+    def __init__(self, hub: EventHub) -> None:
+        self.hub = hub
+
+    def stage(self, session: Session, events: List[TodoEvent]) -> None:
+        session.info.setdefault(_PENDING_KEY, []).extend(events)
+
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        return None
+
+
+class PostgresBroker(MemoryBroker):
+    """Publishes with transactional NOTIFY; a LISTEN task on each replica feeds its hub."""
+
+    def __init__(self, hub: EventHub, conninfo: str) -> None:
+        super().__init__(hub)
+        self._conninfo = conninfo
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def stage(self, session: Session, events: List[TodoEvent]) -> None:
+        for payload in _notify_payloads(events):
+            session.execute(select(func.pg_notify(CHANNEL, payload)))
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen(), name="todo-events-listener")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen(self) -> None:
+        import psycopg
+
+        delay = 1.0
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self._conninfo, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    # Anything published while we were not listening is gone.
+                    self.hub.resync_all()
+                    delay = 1.0
+                    async for notify in conn.notifies():
+                        self.hub.dispatch(TodoEvent(**item) for item in json.loads(notify.payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("events.listener_error", retry_in=delay, exc_info=True)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+
+def _frame(kind: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines.append(f"event: {kind}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":"), default=str))
+    return "\n".join(lines) + "\n\n"
+
+
+def _event_frame(todo_event: TodoEvent) -> str:
+    # Events whose body did not fit in a NOTIFY carry only the id; clients fetch the todo.
+    return _frame(todo_event.type, todo_event.todo or {"id": todo_event.todo_id}, todo_event.id)
+
+
+async def stream(
+    hub: EventHub,
+    owner_id: str,
+    version: int,
+    last_event_id: Optional[int],
+    keepalive: float,
+) -> AsyncIterator[str]:
+    """Server-sent event frames for ``owner_id``'s changes after ``version``.
+
+    ``version`` is the collection version read before subscribing. A fresh stream starts with
+    a ``ready`` event carrying it as the id; a reconnect first replays what it missed since
+    ``last_event_id``, or gets a ``resync`` event if the buffer cannot cover the gap.
+    """
+    subscription = hub.subscribe(owner_id)
+    TODO_EVENT_STREAMS.inc()
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        if last_event_id is None:
+            yield _frame("ready", {"version": version}, version)
+            baseline = version
+        elif last_event_id <= version:
+            baseline = last_event_id
+        else:
+            baseline = -1  # ahead of this database: the client's state is unrelated
+        # Also picks up events committed between reading ``version`` and subscribing, which
+        # only reached the buffer.
+        missed = hub.replay(owner_id, baseline)
+        if missed is None and baseline < version:
+            yield _frame("resync", {"version": version}, version)
+            baseline = version
+            missed = hub.replay(owner_id, version)
+        missed = missed or []
+        for todo_event in missed:
+            yield _event_frame(todo_event)
+        sent = {todo_event.id for todo_event in missed}
+
+        while True:
+            try:
+                item = await asyncio.wait_for(subscription.queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if item is RESYNC:
+                yield _frame("resync", {})
+            elif item.id > baseline and item.id not in sent:
+                yield _event_frame(item)
+    finally:
+        TODO_EVENT_STREAMS.dec()
+        hub.unsubscribe(subscription)
+
+
+def _notify_payloads(events: List[TodoEvent]) -> Iterable[str]:
+    """JSON arrays of events, each under the NOTIFY size limit.
+
+    An event too large on its own is sent without its ``todo`` body; clients fetch it by id.
+    """
+    chunk: List[str] = []
+    size = 2
+    for todo_event in events:
+        encoded = json.dumps(todo_event.to_dict(), separators=(",", ":"), default=str)
+        if len(encoded.encode()) > MAX_NOTIFY_PAYLOAD - 2:
+            encoded = json.dumps(todo_event._replace(todo=None).to_dict(), separators=(",", ":"))
+        if chunk and size + len(encoded.encode()) + 1 > MAX_NOTIFY_PAYLOAD:
+            yield "[" + ",".join(chunk) + "]"
+            chunk, size = [], 2
+        chunk.append(encoded)
+        size += len(encoded.encode()) + 1
+    if chunk:
+        yield "[" + ",".join(chunk) + "]"
+
+
+_hub: Optional[EventHub] = None
+_broker: Optional[MemoryBroker] = None
+
+
+def get_hub() -> EventHub:
+    global _hub
+    if _hub is None:
+        settings = get_settings()
+        _hub = EventHub(settings.events_replay_size, settings.events_replay_ttl_seconds)
+    return _hub
+
+
+def get_broker() -> MemoryBroker:
+    global _broker
+    if _broker is None:
+        settings = get_settings()
+        if settings.events_backend == "postgres":
+            conninfo = settings.database_url.replace("postgresql+psycopg://", "postgresql://", 1)
+            _broker = PostgresBroker(get_hub(), conninfo)
+        else:
+            _broker = MemoryBroker(get_hub())
+    return _broker
+
+
+def stage(session: Session, events: List[TodoEvent]) -> None:
+    """Queue ``events`` for publication when ``session`` commits."""
+    if events:
+        get_broker().stage(session, events)
+
+
+def reset() -> None:
+    global _hub, _broker
+    _hub = None
+    _broker = None
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session) -> None:
+    events = session.info.pop(_PENDING_KEY, None)
+    if events:
+        get_hub().dispatch(events)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session: Session, transaction) -> None:
+    # Runs after ``after_commit``; anything left belongs to a rolled back or abandoned transaction.
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
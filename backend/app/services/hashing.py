@@ -0,0 +1,61 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app.core.config import get_settings
+
+T = TypeVar("T")
+
+_executor: Optional[Executor] = None
+_pending = 0
+_lock = threading.Lock()
+
+
+class HashingOverloaded(Exception):
+    """Raised when the password hashing queue is full and new work must be shed."""
+
+
+def _default_workers() -> int:
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def get_executor() -> Executor:
+    """Process pool dedicated to bcrypt so hashing scales across cores and never holds
+    request threads. Workers are spawned (not forked) because the parent runs threads."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            workers = get_settings().password_hash_workers or _default_workers()
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def pending() -> int:
+    """Hashing jobs currently queued or running."""
+    return _pending
+
+
+async def run(fn: Callable[..., T], *args: Any) -> T:
+    """Run ``fn(*args)`` in the hashing pool, rejecting immediately when it is saturated."""
+    global _pending
+    executor = get_executor()
+    with _lock:
+        if _pending >= get_settings().password_hash_max_pending:
+            raise HashingOverloaded("Password hashing queue is full")
+        _pending += 1
+    try:
+        return await asyncio.wrap_future(executor.submit(fn, *args))
+    finally:
+        with _lock:
+            _pending -= 1
+
+
+def shutdown() -> None:
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,290 @@
+"""Bulk loading of todos for ``POST /todos/import``, ``scripts.import_todos`` and ``scripts.seed``.
+
+Input arrives in arbitrary byte chunks. ``TodoImportParser`` cuts the chunks into records,
+validates each record and turns it into a row tuple. Rows are written ``batch_size`` at a
+time, so memory stays bounded however large the input is. On PostgreSQL the batches go
+through ``COPY ... FROM STDIN``; other databases (SQLite in development and tests) fall back
+to ``executemany`` INSERTs. The whole import is one transaction.
+"""
+import csv
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+from sqlmodel import SQLModel
+
+from app.db.session import DBSession, release, run_sync
+from app.schemas import TodoImport, TodoImportError, TodoImportResult
+from app.services import todos
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ships with the ``speedups`` extra
+    orjson = None
+
+FORMATS = ("ndjson", "csv")
+TODO_COLUMNS = ("id", "owner_id", "title", "description", "is_completed", "created_at", "updated_at", "version")
+MAX_RECORD_BYTES = 1024 * 1024
+MAX_REPORTED_ERRORS = 20
+
+Row = Tuple[Any, ...]
+Progress = Callable[[int, float], None]
+
+
+class ImportFormatError(ValueError):
+    """The input cannot be parsed at all (as opposed to individual invalid rows)."""
+
+
+class ImportTooLarge(ValueError):
+    pass
+
+
+def copy_rows(session: Session, table_name: str, columns: Sequence[str], rows: Sequence[Row]) -> None:
+    """Append ``rows`` to ``table_name`` within the session's transaction."""
+    if not rows:
+        return
+    connection = session.connection()
+    if connection.dialect.name != "postgresql":
+        table = SQLModel.metadata.tables[table_name]
+        session.execute(insert(table), [dict(zip(columns, row)) for row in rows])
+        return
+
+    import psycopg
+
+    statement = f"COPY {table_name} ({', '.join(columns)}) FROM STDIN"
+    driver_connection = connection.connection.driver_connection
+    if isinstance(driver_connection, psycopg.AsyncConnection):
+        # Inside ``AsyncSession.run_sync``: drive the async COPY from this greenlet.
+        await_only(_copy_async(driver_connection, statement, rows))
+        return
+    with driver_connection.cursor() as cursor, cursor.copy(statement) as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+async def _copy_async(connection: Any, statement: str, rows: Sequence[Row]) -> None:
+    async with connection.cursor() as cursor:
+        async with cursor.copy(statement) as copy:
+            for row in rows:
+                await copy.write_row(row)
+
+
+def write_todos(session: Session, rows: Sequence[Row]) -> None:
+    copy_rows(session, "todos", TODO_COLUMNS, rows)
+
+
+def _utc_naive(value: Optional[datetime], default: datetime) -> datetime:
+    if value is None:
+        return default
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class TodoImportParser:
+    """Incrementally parses NDJSON or CSV (with a header row) into ``todos`` row tuples.
+
+    Invalid records are skipped and counted; the first ``MAX_REPORTED_ERRORS`` are kept with
+    their line numbers. Rows carry ``version``, the collection version claimed for the import.
+    """
+
+    def __init__(self, fmt: str, owner_id: str, version: int = 0) -> None:
+        if fmt not in FORMATS:
+            raise ImportFormatError(f"Unsupported import format {fmt!r}")
+        self.fmt = fmt
+        self.owner_id = owner_id
+        self.version = version
+        self.rows = 0
+        self.skipped = 0
+        self.errors: List[TodoImportError] = []
+        self._buffer = b""
+        self._record: List[bytes] = []
+        self._quotes = 0
+        self._line = 0
+        self._record_line = 1
+        self._header: Optional[List[str]] = None
+        self._now = datetime.utcnow()
+
+    def feed(self, chunk: bytes) -> List[Row]:
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split(b"\n")
+        if len(self._buffer) > MAX_RECORD_BYTES:
+            raise ImportFormatError(f"Line {self._line + 1} exceeds {MAX_RECORD_BYTES} bytes")
+        rows = []
+        for line in lines:
+            row = self._line_complete(line + b"\n")
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    def close(self) -> List[Row]:
+        rows = []
+        if self._buffer:
+            row = self._line_complete(self._buffer)
+            self._buffer = b""
+            if row is not None:
+                rows.append(row)
+        if self._record:
+            raise ImportFormatError(f"Unterminated quoted field starting on line {self._record_line}")
+        return rows
+
+    def _line_complete(self, line: bytes) -> Optional[Row]:
+        self._line += 1
+        if self.fmt == "csv":
+            # A CSV record ends at a newline outside quotes: quotes so far must pair up.
+            if not self._record:
+                self._record_line = self._line
+            self._record.append(line)
+            self._quotes += line.count(b'"')
+            if self._quotes % 2:
+                if sum(map(len, self._record)) > MAX_RECORD_BYTES:
+                    raise ImportFormatError(f"Record on line {self._record_line} exceeds {MAX_RECORD_BYTES} bytes")
+                return None
+            record, self._record, self._quotes = b"".join(self._record), [], 0
+            return self._parse(record, self._record_line)
+        return self._parse(line, self._line)
+
+    def _parse(self, record: bytes, line: int) -> Optional[Row]:
+        if not record.strip():
+            return None
+        try:
+            data = self._decode(record)
+        except ImportFormatError:
+            raise
+        except ValueError as exc:
+            self._reject(line, f"Malformed {self.fmt} record: {exc}")
+            return None
+        if data is None:  # the CSV header
+            return None
+        try:
+            todo = TodoImport.model_validate(data)
+        except ValidationError as exc:
+            self._reject(line, "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()))
+            return None
+        created_at = _utc_naive(todo.created_at, self._now)
+        self.rows += 1
+        return (
+            str(uuid4()),
+            self.owner_id,
+            todo.title,
+            todo.description,
+            todo.is_completed,
+            created_at,
+            _utc_naive(todo.updated_at, created_at),
+            self.version,
+        )
+
+    def _decode(self, record: bytes) -> Optional[Dict[str, Any]]:
+        if self.fmt == "ndjson":
+            data = orjson.loads(record) if orjson is not None else json.loads(record)
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
+            return data
+        values = next(csv.reader([record.decode("utf-8-sig" if self._header is None else "utf-8")]))
+        if self._header is None:
+            self._header = [name.strip() for name in values]
+            if "title" not in self._header:
+                raise ImportFormatError("CSV header must include a 'title' column")
+            return None
+        if len(values) != len(self._header):
+            raise ValueError(f"expected {len(self._header)} fields, got {len(values)}")
+        # Empty cells mean "not given" so optional columns fall back to their defaults.
+        return {name: value for name, value in zip(self._header, values) if value != ""}
+
+    def _reject(self, line: int, detail: str) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(TodoImportError(line=line, detail=detail))
+
+    def result(self) -> TodoImportResult:
+        return TodoImportResult(imported=self.rows, skipped=self.skipped, errors=self.errors)
+
+
+def _check_size(parser: TodoImportParser, max_rows: Optional[int]) -> None:
+    if max_rows is not None and parser.rows > max_rows:
+        raise ImportTooLarge(f"Imports are limited to {max_rows} rows")
+
+
+def start_import(session: Session, owner_id: str, fmt: str) -> TodoImportParser:
+    """Claim a collection version for the import; the owner's other writes wait until it ends."""
+    return TodoImportParser(fmt, owner_id, todos.claim_version(session, owner_id))
+
+
+def finish_import(session: Session, owner_id: str, parser: TodoImportParser) -> TodoImportResult:
+    if parser.rows:
+        todos.record_bulk_load(session, owner_id, parser.version, parser.rows)
+        session.commit()
+    else:
+        session.rollback()  # nothing imported: give the claimed version back
+    return parser.result()
+
+
+def import_todos(
+    session: Session,
+    owner_id: str,
+    chunks: Iterable[bytes],
+    fmt: str,
+    *,
+    batch_size: int,
+    max_rows: Optional[int] = None,
+    progress: Optional[Progress] = None,
+) -> TodoImportResult:
+    """Import from a synchronous byte source (the CLI)."""
+    start = time.perf_counter()
+    batch: List[Row] = []
+    try:
+        parser = start_import(session, owner_id, fmt)
+        for chunk in chunks:
+            batch.extend(parser.feed(chunk))
+            _check_size(parser, max_rows)
+            if len(batch) >= batch_size:
+                write_todos(session, batch)
+                batch = []
+                if progress is not None:
+                    progress(parser.rows, time.perf_counter() - start)
+        batch.extend(parser.close())
+        _check_size(parser, max_rows)
+        write_todos(session, batch)
+        return finish_import(session, owner_id, parser)
+    except BaseException:
+        session.rollback()
+        raise
+
+
+async def import_todos_stream(
+    session: DBSession,
+    owner_id: str,
+    chunks: AsyncIterable[bytes],
+    fmt: str,
+    *,
+    batch_size: int,
+    max_rows: Optional[int] = None,
+    progress: Optional[Progress] = None,
+) -> TodoImportResult:
+    """Import from a request body; parsing stays on the event loop, each batch goes to the database."""
+    start = time.perf_counter()
+    batch: List[Row] = []
+    try:
+        parser = await run_sync(session, start_import, owner_id, fmt)
+        async for chunk in chunks:
+            batch.extend(parser.feed(chunk))
+            _check_size(parser, max_rows)
+            if len(batch) >= batch_size:
+                await run_sync(session, write_todos, batch)
+                batch = []
+                if progress is not None:
+                    progress(parser.rows, time.perf_counter() - start)
+        batch.extend(parser.close())
+        _check_size(parser, max_rows)
+        await run_sync(session, write_todos, batch)
+        return await run_sync(session, finish_import, owner_id, parser)
+    except BaseException:
+        # Roll back the rows already written rather than leave them for a later commit.
+        await release(session)
+        raise
@@ -0,0 +1,85 @@
+import base64
+import json
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client supplies a cursor we did not issue."""
+
+
+def encode_cursor(created_at: datetime, todo_id: str) -> str:
+    """Encode a ``(created_at, id)`` keyset position as an opaque, URL-safe token."""
+    raw = json.dumps([created_at.isoformat(), todo_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        created_at, todo_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), str(todo_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Opaque token for offset-paged results (search, where rows are ordered by rank)."""
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode()).rstrip(b"=").decode()
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(padded.encode()))["o"]
+    except (ValueError, TypeError, KeyError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if not isinstance(offset, int) or offset < 0:
+        raise InvalidCursor("Malformed cursor")
+    return offset
+
+
+class SyncToken(NamedTuple):
+    """A client's position in its todo history, for ``GET /todos/changes``.
+
+    ``version`` is the collection version the client has caught up to. While one sync spans
+    several pages, ``head`` pins the version it is catching up to and ``after`` is the
+    ``(version, id)`` of the last todo sent. A full sync has caught up to nothing yet, so
+    its continuation tokens carry ``version`` -1 (todos created before sync have version 0).
+    """
+
+    version: int
+    head: Optional[int] = None
+    after: Optional[Tuple[int, str]] = None
+    issued_at: float = 0.0
+
+
+def encode_sync_token(token: SyncToken) -> str:
+    """Opaque sync token, stamped with the time it is issued so stale ones can be refused."""
+    payload = {"v": token.version, "t": int(time.time())}
+    if token.head is not None and token.after is not None:
+        payload["h"], payload["a"] = token.head, list(token.after)
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).rstrip(b"=").decode()
+
+
+def decode_sync_token(token: str) -> SyncToken:
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        version, issued_at = payload["v"], payload["t"]
+        head, after = payload.get("h"), payload.get("a")
+        if after is not None:
+            after_version, after_id = after
+            after = (after_version, str(after_id))
+    except (ValueError, TypeError, KeyError) as exc:
+        raise InvalidCursor("Malformed sync token") from exc
+    numbers = [issued_at] + ([head, after[0]] if after is not None else [])
+    if (
+        (head is None) != (after is None)
+        or not all(isinstance(n, int) and n >= 0 for n in numbers)
+        or not isinstance(version, int)
+        or version < (-1 if after is not None else 0)
+    ):
+        raise InvalidCursor("Malformed sync token")
+    return SyncToken(version, head, after, float(issued_at))
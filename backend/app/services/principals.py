@@ -0,0 +1,109 @@
+"""Verified-principal caches for the authentication hot path.
+
+Decoded token claims are cached by token hash and detached user snapshots by user id. ORM
+updates/deletes of a ``User`` evict its snapshot; bulk UPDATEs must call ``invalidate``.
+"""
+import hashlib
+import time
+from typing import NamedTuple, Optional
+
+from sqlalchemy import event
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.models import User
+from app.services import security
+
+
+class TokenClaims(NamedTuple):
+    subject: str
+    expires_at: float
+    is_active: Optional[bool]
+
+
+_tokens: Optional[TTLCache[bytes, TokenClaims]] = None
+_users: Optional[TTLCache[str, User]] = None
+_deactivated: Optional[TTLCache[str, bool]] = None
+
+
+def _token_cache() -> TTLCache[bytes, TokenClaims]:
+    global _tokens
+    if _tokens is None:
+        settings = get_settings()
+        _tokens = TTLCache(settings.principal_cache_size, settings.principal_cache_ttl_seconds)
+    return _tokens
+
+
+def _user_cache() -> TTLCache[str, User]:
+    global _users
+    if _users is None:
+        settings = get_settings()
+        _users = TTLCache(settings.principal_cache_size, settings.principal_cache_ttl_seconds)
+    return _users
+
+
+def _deactivated_cache() -> TTLCache[str, bool]:
+    global _deactivated
+    if _deactivated is None:
+        settings = get_settings()
+        # Remembered for a full token lifetime so embedded ``act`` claims cannot outlive it, and
+        # sized on its own so disabling the principal caches does not disable enforcement.
+        _deactivated = TTLCache(settings.deactivated_principals_max, settings.access_token_expire_minutes * 60)
+    return _deactivated
+
+
+def decode_token(token: str) -> Optional[TokenClaims]:
+    key = hashlib.sha256(token.encode()).digest()
+    cache = _token_cache()
+    claims = cache.get(key)
+    if claims is not None:
+        if claims.expires_at > time.time():
+            return claims
+        cache.pop(key)
+        return None
+
+    payload = security.decode_access_token_claims(token)
+    if not payload or not payload.get("sub"):
+        return None
+    claims = TokenClaims(str(payload["sub"]), float(payload.get("exp", 0)), payload.get("act"))
+    cache.set(key, claims, ttl=claims.expires_at - time.time())
+    return claims
+
+
+def get_user(user_id: str) -> Optional[User]:
+    return _user_cache().get(user_id)
+
+
+def remember_user(user: User) -> User:
+    """Cache and return a detached copy of ``user`` that is safe to share between requests."""
+    snapshot = User(**user.model_dump())
+    _user_cache().set(snapshot.id, snapshot)
+    return snapshot
+
+
+def is_deactivated(user_id: str) -> bool:
+    return _deactivated_cache().get(user_id) is not None
+
+
+def invalidate(user_id: str) -> None:
+    _user_cache().pop(user_id)
+
+
+def reset() -> None:
+    global _tokens, _users, _deactivated
+    _tokens = _users = _deactivated = None
+
+
+@event.listens_for(User, "after_update")
+def _evict_updated_user(mapper, connection, target: User) -> None:
+    invalidate(target.id)
+    if target.is_active:
+        _deactivated_cache().pop(target.id)
+    else:
+        _deactivated_cache().set(target.id, True)
+
+
+@event.listens_for(User, "after_delete")
+def _evict_deleted_user(mapper, connection, target: User) -> None:
+    invalidate(target.id)
+    _deactivated_cache().set(target.id, True)
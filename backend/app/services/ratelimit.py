@@ -0,0 +1,253 @@
+"""Token-bucket rate limiting applied by ``RateLimitMiddleware``.
+
+Each rule gives every key (a client IP, or a user id taken from the bearer token) a bucket
+of ``limit`` tokens that refills continuously over ``period``; a request spends one token
+and is rejected with the time until one is available again. Rules:
+
+* ``auth``: ``POST /auth/token`` and ``POST /auth/register`` per client IP and route, so
+  credential stuffing is turned away before it reaches bcrypt.
+* ``writes``: todo writes per user (per IP when the token is missing or invalid).
+
+``MemoryBackend`` keeps buckets per process; ``DatabaseBackend`` keeps them in the
+``rate_limit_buckets`` table so all replicas share one budget. A bucket left idle for a full
+refill period is indistinguishable from a new one, so both backends periodically drop those.
+The client IP is the ASGI peer address. Behind a proxy, uvicorn runs with ``--proxy-headers``
+and ``FORWARDED_ALLOW_IPS`` set to the proxy's addresses only (terraform passes the ingress
+CIDR), so the IP is the rightmost ``X-Forwarded-For`` entry the proxy appended. Never ``*``:
+uvicorn would then take the leftmost entry, which the client writes, and every spoofed value
+would get a fresh bucket.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+import structlog
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+from app.core.http import request_header
+from app.core.metrics import RATE_LIMIT_BACKEND_ERRORS
+from app.db.session import get_engine
+from app.models import RateLimitBucket
+from app.services import principals
+
+logger = structlog.get_logger(__name__)
+
+PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0, "day": 86400.0}
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+SWEEP_INTERVAL = 60.0
+
+
+class Rate(NamedTuple):
+    limit: int
+    period: float
+
+    @property
+    def per_second(self) -> float:
+        return self.limit / self.period
+
+
+def parse_rate(value: str) -> Optional[Rate]:
+    """``"10/minute"`` -> ``Rate(10, 60.0)``; an empty string means no limit."""
+    if not value.strip():
+        return None
+    count, _, unit = value.strip().partition("/")
+    unit = unit.strip().lower().removesuffix("s")
+    if not count.strip().isdigit() or int(count) < 1 or unit not in PERIODS:
+        raise ValueError(f"Invalid rate {value!r}; expected '<requests>/<{'|'.join(PERIODS)}>'")
+    return Rate(int(count), PERIODS[unit])
+
+
+class Rule(NamedTuple):
+    name: str
+    rate: Rate
+    methods: FrozenSet[str]
+    paths: Tuple[str, ...]  # exact paths, or prefixes when ending in "/"
+    by_user: bool
+    per_route: bool
+
+    def matches(self, method: str, path: str) -> bool:
+        if method not in self.methods:
+            return False
+        return any(
+            path == prefix.rstrip("/") or (prefix.endswith("/") and path.startswith(prefix)) for prefix in self.paths
+        )
+
+
+class Rejection(NamedTuple):
+    rule: str
+    retry_after: float
+
+
+class MemoryBackend:
+    """Buckets in a process-local LRU map of at most ``max_keys`` entries."""
+
+    def __init__(self, max_keys: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self._max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_sweep = clock() + SWEEP_INTERVAL
+
+    async def acquire(self, key: str, rate: Rate) -> float:
+        return self.take(key, rate)
+
+    def take(self, key: str, rate: Rate) -> float:
+        """Spend a token from ``key``'s bucket: 0.0 if allowed, else seconds until one is available."""
+        now = self._clock()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            tokens, refilled_at, _ = self._buckets.get(key, (rate.limit, now, 0.0))
+            tokens = min(rate.limit, tokens + (now - refilled_at) * rate.per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # Keep when the bucket will be full again, so the sweep needs no rule lookups.
+            full_at = now + (rate.limit - tokens) / rate.per_second
+            self._buckets[key] = (tokens, now, full_at)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+        return 0.0 if allowed else (1 - tokens) / rate.per_second
+
+    def _sweep(self, now: float) -> None:
+        self._next_sweep = now + SWEEP_INTERVAL
+        for key in [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class DatabaseBackend:
+    """Buckets in ``rate_limit_buckets``, shared by every replica using the database.
+
+    One upsert per request refills and spends atomically under the row lock; only rejected
+    requests read the row back to compute ``Retry-After``. Rows idle for ``max_idle`` seconds
+    (the longest refill period) are deleted about once per ``SWEEP_INTERVAL``.
+    """
+
+    def __init__(self, engine: Engine, max_idle: float, clock: Callable[[], float] = time.time) -> None:
+        self._engine = engine
+        self._max_idle = max_idle
+        self._clock = clock
+        self._next_sweep = clock() + SWEEP_INTERVAL
+
+    async def acquire(self, key: str, rate: Rate) -> float:
+        return await run_in_threadpool(self.take, key, rate)
+
+    def take(self, key: str, rate: Rate) -> float:
+        table = RateLimitBucket.__table__
+        now = self._clock()
+        with self._engine.begin() as connection:
+            # Both dialects spell the upsert the same way.
+            insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+            refilled = table.c.tokens + (now - table.c.refilled_at) * rate.per_second
+            refilled = case((refilled > rate.limit, rate.limit), else_=refilled)
+            statement = (
+                insert(table)
+                .values(key=key, tokens=rate.limit - 1, refilled_at=now)
+                .on_conflict_do_update(
+                    index_elements=[table.c.key],
+                    set_={"tokens": refilled - 1, "refilled_at": now},
+                    where=refilled >= 1,
+                )
+                .returning(table.c.tokens)
+            )
+            if connection.execute(statement).first() is not None:
+                retry_after = 0.0
+            else:
+                tokens, refilled_at = connection.execute(
+                    select(table.c.tokens, table.c.refilled_at).where(table.c.key == key)
+                ).one()
+                available = min(rate.limit, tokens + (now - refilled_at) * rate.per_second)
+                retry_after = max(0.0, (1 - available) / rate.per_second)
+            if now >= self._next_sweep:
+                self._next_sweep = now + SWEEP_INTERVAL
+                connection.execute(delete(table).where(table.c.refilled_at < now - self._max_idle))
+        return retry_after
+
+
+def client_ip(scope: Dict[str, Any]) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _user_id(scope: Dict[str, Any]) -> Optional[str]:
+    authorization = request_header(scope, b"authorization")
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    # Cached, so the route's own authentication does not verify the token a second time.
+    claims = principals.decode_token(token.strip())
+    return claims.subject if claims is not None else None
+
+
+class RateLimiter:
+    def __init__(self, rules: List[Rule], backend: Any) -> None:
+        self.rules = rules
+        self.backend = backend
+
+    async def check(self, scope: Dict[str, Any]) -> Optional[Rejection]:
+        """Spend a token from every bucket the request falls into; the first that is empty rejects it."""
+        method, path = scope["method"], scope["path"]
+        for rule in self.rules:
+            if not rule.matches(method, path):
+                continue
+            user_id = _user_id(scope) if rule.by_user else None
+            key = f"{rule.name}:{'user:' + user_id if user_id else 'ip:' + client_ip(scope)}"
+            if rule.per_route:
+                key = f"{key}:{path}"
+            try:
+                retry_after = await self.backend.acquire(key, rule.rate)
+            except Exception:
+                # A rate limiter outage must not take the API down with it.
+                RATE_LIMIT_BACKEND_ERRORS.inc()
+                logger.warning("ratelimit.backend_error", rule=rule.name, exc_info=True)
+                continue
+            if retry_after > 0:
+                return Rejection(rule.name, retry_after)
+        return None
+
+
+def build_rules() -> List[Rule]:
+    settings = get_settings()
+    candidates = [
+        ("auth", settings.rate_limit_auth, frozenset({"POST"}), ("/auth/token", "/auth/register"), False, True),
+        ("writes", settings.rate_limit_writes, WRITE_METHODS, ("/todos/",), True, False),
+    ]
+    rules = []
+    for name, value, methods, paths, by_user, per_route in candidates:
+        rate = parse_rate(value)
+        if rate is not None:
+            rules.append(Rule(name, rate, methods, paths, by_user, per_route))
+    return rules
+
+
+_limiter: Optional[RateLimiter] = None
+
+
+def get_limiter() -> RateLimiter:
+    global _limiter
+    if _limiter is None:
+        settings = get_settings()
+        rules = build_rules()
+        if settings.rate_limit_backend == "database":
+            max_idle = max((rule.rate.period for rule in rules), default=SWEEP_INTERVAL)
+            backend: Any = DatabaseBackend(get_engine(), max_idle)
+        else:
+            backend = MemoryBackend(settings.rate_limit_max_keys)
+        _limiter = RateLimiter(rules, backend)
+    return _limiter
+
+
+def reset() -> None:
+    global _limiter
+    _limiter = None
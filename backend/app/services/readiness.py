@@ -0,0 +1,170 @@
+"""Readiness: whether this process should be sent more requests right now.
+
+``GET /healthz/ready`` answers 503 while any check fails, so the load balancer routes traffic
+to other replicas until this one recovers. ``GET /healthz`` (liveness) checks none of this, so
+the platform does not restart a replica that is merely busy. Checks:
+
+* ``database``: ``SELECT 1`` on the primary, run at most once per ``READINESS_DB_CHECK_SECONDS``
+  however often the probe is called, and failed after ``READINESS_DB_TIMEOUT_SECONDS``.
+* ``pool``: share of the primary's connections (pool size plus overflow) checked out.
+* ``event_loop``: worst lag of the event loop over the last few seconds, measured by a task
+  that sleeps for a fixed interval and records how late it wakes up (GC pauses, blocking code).
+* ``hashing``: bcrypt jobs queued or running against ``PASSWORD_HASH_MAX_PENDING``.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, NamedTuple, Optional
+
+import structlog
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.core.metrics import EVENT_LOOP_LAG_SECONDS, READINESS_FAILURES
+from app.db.session import get_async_engine, get_engine, pool_utilization
+from app.services import hashing
+
+logger = structlog.get_logger(__name__)
+
+LAG_INTERVAL = 0.25
+LAG_SAMPLES = 20  # five seconds of history at LAG_INTERVAL
+
+
+class Check(NamedTuple):
+    ok: bool
+    detail: Dict[str, Any]
+
+
+def _select_one() -> None:
+    with get_engine().connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+async def _select_one_async() -> None:
+    async with get_async_engine().connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+class DatabaseProbe:
+    """``SELECT 1`` on the primary; calls within ``interval`` of the last one reuse its result."""
+
+    def __init__(self, interval: float, timeout: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.interval = interval
+        self.timeout = timeout
+        self._clock = clock
+        self._checked_at: Optional[float] = None
+        # Not ready until the database has answered once.
+        self._error: Optional[str] = "not checked yet"
+
+    async def check(self, use_async: bool) -> Check:
+        now = self._clock()
+        if self._checked_at is None or now - self._checked_at >= self.interval:
+            # Claimed before awaiting, so probes arriving meanwhile reuse the previous result
+            # rather than adding connections to a database that is already slow to answer.
+            self._checked_at = now
+            self._error = await self._probe(use_async)
+        age = self._clock() - self._checked_at
+        return Check(self._error is None, {"error": self._error, "age_seconds": round(age, 3)})
+
+    async def _probe(self, use_async: bool) -> Optional[str]:
+        try:
+            if use_async:
+                await asyncio.wait_for(_select_one_async(), self.timeout)
+            else:
+                await asyncio.wait_for(run_in_threadpool(_select_one), self.timeout)
+        except Exception as exc:
+            if self._error is None:
+                logger.warning("readiness.database_failed", error=type(exc).__name__)
+            return type(exc).__name__
+        return None
+
+
+class LoopLagMonitor:
+    """How late the event loop runs a timer, sampled every ``interval`` seconds."""
+
+    def __init__(self, interval: float = LAG_INTERVAL, samples: int = LAG_SAMPLES) -> None:
+        self.interval = interval
+        self._samples: Deque[float] = deque(maxlen=samples)
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def lag(self) -> float:
+        """Worst lag in seconds over the recent samples; 0 until the monitor has run."""
+        return max(self._samples, default=0.0)
+
+    def observe(self, lag: float) -> None:
+        lag = max(lag, 0.0)
+        self._samples.append(lag)
+        EVENT_LOOP_LAG_SECONDS.set(lag)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="event-loop-lag")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.observe(loop.time() - start - self.interval)
+
+
+_probe: Optional[DatabaseProbe] = None
+_monitor: Optional[LoopLagMonitor] = None
+
+
+def get_probe() -> DatabaseProbe:
+    global _probe
+    if _probe is None:
+        settings = get_settings()
+        _probe = DatabaseProbe(settings.readiness_db_check_seconds, settings.readiness_db_timeout_seconds)
+    return _probe
+
+
+def get_monitor() -> LoopLagMonitor:
+    global _monitor
+    if _monitor is None:
+        _monitor = LoopLagMonitor()
+    return _monitor
+
+
+def reset() -> None:
+    global _probe, _monitor
+    _probe = None
+    _monitor = None
+
+
+async def check() -> Dict[str, Check]:
+    """Every readiness check by name; the process is ready when all of them pass."""
+    settings = get_settings()
+    utilization = pool_utilization()
+    lag_ms = get_monitor().lag * 1000
+    max_pending = max(1, math.floor(settings.password_hash_max_pending * settings.readiness_max_hash_queue))
+    pending = hashing.pending()
+    checks = {
+        "database": await get_probe().check(settings.database_async),
+        "pool": Check(
+            utilization < settings.readiness_max_pool_utilization,
+            {"utilization": round(utilization, 3), "limit": settings.readiness_max_pool_utilization},
+        ),
+        "event_loop": Check(
+            lag_ms < settings.readiness_max_loop_lag_ms,
+            {"lag_ms": round(lag_ms, 1), "limit_ms": settings.readiness_max_loop_lag_ms},
+        ),
+        "hashing": Check(pending < max_pending, {"pending": pending, "limit": max_pending}),
+    }
+    for name, result in checks.items():
+        if not result.ok:
+            READINESS_FAILURES.labels(name).inc()
+    return checks
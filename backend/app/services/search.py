@@ -0,0 +1,99 @@
+"""Ranked full-text search over a user's todos.
+
+PostgreSQL matches against the generated ``search_vector`` column and ranks with
+``ts_rank_cd``; SQLite matches the ``todos_fts`` FTS5 table and ranks with ``bm25``. See
+``app.db.search`` for the schema. Terms are ANDed and the last one is a prefix, so results
+narrow as the user types.
+"""
+import html
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.search import TS_CONFIG
+from app.schemas import TodoSearchHit
+
+MAX_TERMS = 16
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+# The database delimits matches with control characters; the text is HTML-escaped before they
+# become <mark> tags, so the snippet is safe to render.
+MATCH_START = "\x02"
+MATCH_STOP = "\x03"
+
+# Rank on the index-matched rows first, then build headlines for the page only:
+# ts_headline re-parses the document and is by far the most expensive part.
+_POSTGRES_SEARCH = text(
+    f"""
+    WITH page AS (
+        SELECT id, title, description, is_completed, created_at, updated_at,
+               ts_rank_cd(search_vector, query) AS rank, query
+        FROM todos, to_tsquery('{TS_CONFIG}', :query) AS query
+        WHERE owner_id = :owner_id AND search_vector @@ query
+        ORDER BY rank DESC, created_at DESC, id
+        LIMIT :limit OFFSET :offset
+    )
+    SELECT id, title, description, is_completed, created_at, updated_at, rank,
+           ts_headline(
+               '{TS_CONFIG}', concat_ws(' ', title, description), query,
+               concat('StartSel=', :match_start, ', StopSel=', :match_stop, ', MaxWords=24, MinWords=8')
+           ) AS snippet
+    FROM page
+    ORDER BY rank DESC, created_at DESC, id
+    """
+)
+
+_SQLITE_SEARCH = text(
+    """
+    SELECT todos.id, todos.title, todos.description, todos.is_completed, todos.created_at,
+           todos.updated_at, -bm25(todos_fts, 4.0, 1.0) AS rank,
+           snippet(todos_fts, -1, :match_start, :match_stop, '…', 16) AS snippet
+    FROM todos_fts JOIN todos ON todos.rowid = todos_fts.rowid
+    WHERE todos_fts MATCH :query AND todos.owner_id = :owner_id
+    ORDER BY rank DESC, todos.created_at DESC, todos.id
+    LIMIT :limit OFFSET :offset
+    """
+)
+
+
+def search_terms(query: str) -> List[str]:
+    """Word tokens of ``query``; everything else (operators, quotes) is dropped."""
+    return re.findall(r"\w+", query)[:MAX_TERMS]
+
+
+def highlight(snippet: Optional[str]) -> Optional[str]:
+    """``snippet`` as HTML: the text escaped, matches wrapped in ``<mark>``."""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(MATCH_START, HIGHLIGHT_START).replace(MATCH_STOP, HIGHLIGHT_STOP)
+
+
+def search_todos(
+    session: Session, owner_id: str, query: str, *, limit: int, offset: int = 0
+) -> Tuple[List[TodoSearchHit], bool]:
+    """Return up to ``limit`` hits after ``offset``, best first, and whether more exist."""
+    terms = search_terms(query)
+    if not terms:
+        return [], False
+
+    params = {
+        "owner_id": owner_id,
+        "limit": limit + 1,
+        "offset": offset,
+        "match_start": MATCH_START,
+        "match_stop": MATCH_STOP,
+    }
+    if session.get_bind().dialect.name == "postgresql":
+        statement = _POSTGRES_SEARCH
+        params["query"] = " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+    else:
+        statement = _SQLITE_SEARCH
+        params["query"] = " ".join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+
+    rows = session.execute(statement, params).all()
+    hits = [
+        TodoSearchHit.model_validate({**row._mapping, "snippet": highlight(row.snippet)}) for row in rows[:limit]
+    ]
+    return hits, len(rows) > limit
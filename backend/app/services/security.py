@@ -1,44 +1,84 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional
-
-import bcrypt
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from typing import Any, Dict, Optional
 
 from app.core.config import get_settings
+from app.core.metrics import JWT_SECONDS, PASSWORD_HASH_SECONDS
+from app.core.passwords import get_password_hash, verify_password
+from app.db.session import DBSession, run_sync
 from app.models import User
+from app.services import hashing, users
 
 ALGORITHM = "HS256"
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+def load_jwt() -> Any:
+    """Import python-jose on first use; it loads ``cryptography`` (~80 ms) with it.
+
+    After the first call this is a ``sys.modules`` lookup. The lifespan calls it in the
+    background once the app is serving, so the first authenticated request rarely waits.
+    """
+    from jose import jwt
+
+    return jwt
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when a stored ``$2b$NN$...`` hash uses a different cost than configured."""
+    try:
+        rounds = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != get_settings().bcrypt_rounds
+
+
+async def hash_password(password: str) -> str:
+    with PASSWORD_HASH_SECONDS.labels("hash").time():
+        return await hashing.run(get_password_hash, password, get_settings().bcrypt_rounds)
 
 
-def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    with PASSWORD_HASH_SECONDS.labels("verify").time():
+        return await hashing.run(verify_password, plain_password, hashed_password)
 
 
-def authenticate_user(session: Session, email: str, password: str) -> Optional[User]:
-    user = session.query(User).filter(User.email == email).first()
+async def authenticate_user(session: DBSession, email: str, password: str) -> Optional[User]:
+    user = await run_sync(session, users.get_user_by_email, email)
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await check_password(password, user.password_hash):
         return None
+    if needs_rehash(user.password_hash):
+        # The plaintext is only available at login, so upgrade the stored cost now. Losing
+        # the race for a hashing slot just postpones the upgrade to a later login.
+        try:
+            password_hash = await hash_password(password)
+        except hashing.HashingOverloaded:
+            return user
+        await run_sync(session, users.update_password_hash, user, password_hash)
     return user
 
 
-def create_access_token(subject: str) -> str:
+def create_access_token(subject: str, is_active: bool = True) -> str:
     settings = get_settings()
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expire_minutes)
-    to_encode = {"sub": subject, "exp": expire}
-    return jwt.encode(to_encode, settings.jwt_secret, algorithm=ALGORITHM)
+    to_encode: Dict[str, Any] = {"sub": subject, "exp": expire}
+    if settings.jwt_embed_active:
+        to_encode["act"] = is_active
+    jwt = load_jwt()
+    with JWT_SECONDS.labels("encode").time():
+        return jwt.encode(to_encode, settings.jwt_secret, algorithm=ALGORITHM)
 
 
-def decode_access_token(token: str) -> Optional[str]:
+def decode_access_token_claims(token: str) -> Optional[Dict[str, Any]]:
     settings = get_settings()
+    jwt = load_jwt()
     try:
-        payload = jwt.decode(token, settings.jwt_secret, algorithms=[ALGORITHM])
-        return payload.get("sub")
-    except JWTError:
+        with JWT_SECONDS.labels("decode").time():
+            return jwt.decode(token, settings.jwt_secret, algorithms=[ALGORITHM])
+    except jwt.JWTError:
         return None
+
+
+def decode_access_token(token: str) -> Optional[str]:
+    payload = decode_access_token_claims(token)
+    return payload.get("sub") if payload else None
@@ -0,0 +1,333 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Row, and_, delete, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models import Todo, TodoTombstone, User
+from app.schemas import (
+    TodoBatchCreate,
+    TodoBatchDelete,
+    TodoBatchItemResult,
+    TodoBatchRequest,
+    TodoBatchResult,
+    TodoCreate,
+    TodoFilters,
+    TodoRead,
+    TodoUpdate,
+)
+from app.services import events
+from app.services.pagination import SyncToken
+
+# Columns returned by write statements; exactly the fields of ``TodoRead``.
+READ_COLUMNS = (Todo.id, Todo.title, Todo.description, Todo.is_completed, Todo.created_at, Todo.updated_at)
+READ_FIELDS = tuple(column.key for column in READ_COLUMNS)
+
+
+def get_collection_version(session: Session, owner_id: str) -> int:
+    """Current version of the owner's todo collection (a primary-key lookup)."""
+    return session.execute(select(User.todos_version).where(User.id == owner_id)).scalar_one_or_none() or 0
+
+
+def _bump_collection_version(session: Session, owner_id: str, by: int = 1) -> int:
+    # Core UPDATE: no ORM events, so cached principals are not needlessly evicted.
+    return session.execute(
+        update(User)
+        .where(User.id == owner_id)
+        .values(todos_version=User.todos_version + by)
+        .returning(User.todos_version)
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
+
+
+def claim_version(session: Session, owner_id: str) -> int:
+    """Open a write to the owner's collection: bump its version and return the new value.
+
+    Rows written in the transaction are stamped with it for ``list_changes``. Bumping before
+    writing takes the ``users`` row lock first, so one owner's write transactions commit in
+    version order and a sync token can never skip past one that committed late.
+    """
+    return _bump_collection_version(session, owner_id)
+
+
+Change = Tuple[str, str, Optional[TodoRead]]
+_EVENT_TYPES = {"create": "created", "update": "updated", "delete": "deleted"}
+
+
+def _record_changes(session: Session, owner_id: str, version: int, changes: List[Change]) -> None:
+    """Stage the stream events for ``changes`` made under the claimed ``version``.
+
+    Each change gets its own event id, starting at ``version``; the collection version is
+    advanced past the extra ids.
+    """
+    if len(changes) > 1:
+        _bump_collection_version(session, owner_id, len(changes) - 1)
+    events.stage(
+        session,
+        [
+            events.TodoEvent(version + i, owner_id, kind, todo_id, todo.model_dump(mode="json") if todo else None)
+            for i, (kind, todo_id, todo) in enumerate(changes)
+        ],
+    )
+
+
+def _record_deletions(session: Session, owner_id: str, version: int, todo_ids: Sequence[str]) -> None:
+    if todo_ids:
+        deleted_at = datetime.utcnow()
+        rows = [
+            {"todo_id": todo_id, "owner_id": owner_id, "version": version, "deleted_at": deleted_at}
+            for todo_id in todo_ids
+        ]
+        session.execute(insert(TodoTombstone), rows)
+
+
+def record_bulk_load(session: Session, owner_id: str, version: int, count: int) -> None:
+    """Account for rows written outside the ORM (imports) under ``version``; streams reload."""
+    events.stage(session, [events.TodoEvent(version, owner_id, "resync", "", {"imported": count})])
+
+
+def list_changes(
+    session: Session, owner_id: str, since: Optional[SyncToken], *, limit: int
+) -> Tuple[Sequence[Row], List[str], SyncToken]:
+    """Todos written and ids deleted after ``since``, and the token to sync from next.
+
+    Without ``since`` every todo is returned and no deletions. When the collection version
+    still equals the token's, that primary-key lookup is the only query. Otherwise rows come
+    from ``ix_todos_owner_id_version`` in ``(version, id)`` order, at most ``limit`` per
+    call; a returned token carrying ``after`` means more pages follow. Deletions are sent
+    with the first page. Rows are ``READ_COLUMNS`` tuples followed by the version.
+    """
+    head = get_collection_version(session, owner_id)
+    if since is not None and since.after is None and since.version >= head:
+        # A lagging replica can be behind the token; never hand back an older position.
+        return [], [], SyncToken(since.version)
+
+    base = since.version if since is not None else -1
+    if since is not None and since.head is not None:
+        # Stay within the pinned head, and within what this (possibly lagging) replica has seen;
+        # anything in between is resent by the next sync.
+        head = min(head, since.head)
+    query = select(*READ_COLUMNS, Todo.version).where(
+        Todo.owner_id == owner_id, Todo.version > base, Todo.version <= head
+    )
+    if since is not None and since.after is not None:
+        after_version, after_id = since.after
+        query = query.where(
+            or_(Todo.version > after_version, and_(Todo.version == after_version, Todo.id > after_id))
+        )
+    rows = session.execute(query.order_by(Todo.version, Todo.id).limit(limit + 1)).all()
+
+    deleted: List[str] = []
+    if since is not None and since.after is None:
+        deleted = list(
+            session.scalars(
+                select(TodoTombstone.todo_id).where(
+                    TodoTombstone.owner_id == owner_id, TodoTombstone.version > base, TodoTombstone.version <= head
+                )
+            )
+        )
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, deleted, SyncToken(base, head, (rows[-1].version, rows[-1].id))
+    return rows, deleted, SyncToken(head)
+
+
+def prune_tombstones(session: Session, older_than: datetime) -> int:
+    """Forget deletions made before ``older_than``; returns how many were dropped."""
+    result = session.execute(delete(TodoTombstone).where(TodoTombstone.deleted_at < older_than))
+    session.commit()
+    return result.rowcount
+
+
+def list_todos(
+    session: Session,
+    owner_id: str,
+    *,
+    limit: int,
+    after: Optional[Tuple[datetime, str]] = None,
+    filters: Optional[TodoFilters] = None,
+) -> Tuple[Sequence[Row], bool]:
+    """Return up to ``limit`` todos after the keyset position ``after`` and whether more exist.
+
+    Rows are ordered ``(created_at DESC, id)`` to match ``ix_todos_owner_id_created_at_id``
+    so each page is an index range scan. They are ``READ_COLUMNS`` tuples rather than ORM
+    entities: nothing is added to the identity map and only the response fields are read.
+    """
+    query = select(*READ_COLUMNS).where(Todo.owner_id == owner_id)
+
+    if after is not None:
+        after_created_at, after_id = after
+        query = query.where(
+            or_(
+                Todo.created_at < after_created_at,
+                and_(Todo.created_at == after_created_at, Todo.id > after_id),
+            )
+        )
+
+    if filters is not None:
+        if filters.is_completed is not None:
+            query = query.where(Todo.is_completed == filters.is_completed)
+        if filters.created_after is not None:
+            query = query.where(Todo.created_at >= filters.created_after)
+        if filters.created_before is not None:
+            query = query.where(Todo.created_at < filters.created_before)
+        if filters.updated_after is not None:
+            query = query.where(Todo.updated_at >= filters.updated_after)
+        if filters.updated_before is not None:
+            query = query.where(Todo.updated_at < filters.updated_before)
+        if filters.title_prefix:
+            query = query.where(Todo.title.startswith(filters.title_prefix, autoescape=True))
+
+    # Fetch one extra row to learn whether another page exists without a COUNT.
+    rows = session.execute(query.order_by(Todo.created_at.desc(), Todo.id.asc()).limit(limit + 1)).all()
+    return rows[:limit], len(rows) > limit
+
+
+def get_todo(session: Session, todo_id: str, owner_id: str) -> Optional[Todo]:
+    return session.query(Todo).filter(Todo.id == todo_id, Todo.owner_id == owner_id).first()
+
+
+def create_todo(session: Session, owner_id: str, payload: TodoCreate) -> TodoRead:
+    version = claim_version(session, owner_id)
+    values = Todo(**payload.model_dump(), owner_id=owner_id, version=version).model_dump()
+    row = session.execute(insert(Todo).values(**values).returning(*READ_COLUMNS)).one()
+    todo = TodoRead(**row._mapping)
+    _record_changes(session, owner_id, version, [("created", todo.id, todo)])
+    session.commit()
+    return todo
+
+
+def update_todo(session: Session, todo_id: str, owner_id: str, payload: TodoUpdate) -> Optional[TodoRead]:
+    """Apply ``payload`` with one ``UPDATE ... RETURNING``; ``updated_at`` is bumped by the column's ``onupdate``."""
+    changes = payload.model_dump(exclude_unset=True)
+    if not changes:
+        row = session.execute(select(*READ_COLUMNS).where(Todo.id == todo_id, Todo.owner_id == owner_id)).first()
+        return TodoRead(**row._mapping) if row is not None else None
+    version = claim_version(session, owner_id)
+    statement = (
+        update(Todo)
+        .where(Todo.id == todo_id, Todo.owner_id == owner_id)
+        .values(**changes, version=version)
+        .returning(*READ_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    row = session.execute(statement).first()
+    if row is None:
+        session.rollback()
+        return None
+    todo = TodoRead(**row._mapping)
+    _record_changes(session, owner_id, version, [("updated", todo.id, todo)])
+    session.commit()
+    return todo
+
+
+def delete_todo(session: Session, todo_id: str, owner_id: str) -> bool:
+    version = claim_version(session, owner_id)
+    statement = (
+        delete(Todo)
+        .where(Todo.id == todo_id, Todo.owner_id == owner_id)
+        .returning(Todo.id)
+        .execution_options(synchronize_session=False)
+    )
+    if session.execute(statement).first() is None:
+        session.rollback()
+        return False
+    _record_deletions(session, owner_id, version, [todo_id])
+    _record_changes(session, owner_id, version, [("deleted", todo_id, None)])
+    session.commit()
+    return True
+
+
+def apply_batch(session: Session, owner_id: str, batch: TodoBatchRequest) -> TodoBatchResult:
+    """Apply a batch of todo operations as set-based statements in a single transaction.
+
+    All creates become one multi-row INSERT, updates sharing the same change-set one
+    ``UPDATE ... WHERE id IN``, and deletes one ``DELETE ... WHERE id IN``; each uses
+    RETURNING so per-item results need no follow-up SELECT. Running them grouped rather
+    than in request order is safe because ``TodoBatchRequest`` lets each todo id appear
+    in one operation only; ``batch.action`` runs last and sees their effects.
+    """
+    now = datetime.utcnow()
+    version = claim_version(session, owner_id)
+    results: List[Optional[TodoBatchItemResult]] = [None] * len(batch.operations)
+
+    creates = [(i, op) for i, op in enumerate(batch.operations) if isinstance(op, TodoBatchCreate)]
+    if creates:
+        rows = [
+            Todo(**op.data.model_dump(), owner_id=owner_id, version=version).model_dump() for _, op in creates
+        ]
+        created = session.execute(insert(Todo).returning(*READ_COLUMNS, sort_by_parameter_order=True), rows)
+        for (i, _), row in zip(creates, created):
+            results[i] = TodoBatchItemResult(op="create", id=row.id, status="ok", todo=TodoRead(**row._mapping))
+
+    # Group updates by identical change-set so "complete these 200" is one statement.
+    update_groups: Dict[Tuple[Tuple[str, Any], ...], List[Tuple[int, str]]] = {}
+    for i, op in enumerate(batch.operations):
+        if op.op == "update":
+            changes = tuple(sorted(op.data.model_dump(exclude_unset=True).items()))
+            update_groups.setdefault(changes, []).append((i, op.id))
+    for changes, items in update_groups.items():
+        statement = (
+            update(Todo)
+            .where(Todo.owner_id == owner_id, Todo.id.in_({todo_id for _, todo_id in items}))
+            .values(**dict(changes), updated_at=now, version=version)
+            .returning(*READ_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        updated = {row.id: TodoRead(**row._mapping) for row in session.execute(statement)}
+        for i, todo_id in items:
+            todo = updated.get(todo_id)
+            results[i] = TodoBatchItemResult(
+                op="update", id=todo_id, status="ok" if todo else "not_found", todo=todo
+            )
+
+    deletes = [(i, op.id) for i, op in enumerate(batch.operations) if isinstance(op, TodoBatchDelete)]
+    if deletes:
+        statement = (
+            delete(Todo)
+            .where(Todo.owner_id == owner_id, Todo.id.in_({todo_id for _, todo_id in deletes}))
+            .returning(Todo.id)
+            .execution_options(synchronize_session=False)
+        )
+        deleted = set(session.scalars(statement))
+        for i, todo_id in deletes:
+            results[i] = TodoBatchItemResult(
+                op="delete", id=todo_id, status="ok" if todo_id in deleted else "not_found"
+            )
+
+    changes: List[Change] = [
+        (_EVENT_TYPES[result.op], result.id, result.todo)
+        for result in results
+        if result is not None and result.status == "ok"
+    ]
+
+    action_ids: List[str] = []
+    if batch.action == "complete_all":
+        statement = (
+            update(Todo)
+            .where(Todo.owner_id == owner_id, Todo.is_completed.is_(False))
+            .values(is_completed=True, updated_at=now, version=version)
+            .returning(*READ_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        completed = [TodoRead(**row._mapping) for row in session.execute(statement)]
+        action_ids = [todo.id for todo in completed]
+        changes.extend(("updated", todo.id, todo) for todo in completed)
+    elif batch.action == "delete_completed":
+        statement = (
+            delete(Todo)
+            .where(Todo.owner_id == owner_id, Todo.is_completed.is_(True))
+            .returning(Todo.id)
+            .execution_options(synchronize_session=False)
+        )
+        action_ids = list(session.scalars(statement))
+        changes.extend(("deleted", todo_id, None) for todo_id in action_ids)
+
+    if changes:
+        _record_deletions(session, owner_id, version, [todo_id for kind, todo_id, _ in changes if kind == "deleted"])
+        _record_changes(session, owner_id, version, changes)
+        session.commit()
+    else:
+        session.rollback()  # nothing matched: give the claimed version back
+    return TodoBatchResult(results=[result for result in results if result is not None], action_ids=action_ids)
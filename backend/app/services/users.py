@@ -0,0 +1,43 @@
+from typing import Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.models import User
+from app.schemas import UserRead
+
+# Columns returned by ``create_user``; exactly the fields of ``UserRead``.
+READ_COLUMNS = (User.id, User.email, User.full_name, User.is_active, User.created_at, User.updated_at)
+
+
+def get_user(session: Session, user_id: str) -> Optional[User]:
+    return session.get(User, user_id)
+
+
+def get_user_by_email(session: Session, email: str) -> Optional[User]:
+    return session.query(User).filter(User.email == email).first()
+
+
+def create_user(session: Session, email: str, full_name: str, password_hash: str) -> UserRead:
+    values = User(email=email, full_name=full_name, password_hash=password_hash).model_dump()
+    row = session.execute(insert(User).values(**values).returning(*READ_COLUMNS)).one()
+    session.commit()
+    return UserRead(**row._mapping)
+
+
+def update_password_hash(session: Session, user: User, password_hash: str) -> None:
+    """Store ``password_hash`` with one UPDATE.
+
+    ``user`` is detached first so the commit does not expire it: the caller still reads its
+    fields, and reloading them would cost the SELECT this avoids.
+    """
+    session.expunge(user)
+    statement = (
+        update(User)
+        .where(User.id == user.id)
+        .values(password_hash=password_hash)
+        .execution_options(synchronize_session=False)
+    )
+    session.execute(statement)
+    session.commit()
+    user.password_hash = password_hash
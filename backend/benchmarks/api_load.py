@@ -0,0 +1,314 @@
+"""Throughput and latency of the API's endpoints, in process and behind a real uvicorn.
+
+Usage: ``uv run python -m benchmarks.api_load [--users 50] [--todos 200] [--requests 2000]
+[--concurrency 16] [--mode inprocess|uvicorn|both] [--workers 1] [--output PATH]``
+
+A fresh SQLite database (or ``--database-url``) is seeded with ``--users`` x ``--todos`` via
+``scripts.seed.seed_bulk``. Each scenario then sends ``--requests`` requests from
+``--concurrency`` concurrent clients. Password scenarios (register, login) send a tenth of
+that, because bcrypt dominates them. The scenarios are: register, login, me, list_todos,
+list_todos_304 (a conditional GET that matches), create_todo, update_todo, delete_todo, and a
+weighted ``mix``.
+
+"inprocess" drives ``app.main:app`` through ``httpx.ASGITransport``. That isolates
+application cost from the network and the server. "uvicorn" starts ``--workers`` server
+processes on a local port. Per endpoint, results report the request count, errors, req/s and
+p50/p95/p99 latency. They are written as JSON to ``benchmarks/results/`` by default. Compare
+two runs with ``python -m benchmarks.compare OLD.json NEW.json``.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import count
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+RESULTS_DIR = Path(__file__).parent / "results"
+PASSWORD = "bench-password"
+MIX_WEIGHTS = {"list_todos": 60, "create_todo": 15, "update_todo": 15, "delete_todo": 5, "me": 5}
+
+Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted ``samples``."""
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, max(math.ceil(q / 100 * len(samples)) - 1, 0))
+    return samples[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def drive(client: httpx.AsyncClient, request: Request, total: int, concurrency: int) -> Dict[str, Any]:
+    counter = count()
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        while (n := next(counter)) < total:
+            start = time.perf_counter()
+            try:
+                response = await request(client, n)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+class Workload:
+    """Per-user tokens and todo ids shared by the scenarios, plus the requests themselves."""
+
+    def __init__(self, users: List[Tuple[str, str]], todo_ids: Dict[str, List[str]], tokens: Dict[str, str]):
+        self.users = users
+        self.todo_ids = todo_ids
+        self.headers = {user_id: {"Authorization": f"Bearer {token}"} for user_id, token in tokens.items()}
+        self.etags: Dict[str, str] = {}
+        self.created: List[Tuple[str, str]] = []
+        self.run_id = os.urandom(4).hex()
+        self._registrations = count()
+
+    def _user(self, n: int) -> str:
+        return self.users[n % len(self.users)][0]
+
+    async def register(self, client: httpx.AsyncClient, n: int) -> httpx.Response:
+        email = f"register-{self.run_id}-{next(self._registrations)}@example.com"
+        payload = {"email": email, "full_name": "Bench", "password": PASSWORD}
+        return await client.post("/auth/register", json=payload)
+
+    async def login(self, client: httpx.AsyncClient, n: int) -> httpx.Response:
+        email = self.users[n % len(self.users)][1]
+        return await client.post("/auth/token", data={"username": email, "password": PASSWORD})
+
+    async def me(self, client: httpx.AsyncClient, n: int) -> httpx.Response:
+        return await client.get("/auth/me", headers=self.headers[self._user(n)])
+
+    async def list_todos(self, client: httpx.AsyncClient, n: int) -> httpx.Response:
+        return await client.get("/todos", params={"limit": 100}, headers=self.headers[self._user(n)])
+
+    async def list_todos_304(self, client: httpx.AsyncClient, n: int) -> httpx.Response:
+        user_id = self._user(n)
+        headers = self.headers[user_id]
+        if user_id not in self.etags:
+            self.etags[user_id] = (await client.get("/todos", headers=headers)).headers["etag"]
+        return await client.get("/todos", headers={**headers, "If-None-Match": self.etags[user_id]})
+
+    async def create_todo(self, client: httpx.AsyncClient, n: int) -> httpx.Response:
+        user_id = self._user(n)
+        response = await client.post("/todos", json={"title": f"Bench {n}"}, headers=self.headers[user_id])
+        if response.status_code == 201:
+            self.created.append((user_id, response.json()["id"]))
+        return response
+
+    async def update_todo(self, client: httpx.AsyncClient, n: int) -> httpx.Response:
+        user_id = self._user(n)
+        todo_ids = self.todo_ids[user_id]
+        todo_id = todo_ids[n // len(self.users) % len(todo_ids)]
+        payload = {"is_completed": bool(n % 2)}
+        return await client.patch(f"/todos/{todo_id}", json=payload, headers=self.headers[user_id])
+
+    async def delete_todo(self, client: httpx.AsyncClient, n: int) -> httpx.Response:
+        if not self.created:
+            return await self.create_todo(client, n)
+        user_id, todo_id = self.created.pop()
+        return await client.delete(f"/todos/{todo_id}", headers=self.headers[user_id])
+
+    async def mix(self, client: httpx.AsyncClient, n: int) -> httpx.Response:
+        name = random.Random(n).choices(list(MIX_WEIGHTS), weights=list(MIX_WEIGHTS.values()))[0]
+        return await getattr(self, name)(client, n)
+
+
+SCENARIOS = (
+    "register",
+    "login",
+    "me",
+    "list_todos",
+    "list_todos_304",
+    "create_todo",
+    "update_todo",
+    "delete_todo",
+    "mix",
+)
+PASSWORD_SCENARIOS = {"register", "login"}
+
+
+async def run_scenarios(
+    client: httpx.AsyncClient, workload: Workload, args: argparse.Namespace, label: str
+) -> Dict[str, Any]:
+    results = {}
+    for name in SCENARIOS:
+        total = max(args.requests // 10, 1) if name in PASSWORD_SCENARIOS else args.requests
+        await drive(client, getattr(workload, name), min(total, 50), args.concurrency)  # warm up
+        results[name] = await drive(client, getattr(workload, name), total, args.concurrency)
+        stats = results[name]
+        print(
+            f"{label:<10} {name:<15} {stats['rps']:>9.1f} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+            f"{stats['p99_ms']:>9.2f} {stats['errors']:>7}",
+            flush=True,
+        )
+    return results
+
+
+async def run_inprocess(workload: Workload, args: argparse.Namespace) -> Dict[str, Any]:
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        return await run_scenarios(client, workload, args, "inprocess")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_uvicorn(workload: Workload, args: argparse.Namespace) -> Dict[str, Any]:
+    port = _free_port()
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--port", str(port), "--workers", str(args.workers), "--log-level", "warning", "--no-access-log",
+    ]  # fmt: skip
+    server = subprocess.Popen(command, env=os.environ.copy(), stdout=subprocess.DEVNULL)
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    if (await client.get("/healthz")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError("uvicorn did not become ready")
+                await asyncio.sleep(0.1)
+            return await run_scenarios(client, workload, args, "uvicorn")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def prepare(args: argparse.Namespace) -> Workload:
+    """Create the schema, seed it and mint a token per user (bypassing bcrypt)."""
+    from sqlalchemy import select
+    from sqlmodel import SQLModel
+
+    from app.db.session import get_engine, session_scope
+    from app.models import Todo
+    from app.services.security import create_access_token
+    from scripts.seed import seed_bulk
+
+    SQLModel.metadata.create_all(get_engine())
+    start = time.perf_counter()
+    with session_scope() as session:
+        users = seed_bulk(session, args.users, args.todos, password=PASSWORD)
+    print(f"seeded {args.users} users x {args.todos} todos in {time.perf_counter() - start:.1f}s")
+
+    user_ids = [user_id for user_id, _ in users]
+    todo_ids: Dict[str, List[str]] = {user_id: [] for user_id in user_ids}
+    with session_scope() as session:
+        rows = session.execute(select(Todo.owner_id, Todo.id).where(Todo.owner_id.in_(user_ids)))
+        for owner_id, todo_id in rows:
+            if len(todo_ids[owner_id]) < 100:
+                todo_ids[owner_id].append(todo_id)
+    tokens = {user_id: create_access_token(user_id) for user_id in user_ids}
+    return Workload(users, todo_ids, tokens)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--todos", type=int, default=200, help="todos per user")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn", "both"), default="both")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--database-url", help="defaults to a fresh temporary SQLite file")
+    parser.add_argument("--output", type=Path, help="results JSON (default benchmarks/results/<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='todo-bench-')}/bench.db"
+    # Set before the app is imported: settings and engines read the environment once.
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("JWT_SECRET", "bench-secret")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Every simulated client shares one address; measure the API, not the limiter.
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    workload = prepare(args)
+    print(f"{'mode':<10} {'scenario':<15} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    runs = {}
+    if args.mode in ("inprocess", "both"):
+        runs["inprocess"] = asyncio.run(run_inprocess(workload, args))
+    if args.mode in ("uvicorn", "both"):
+        runs["uvicorn"] = asyncio.run(run_uvicorn(workload, args))
+
+    from app.services import hashing
+
+    hashing.shutdown()
+
+    from sqlalchemy.engine import make_url
+
+    commit = _git_commit()
+    timestamp = datetime.now(timezone.utc)
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": timestamp.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": make_url(database_url).render_as_string(hide_password=True),
+            "users": args.users,
+            "todos_per_user": args.todos,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+        },
+        "runs": runs,
+    }
+    output = args.output or RESULTS_DIR / f"{commit or 'unknown'}-{timestamp:%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
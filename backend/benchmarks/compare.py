@@ -0,0 +1,58 @@
+"""Compare two ``benchmarks.api_load`` result files.
+
+Usage: ``uv run python -m benchmarks.compare OLD.json NEW.json [--threshold 10]``
+
+Prints the change in req/s and p50/p95/p99 for every mode and scenario present in both files.
+Exits with status 1 if any scenario's p95 grew, or its req/s fell, by more than
+``--threshold`` percent, so the script can gate CI.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+METRICS = ("rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], threshold: float) -> List[str]:
+    """Print the comparison table; return the scenarios that regressed beyond ``threshold``."""
+    regressions = []
+    header = f"{'mode':<10} {'scenario':<15} " + " ".join(f"{metric:>18}" for metric in METRICS)
+    print(header)
+    for mode, scenarios in new["runs"].items():
+        for name, stats in scenarios.items():
+            before = old["runs"].get(mode, {}).get(name)
+            if before is None:
+                continue
+            cells = [f"{before[m]:>8.1f}→{stats[m]:<8.1f}{change(before[m], stats[m]):+.0f}%" for m in METRICS]
+            print(f"{mode:<10} {name:<15} " + " ".join(f"{cell:>18}" for cell in cells))
+            slower = change(before["p95_ms"], stats["p95_ms"]) > threshold
+            if slower or change(before["rps"], stats["rps"]) < -threshold:
+                regressions.append(f"{mode}/{name}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args()
+
+    old = json.loads(args.old.read_text())
+    new = json.loads(args.new.read_text())
+    print(f"old: {old['meta'].get('commit')} {old['meta']['timestamp']}")
+    print(f"new: {new['meta'].get('commit')} {new['meta']['timestamp']}")
+    regressions = compare(old, new, args.threshold)
+    if regressions:
+        print(f"regressed by more than {args.threshold:g}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Bytes on the wire and CPU cost of compressing ``GET /todos`` and ``GET /todos/export`` bodies.
+
+Usage: ``uv run python -m benchmarks.compression [--sizes 1000 10000] [--repeat N] [--mbps M]``
+
+Bodies are built as the app builds them: the list as one JSON document (``READ_COLUMNS``
+row tuples through ``app.core.serialization``), the export as NDJSON partitions of
+``EXPORT_PARTITION_SIZE`` rows, compressed chunk by chunk with a flush after each as
+``CompressionMiddleware`` streams them. Each encoding is measured at a few levels, including
+the configured default (marked ``*``); zstd and br are skipped when their packages are not
+installed. "net ms" is the transfer time saved at ``--mbps`` minus the CPU spent, so a
+positive value means compression pays for itself on a link of that speed.
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+from uuid import uuid4
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, create_engine
+
+from app.api.routes.todos import EXPORT_PARTITION_SIZE
+from app.core import compression, serialization
+from app.core.config import get_settings
+from app.models import Todo
+from app.services import exports
+from app.services.todos import READ_COLUMNS, READ_FIELDS
+from benchmarks.serialization import seed
+
+LEVELS = {"zstd": (1, 3, 9), "br": (1, 4, 7), "gzip": (1, 5, 9)}
+LEVEL_SETTINGS = {
+    "zstd": "compression_zstd_level",
+    "br": "compression_brotli_quality",
+    "gzip": "compression_gzip_level",
+}
+
+
+def bodies(size: int) -> Dict[str, List[bytes]]:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    owner_id = str(uuid4())
+    with Session(engine) as session:
+        seed(session, owner_id, size)
+        statement = select(*READ_COLUMNS).where(Todo.owner_id == owner_id).order_by(Todo.created_at.desc())
+        rows = list(session.execute(statement).all())
+    engine.dispose()
+    partitions = [rows[n : n + EXPORT_PARTITION_SIZE] for n in range(0, len(rows), EXPORT_PARTITION_SIZE)]
+    return {
+        "list": [serialization.dumps(serialization.records(rows, READ_FIELDS))],
+        "export": [exports.encode_ndjson(partition) for partition in partitions],
+    }
+
+
+def compress(make_encoder: Callable[[], compression.Encoder], chunks: Sequence[bytes]) -> int:
+    encoder = make_encoder()
+    return sum(len(encoder.compress(chunk, final=n == len(chunks) - 1)) for n, chunk in enumerate(chunks))
+
+
+def best_of(repeat: int, fn: Callable[[], int]) -> Tuple[float, float, int]:
+    size = fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), statistics.median(timings), size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--mbps", type=float, default=10.0, help="link speed for the net column")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    encodings = compression.available_encodings()
+    print(f"encodings: {', '.join(encodings)}; net ms at {args.mbps:g} Mbit/s")
+    print(
+        f"{'items':>6}  {'body':<7} {'encoding':<9} {'bytes':>10} {'ratio':>6} "
+        f"{'cpu ms':>8} {'median':>8} {'MB/s':>7} {'net ms':>8}"
+    )
+    for size in args.sizes:
+        for body, chunks in bodies(size).items():
+            identity = sum(len(chunk) for chunk in chunks)
+            print(f"{size:>6}  {body:<7} {'identity':<9} {identity:>10}")
+            for encoding in encodings:
+                default = getattr(settings, LEVEL_SETTINGS[encoding])
+                for level in sorted({*LEVELS[encoding], default}):
+                    make_encoder = _encoder_factory(encoding, level)
+                    best, median, compressed = best_of(args.repeat, lambda: compress(make_encoder, chunks))
+                    saved_ms = (identity - compressed) * 8 / (args.mbps * 1e6) * 1000
+                    label = f"{encoding}-{level}{'*' if level == default else ''}"
+                    print(
+                        f"{size:>6}  {body:<7} {label:<9} {compressed:>10} {identity / compressed:>6.1f} "
+                        f"{best * 1000:>8.2f} {median * 1000:>8.2f} {identity / best / 1e6:>7.0f} "
+                        f"{saved_ms - best * 1000:>8.1f}"
+                    )
+
+
+def _encoder_factory(encoding: str, level: int) -> Callable[[], compression.Encoder]:
+    settings = get_settings().model_copy(update={LEVEL_SETTINGS[encoding]: level})
+    return lambda: compression.encoder(encoding, settings)
+
+
+if __name__ == "__main__":
+    main()
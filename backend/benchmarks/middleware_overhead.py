@@ -0,0 +1,107 @@
+"""Per-request overhead of the request logging middleware, before and after the pure-ASGI rewrite.
+
+Usage: ``uv run python -m benchmarks.middleware_overhead [--requests N]``
+
+"before" reproduces the previous stack (``RequestIDMiddleware`` building a ``Request`` plus
+``log_requests`` on ``BaseHTTPMiddleware``); "after" is ``RequestLoggingMiddleware``. Both
+emit one access log line through structlog into a discarding logger, so the numbers isolate
+middleware cost from log I/O. A bare app without middleware is the baseline.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+import structlog
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core import logging as logging_utils
+from app.core.middleware import RequestLoggingMiddleware
+
+
+class LegacyRequestIDMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope, receive=receive)
+        request_id = request.headers.get("x-request-id") or str(uuid.uuid4())
+        logging_utils.bind_request_context(request_id=request_id)
+
+        async def send_wrapper(message):
+            if message.get("type") == "http.response.start":
+                headers = message.setdefault("headers", [])
+                headers.append((b"x-request-id", request_id.encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            logging_utils.clear_request_context()
+
+
+async def legacy_log_requests(request: Request, call_next):
+    logger = structlog.get_logger().bind(path=request.url.path, method=request.method)
+    response = await call_next(request)
+    logger.info("request.complete", status_code=response.status_code)
+    return response
+
+
+def build_app(variant: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping() -> PlainTextResponse:
+        return PlainTextResponse("pong")
+
+    if variant == "before":
+        app.add_middleware(LegacyRequestIDMiddleware)
+        app.middleware("http")(legacy_log_requests)
+    elif variant == "after":
+        app.add_middleware(RequestLoggingMiddleware)
+    return app
+
+
+async def measure(app: FastAPI, requests: int) -> list:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(min(200, requests)):
+            await client.get("/ping")
+        samples = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            await client.get("/ping")
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    structlog.configure(
+        processors=[structlog.contextvars.merge_contextvars, structlog.processors.JSONRenderer()],
+        logger_factory=structlog.ReturnLoggerFactory(),
+        cache_logger_on_first_use=True,
+    )
+
+    results = {}
+    for variant in ("none", "before", "after"):
+        samples = asyncio.run(measure(build_app(variant), args.requests))
+        results[variant] = statistics.median(samples) * 1e6
+
+    print(f"{'variant':<8} {'median us/req':>14} {'overhead us':>12}")
+    for variant, median in results.items():
+        print(f"{variant:<8} {median:>14.1f} {median - results['none']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Per-item cost of serializing ``GET /todos`` bodies, before and after the row-tuple fast path.
+
+Usage: ``uv run python -m benchmarks.serialization [--sizes 1000 10000] [--repeat N]``
+
+"before" is the previous path: ORM ``Todo`` entities, validated into ``TodoRead``
+(``from_attributes``), encoded by FastAPI's ``jsonable_encoder`` and dumped with stdlib
+``json`` as ``JSONResponse`` does. "after" selects ``READ_COLUMNS`` as row tuples and encodes
+them with ``app.core.serialization`` (orjson when installed; "after-stdlib" shows the fallback).
+Fetching and encoding are timed separately against an in-memory SQLite database, so the
+numbers isolate per-item CPU cost from network and pool effects.
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, create_engine
+
+from app.core import serialization
+from app.models import Todo
+from app.schemas import TodoRead
+from app.services import imports
+from app.services.todos import READ_COLUMNS, READ_FIELDS
+
+
+def seed(session: Session, owner_id: str, size: int) -> None:
+    now = datetime.utcnow()
+    rows = [
+        (
+            str(uuid4()),
+            owner_id,
+            f"Todo {n}",
+            "Seeded for benchmarking" if n % 3 == 0 else None,
+            n % 4 == 0,
+            now - timedelta(seconds=n),
+            now - timedelta(seconds=n),
+            0,
+        )
+        for n in range(size)
+    ]
+    imports.write_todos(session, rows)
+    session.commit()
+
+
+def fetch_entities(session: Session, owner_id: str) -> List[Todo]:
+    todos = session.query(Todo).filter(Todo.owner_id == owner_id).order_by(Todo.created_at.desc()).all()
+    session.expunge_all()
+    return todos
+
+
+def fetch_rows(session: Session, owner_id: str) -> List[Any]:
+    statement = select(*READ_COLUMNS).where(Todo.owner_id == owner_id).order_by(Todo.created_at.desc())
+    return list(session.execute(statement).all())
+
+
+def encode_before(todos: List[Todo]) -> bytes:
+    content = jsonable_encoder([TodoRead.model_validate(todo) for todo in todos])
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def encode_after(rows: List[Any]) -> bytes:
+    return serialization.dumps(serialization.records(rows, READ_FIELDS))
+
+
+def encode_after_stdlib(rows: List[Any]) -> bytes:
+    orjson, serialization.orjson = serialization.orjson, None
+    try:
+        return encode_after(rows)
+    finally:
+        serialization.orjson = orjson
+
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> Tuple[float, float]:
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), statistics.median(timings)
+
+
+def run(size: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    owner_id = str(uuid4())
+    results: Dict[str, Dict[str, float]] = {}
+    with Session(engine) as session:
+        seed(session, owner_id, size)
+        todos = fetch_entities(session, owner_id)
+        rows = fetch_rows(session, owner_id)
+        assert json.loads(encode_before(todos)) == json.loads(encode_after(rows))
+
+        variants = {
+            "before": (lambda: fetch_entities(session, owner_id), lambda: encode_before(todos)),
+            "after": (lambda: fetch_rows(session, owner_id), lambda: encode_after(rows)),
+            "after-stdlib": (lambda: fetch_rows(session, owner_id), lambda: encode_after_stdlib(rows)),
+        }
+        for name, (fetch, encode) in variants.items():
+            fetch_best, _ = best_of(repeat, fetch)
+            encode_best, encode_median = best_of(repeat, encode)
+            results[name] = {
+                "fetch_us_per_item": fetch_best / size * 1e6,
+                "encode_us_per_item": encode_best / size * 1e6,
+                "encode_median_us_per_item": encode_median / size * 1e6,
+                "total_us_per_item": (fetch_best + encode_best) / size * 1e6,
+            }
+    engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"orjson: {'yes' if serialization.orjson is not None else 'no'}")
+    print(f"{'items':>6}  {'variant':<13} {'fetch µs/item':>14} {'encode µs/item':>15} {'total µs/item':>14}")
+    for size in args.sizes:
+        results = run(size, args.repeat)
+        for name, stats in results.items():
+            print(
+                f"{size:>6}  {name:<13} {stats['fetch_us_per_item']:>14.2f} "
+                f"{stats['encode_us_per_item']:>15.2f} {stats['total_us_per_item']:>14.2f}"
+            )
+        speedup = results["before"]["total_us_per_item"] / results["after"]["total_us_per_item"]
+        print(f"{size:>6}  speed-up (before / after): {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
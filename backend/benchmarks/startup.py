@@ -0,0 +1,139 @@
+"""Cold start budget: import time, lifespan startup and first responses of a fresh process.
+
+Usage: ``uv run python -m benchmarks.startup [--runs N] [--budget-ms MS]``
+
+Each run starts a new interpreter under ``python -X importtime`` that imports ``app.main``,
+runs the lifespan startup, then sends ``GET /healthz`` and ``GET /openapi.json`` in process.
+Runs alternate between generating the OpenAPI schema and serving one precomputed by
+``scripts.export_openapi`` (``OPENAPI_SCHEMA_PATH``). Medians are printed along with the
+top-level packages that cost the most import time. With ``--budget-ms`` the exit status is
+1 when the median import of ``app.main`` exceeds the budget, so CI can hold the line.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PHASES = ("import_ms", "startup_ms", "first_request_ms", "openapi_ms")
+TOP_PACKAGES = 12
+
+
+async def _measure_app() -> Dict[str, float]:
+    start = time.perf_counter()
+    from app.main import app
+
+    timings = {"import_ms": time.perf_counter() - start}
+
+    import httpx
+
+    messages: asyncio.Queue = asyncio.Queue()
+    replies: asyncio.Queue = asyncio.Queue()
+    lifespan = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}}, messages.get, replies.put))
+
+    start = time.perf_counter()
+    await messages.put({"type": "lifespan.startup"})
+    assert (await replies.get())["type"] == "lifespan.startup.complete"
+    timings["startup_ms"] = time.perf_counter() - start
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for phase, path in (("first_request_ms", "/healthz"), ("openapi_ms", "/openapi.json")):
+            start = time.perf_counter()
+            (await client.get(path)).raise_for_status()
+            timings[phase] = time.perf_counter() - start
+
+    await messages.put({"type": "lifespan.shutdown"})
+    await replies.get()
+    await lifespan
+    return {phase: seconds * 1000 for phase, seconds in timings.items()}
+
+
+def child() -> None:
+    print(json.dumps(asyncio.run(_measure_app())))
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """``{module: (self_us, cumulative_us)}`` from ``-X importtime`` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run_once(env: Dict[str, str]) -> Tuple[Dict[str, float], Dict[str, Tuple[int, int]]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "benchmarks.startup", "--child"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, help="fail when the median app.main import exceeds this")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    workdir = Path(tempfile.mkdtemp(prefix="startup-bench-"))
+    env = {
+        **os.environ,
+        "DATABASE_URL": os.environ.get("DATABASE_URL", f"sqlite:///{workdir}/bench.db"),
+        "JWT_SECRET": os.environ.get("JWT_SECRET", "startup-benchmark"),
+        "LOG_LEVEL": "WARNING",
+    }
+    env.pop("OPENAPI_SCHEMA_PATH", None)
+    schema = workdir / "openapi.json"
+    export = [sys.executable, "-m", "scripts.export_openapi", str(schema)]
+    subprocess.run(export, env=env, check=True, capture_output=True)
+    variants = {"generated": env, "precomputed": {**env, "OPENAPI_SCHEMA_PATH": str(schema)}}
+
+    timings: Dict[str, List[Dict[str, float]]] = defaultdict(list)
+    package_self_us: Dict[str, List[int]] = defaultdict(list)
+    for _ in range(args.runs):
+        for variant, variant_env in variants.items():
+            phases, modules = run_once(variant_env)
+            timings[variant].append(phases)
+            if variant == "generated":
+                per_package: Dict[str, int] = defaultdict(int)
+                for name, (self_us, _) in modules.items():
+                    per_package[name.split(".")[0]] += self_us
+                for package, self_us in per_package.items():
+                    package_self_us[package].append(self_us)
+
+    print(f"median of {args.runs} runs (ms)")
+    print(f"{'openapi':<12} " + " ".join(f"{phase:>17}" for phase in PHASES))
+    for variant, runs in timings.items():
+        print(f"{variant:<12} " + " ".join(f"{statistics.median(run[p] for run in runs):>17.1f}" for p in PHASES))
+
+    print(f"\nimport time by top-level package (self, median ms; top {TOP_PACKAGES})")
+    ranked = sorted(package_self_us.items(), key=lambda item: -statistics.median(item[1]))
+    for package, samples in ranked[:TOP_PACKAGES]:
+        print(f"  {package:<24} {statistics.median(samples) / 1000:>8.1f}")
+
+    import_ms = statistics.median(run["import_ms"] for runs in timings.values() for run in runs)
+    if args.budget_ms is not None:
+        verdict = "within" if import_ms <= args.budget_ms else "over"
+        print(f"\napp.main import {import_ms:.1f} ms, {verdict} the {args.budget_ms:.0f} ms budget")
+        if import_ms > args.budget_ms:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""Write the OpenAPI schema to a file, for ``OPENAPI_SCHEMA_PATH``.
+
+    uv run python -m scripts.export_openapi openapi.json
+
+The Docker build runs this so replicas serve the file instead of generating the schema on
+the first /docs or /openapi.json request after a cold start.
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the OpenAPI schema as JSON.")
+    parser.add_argument("path", help="output file")
+    args = parser.parse_args()
+
+    # Generate the schema, never load a stale precomputed one.
+    os.environ.pop("OPENAPI_SCHEMA_PATH", None)
+    from app.main import app
+
+    Path(args.path).write_text(json.dumps(app.openapi(), separators=(",", ":")))
+    print(f"wrote {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Import todos for one user from an NDJSON or CSV file.
+
+    uv run python -m scripts.import_todos todos.ndjson --email user@example.com
+    uv run python -m scripts.import_todos - --email user@example.com --format csv < todos.csv
+
+Uses the same parser and COPY/executemany writer as ``POST /todos/import`` and reports
+progress and throughput on stderr.
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from app.core.config import get_settings
+from app.db.session import session_scope
+from app.services import imports, users
+
+CHUNK_BYTES = 1024 * 1024
+
+
+def read_chunks(stream: BinaryIO) -> Iterator[bytes]:
+    while chunk := stream.read(CHUNK_BYTES):
+        yield chunk
+
+
+def report(rows: int, elapsed: float) -> None:
+    print(f"\r{rows:,} rows  {rows / elapsed:,.0f} rows/s", end="", file=sys.stderr, flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import todos from NDJSON or CSV.")
+    parser.add_argument("path", help="input file, or - for stdin")
+    parser.add_argument("--email", required=True, help="owner of the imported todos")
+    parser.add_argument("--format", choices=imports.FORMATS, help="defaults from the file extension")
+    parser.add_argument("--batch-size", type=int, default=get_settings().import_batch_size)
+    args = parser.parse_args()
+
+    fmt = args.format or {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}.get(Path(args.path).suffix)
+    if fmt is None:
+        parser.error("cannot infer the format; pass --format")
+
+    stream = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+    with stream, session_scope() as session:
+        owner = users.get_user_by_email(session, args.email)
+        if owner is None:
+            parser.error(f"no user with email {args.email}")
+        try:
+            result = imports.import_todos(
+                session, owner.id, read_chunks(stream), fmt, batch_size=args.batch_size, progress=report
+            )
+        except imports.ImportFormatError as exc:
+            print(f"\nimport failed: {exc}", file=sys.stderr)
+            sys.exit(1)
+
+    print(f"\nimported {result.imported:,} todos, skipped {result.skipped:,}", file=sys.stderr)
+    for error in result.errors:
+        print(f"  line {error.line}: {error.detail}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
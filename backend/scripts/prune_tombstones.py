@@ -0,0 +1,26 @@
+"""Forget deleted todos older than ``SYNC_TOMBSTONE_RETENTION_DAYS``; run it daily.
+
+    uv run python -m scripts.prune_tombstones
+
+``GET /todos/changes`` refuses sync tokens older than the retention period, so clients that
+could still need a pruned tombstone are sent back to a full sync instead.
+"""
+from datetime import datetime, timedelta
+
+from app.core.config import get_settings
+from app.db.session import session_scope
+from app.services import todos
+
+# Headroom for deletions committed just after the sync that issued a token.
+SLACK = timedelta(hours=1)
+
+
+def main() -> None:
+    retention = timedelta(days=get_settings().sync_tombstone_retention_days)
+    with session_scope() as session:
+        pruned = todos.prune_tombstones(session, datetime.utcnow() - retention - SLACK)
+    print(f"pruned {pruned:,} tombstones")
+
+
+if __name__ == "__main__":
+    main()
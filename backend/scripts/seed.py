@@ -1,8 +1,27 @@
-"""Seed script to create a demo user and todos."""
+"""Seed script to create a demo user and todos.
+
+Without arguments, creates ``demo@example.com`` if the database is empty. With ``--users``
+it bulk-generates ``N`` users x ``M`` todos for load testing (see also ``scripts.import_todos``
+for loading real data):
+
+    uv run python -m scripts.seed --users 1000 --todos 200
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import List, Tuple
+from uuid import uuid4
+
+from sqlalchemy.orm import Session
+
 from app.db.session import session_scope
 from app.models import Todo, User
+from app.services import imports
 from app.services.security import get_password_hash
 
+BULK_PASSWORD = "bench-password"
+CHUNK_SIZE = 5_000
+
 
 def run() -> None:
     with session_scope() as session:
@@ -25,5 +44,81 @@ def run() -> None:
             print("Users already exist; skipping seed")
 
 
+USER_COLUMNS = ("id", "email", "full_name", "password_hash", "is_active", "todos_version", "created_at", "updated_at")
+
+
+def seed_bulk(
+    session: Session,
+    users: int,
+    todos_per_user: int,
+    *,
+    password: str = BULK_PASSWORD,
+    email_prefix: str = "bench",
+) -> List[Tuple[str, str]]:
+    """Insert ``users`` users with ``todos_per_user`` todos each; returns their ``(id, email)``.
+
+    Every user shares one pre-computed password hash (hashing is the slow part), and rows are
+    generated and written ``CHUNK_SIZE`` at a time through ``imports.copy_rows`` (COPY on
+    PostgreSQL), so memory does not grow with the data set. Each user's todos get distinct
+    ``created_at`` values so keyset pagination has a realistic spread.
+    """
+    password_hash = get_password_hash(password)
+    now = datetime.utcnow()
+    run_id = uuid4().hex[:8]
+    created: List[Tuple[str, str]] = []
+
+    for first in range(0, users, CHUNK_SIZE):
+        user_rows = [
+            (
+                str(uuid4()),
+                f"{email_prefix}-{run_id}-{n}@example.com",
+                f"Bench User {n}",
+                password_hash,
+                True,
+                0,
+                now,
+                now,
+            )
+            for n in range(first, min(first + CHUNK_SIZE, users))
+        ]
+        imports.copy_rows(session, "users", USER_COLUMNS, user_rows)
+        created.extend((row[0], row[1]) for row in user_rows)
+
+        todo_rows: List[tuple] = []
+        for user_id, *_ in user_rows:
+            for n in range(todos_per_user):
+                created_at = now - timedelta(seconds=n)
+                description = "Seeded for benchmarking" if n % 3 == 0 else None
+                todo_rows.append(
+                    (str(uuid4()), user_id, f"Todo {n}", description, n % 4 == 0, created_at, created_at, 0)
+                )
+                if len(todo_rows) >= CHUNK_SIZE:
+                    imports.write_todos(session, todo_rows)
+                    todo_rows = []
+        imports.write_todos(session, todo_rows)
+    return created
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed demo or benchmark data.")
+    parser.add_argument("--users", type=int, help="bulk-generate this many users")
+    parser.add_argument("--todos", type=int, default=100, help="todos per generated user")
+    parser.add_argument("--password", default=BULK_PASSWORD)
+    args = parser.parse_args()
+
+    if args.users is None:
+        run()
+        return
+
+    start = time.perf_counter()
+    with session_scope() as session:
+        seed_bulk(session, args.users, args.todos, password=args.password)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Seeded {args.users} users x {args.todos} todos in {elapsed:.1f}s "
+        f"({args.users * args.todos / elapsed:,.0f} todos/s); password {args.password!r}"
+    )
+
+
 if __name__ == "__main__":
-    run()
+    main()
@@ -1,18 +1,23 @@
 import os
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
 from sqlmodel import SQLModel
 
 from app.api import deps
 from app.core.config import reset_settings_cache
-from app.db.session import get_db
+from app.db.instrumentation import instrument_engine
+from app.db.session import get_async_db, get_db, reset_replicas
 from app.main import app
+from app.services import events, hashing, principals, ratelimit, readiness
 
 TEST_DB_URL = "sqlite:///./test.db"
+TEST_ASYNC_DB_URL = "sqlite+aiosqlite:///./test.db"
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -21,19 +26,29 @@ def _setup_env() -> Generator[None, None, None]:
     os.environ.setdefault("JWT_SECRET", "test-secret")
     os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
     os.environ.setdefault("CORS_ORIGINS", "http://testserver")
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
     reset_settings_cache()
     yield
+    hashing.shutdown()
     reset_settings_cache()
 
 
 @pytest.fixture(scope="session")
 def engine() -> Generator:
-    engine = create_engine(TEST_DB_URL, connect_args={"check_same_thread": False})
+    engine = instrument_engine(create_engine(TEST_DB_URL, connect_args={"check_same_thread": False}))
     SQLModel.metadata.create_all(engine)
     yield engine
     SQLModel.metadata.drop_all(engine)
 
 
+@pytest.fixture(scope="session")
+def async_engine(engine):
+    # TestClient runs each request on a fresh event loop, so connections must not be pooled.
+    async_engine = create_async_engine(TEST_ASYNC_DB_URL, poolclass=NullPool)
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
+
+
 @pytest.fixture()
 def db_session(engine) -> Generator[Session, None, None]:
     TestingSessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
@@ -42,13 +57,52 @@ def db_session(engine) -> Generator[Session, None, None]:
         yield session
     finally:
         session.close()
+        with engine.begin() as connection:
+            for table in reversed(SQLModel.metadata.sorted_tables):
+                connection.execute(table.delete())
+
+
+@pytest.fixture(params=["sync", "async"])
+def db_mode(request) -> str:
+    return request.param
 
 
 @pytest.fixture()
-def client(db_session: Session) -> Generator[TestClient, None, None]:
-    def override_get_db():
-        yield db_session
+def client(db_mode: str, db_session: Session, async_engine) -> Generator[TestClient, None, None]:
+    if db_mode == "async":
+
+        async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+            async with AsyncSession(async_engine, autoflush=False, expire_on_commit=False) as session:
+                yield session
+
+    else:
 
-    app.dependency_overrides[get_db] = override_get_db
+        def override_get_db():
+            yield db_session
+
+    overridden = (get_db, get_async_db, deps.get_session, deps.get_async_session)
+    for dependency in overridden:
+        app.dependency_overrides[dependency] = override_get_db
     yield TestClient(app)
-    app.dependency_overrides.pop(get_db, None)
+    for dependency in overridden:
+        app.dependency_overrides.pop(dependency, None)
+    principals.reset()
+    events.reset()
+    ratelimit.reset()
+    readiness.reset()
+    reset_replicas()
+
+
+@pytest.fixture()
+def statements(engine, async_engine) -> Generator[list, None, None]:
+    """SQL statements sent to the test database (sync or async) while the test runs."""
+    executed: list = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        executed.append(statement)
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", record)
+    yield executed
+    for target in (engine, async_engine.sync_engine):
+        event.remove(target, "before_cursor_execute", record)
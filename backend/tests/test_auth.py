@@ -38,3 +38,121 @@ def test_login_fails_for_bad_password(client):
         headers={"Content-Type": "application/x-www-form-urlencoded"},
     )
     assert resp.status_code == 401
+
+
+def test_login_rehashes_when_cost_changes(client, db_session, monkeypatch, statements):
+    from app.core.config import get_settings
+    from app.models import User
+
+    payload = {"email": "rehash@example.com", "full_name": "Rehash", "password": "password123"}
+    client.post("/auth/register", json=payload)
+    original = db_session.query(User).filter(User.email == payload["email"]).one().password_hash
+    assert original.startswith("$2b$04$")
+
+    monkeypatch.setattr(get_settings(), "bcrypt_rounds", 5)
+    statements.clear()
+    resp = client.post(
+        "/auth/token",
+        data={"username": payload["email"], "password": payload["password"]},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert resp.status_code == 200
+    # The lookup by email, then the upgrade; the user is not reloaded afterwards.
+    assert [statement.split(None, 1)[0] for statement in statements] == ["SELECT", "UPDATE"]
+
+    db_session.expire_all()
+    upgraded = db_session.query(User).filter(User.email == payload["email"]).one().password_hash
+    assert upgraded.startswith("$2b$05$")
+
+
+def test_register_sheds_load_when_hash_queue_full(client, monkeypatch):
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "password_hash_max_pending", 0)
+    resp = client.post(
+        "/auth/register",
+        json={"email": "busy@example.com", "full_name": "Busy", "password": "password123"},
+    )
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "1"
+
+
+def _register_and_login(client, email):
+    payload = {"email": email, "full_name": "Cached User", "password": "password123"}
+    client.post("/auth/register", json=payload)
+    resp = client.post(
+        "/auth/token",
+        data={"username": email, "password": payload["password"]},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def _fail_user_lookup(*args, **kwargs):
+    raise AssertionError("principal should have been served without a database lookup")
+
+
+def test_current_user_is_served_from_principal_cache(client, monkeypatch):
+    from app.services import users
+
+    headers = _register_and_login(client, "cached@example.com")
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    monkeypatch.setattr(users, "get_user", _fail_user_lookup)
+    resp = client.get("/auth/me", headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["email"] == "cached@example.com"
+
+
+def test_deactivation_invalidates_cached_principal(client, db_session):
+    from app.models import User
+
+    headers = _register_and_login(client, "deactivate@example.com")
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    user = db_session.query(User).filter(User.email == "deactivate@example.com").one()
+    user.is_active = False
+    db_session.commit()
+
+    assert client.get("/auth/me", headers=headers).status_code == 400
+    assert client.get("/todos", headers=headers).status_code == 400
+
+
+def test_embedded_active_claim_skips_user_lookup(client, monkeypatch):
+    from app.core.config import get_settings
+    from app.services import users
+
+    monkeypatch.setattr(get_settings(), "jwt_embed_active", True)
+    headers = _register_and_login(client, "embedded@example.com")
+
+    monkeypatch.setattr(users, "get_user", _fail_user_lookup)
+    assert client.get("/todos", headers=headers).status_code == 200
+
+
+def test_deactivation_is_enforced_without_principal_caches(client, db_session, monkeypatch):
+    from app.core.config import get_settings
+    from app.models import User
+
+    monkeypatch.setattr(get_settings(), "jwt_embed_active", True)
+    monkeypatch.setattr(get_settings(), "principal_cache_size", 0)
+    headers = _register_and_login(client, "uncached@example.com")
+    assert client.get("/todos", headers=headers).status_code == 200
+
+    user = db_session.query(User).filter(User.email == "uncached@example.com").one()
+    user.is_active = False
+    db_session.commit()
+
+    # The token still claims ``act``; only the deactivation list stands in its way.
+    assert client.get("/todos", headers=headers).status_code == 400
+
+
+def test_register_is_lookup_plus_insert(client, statements):
+    resp = client.post(
+        "/auth/register",
+        json={"email": "returning@example.com", "full_name": "Returning", "password": "password123"},
+    )
+    assert resp.status_code == 201
+    assert resp.json()["email"] == "returning@example.com"
+    # The duplicate-email lookup and one INSERT ... RETURNING; no refresh after commit.
+    assert [statement.split(None, 1)[0] for statement in statements] == ["SELECT", "INSERT"]
+    assert "RETURNING" in statements[1]
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import zlib
+
+import pytest
+from fastapi.responses import Response, StreamingResponse
+
+from app.core import compression
+from app.core.middleware import CompressionMiddleware
+from tests.test_todos import create_user_and_token
+
+CHUNK = json.dumps([{"title": f"Todo {n}", "is_completed": False} for n in range(100)]).encode()
+
+
+def _decompressor(encoding):
+    if encoding == "gzip":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress
+    if encoding == "br":
+        return compression.brotli.Decompressor().process
+    return compression.zstandard.ZstdDecompressor().decompressobj().decompress
+
+
+def _run(response, accept_encoding="gzip", method="GET"):
+    """ASGI messages sent by ``CompressionMiddleware`` around an app answering with ``response``."""
+    sent = []
+    scope = {"type": "http", "method": method, "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+
+    async def receive():
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(CompressionMiddleware(response)(scope, receive, send))
+    return sent[0], sent[1:]
+
+
+def _headers(start):
+    return {key.decode(): value.decode() for key, value in start["headers"]}
+
+
+def test_negotiate():
+    available = ("zstd", "br", "gzip")
+    assert compression.negotiate("gzip, deflate, br, zstd", available) == "zstd"
+    assert compression.negotiate("gzip;q=1.0, br;q=0.5", available) == "gzip"
+    assert compression.negotiate("*;q=0.1, zstd;q=0", available) == "br"
+    assert compression.negotiate("identity, gzip;q=0", available) is None
+    assert compression.negotiate("deflate", ("gzip",)) is None
+
+
+@pytest.mark.parametrize("encoding", compression.available_encodings())
+def test_streamed_chunks_are_flushed_as_they_arrive(encoding):
+    async def chunks():
+        for _ in range(3):
+            yield CHUNK
+
+    start, bodies = _run(StreamingResponse(chunks(), media_type="application/x-ndjson"), encoding)
+    headers = _headers(start)
+    assert headers["content-encoding"] == encoding and "content-length" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+
+    decompress = _decompressor(encoding)
+    # Every chunk decodes on arrival, without waiting for the rest of the stream.
+    assert [decompress(body["body"]) for body in bodies] == [CHUNK, CHUNK, CHUNK, b""]
+    assert sum(len(body["body"]) for body in bodies) < len(CHUNK)
+
+
+def test_exclusions():
+    start, bodies = _run(Response(CHUNK, media_type="application/json"), "identity")
+    assert "content-encoding" not in _headers(start) and _headers(start)["vary"] == "Accept-Encoding"
+
+    for response in (
+        Response(b"{}", media_type="application/json"),
+        Response(CHUNK, media_type="image/png"),
+        Response(CHUNK, media_type="application/json", headers={"Cache-Control": "no-transform"}),
+        StreamingResponse(iter([CHUNK]), media_type="text/event-stream"),
+    ):
+        start, bodies = _run(response)
+        assert "content-encoding" not in _headers(start)
+        assert b"".join(body["body"] for body in bodies) in (CHUNK, b"{}")
+
+    start, _ = _run(Response(CHUNK, media_type="application/json"), method="HEAD")
+    assert "content-encoding" not in _headers(start)
+
+
+def test_etag_is_weakened():
+    start, bodies = _run(Response(CHUNK, media_type="application/json", headers={"ETag": '"abc"'}))
+    headers = _headers(start)
+    assert headers["etag"] == 'W/"abc"' and int(headers["content-length"]) == len(bodies[0]["body"])
+
+
+def test_todo_list_is_compressed(client):
+    headers = {"Authorization": f"Bearer {create_user_and_token(client, email='gzip@example.com')}"}
+    batch = {"operations": [{"op": "create", "data": {"title": f"Todo {n}"}} for n in range(50)]}
+    client.post("/todos/batch", json=batch, headers=headers)
+
+    resp = client.get("/todos", params={"limit": 100}, headers={**headers, "Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert int(resp.headers["content-length"]) < len(resp.content)
+    assert len(resp.json()) == 50
+
+    assert "content-encoding" not in client.get("/healthz", headers={"Accept-Encoding": "gzip"}).headers
@@ -0,0 +1,129 @@
+import asyncio
+import json
+from typing import List
+
+from sqlalchemy import text
+
+from app.services import events
+from app.services.events import EventHub, TodoEvent, _notify_payloads
+from tests.test_todos import create_user_and_token
+
+
+def make_event(event_id: int, owner_id: str = "u1", kind: str = "updated") -> TodoEvent:
+    return TodoEvent(event_id, owner_id, kind, f"todo-{event_id}", {"id": f"todo-{event_id}"})
+
+
+def parse_frame(frame: str) -> dict:
+    fields = dict(line.split(": ", 1) for line in frame.strip().splitlines() if not line.startswith(":"))
+    if "data" in fields:
+        fields["data"] = json.loads(fields["data"])
+    return fields
+
+
+def test_replay_returns_events_after_id():
+    hub = EventHub(replay_size=10, replay_ttl=60)
+    hub.dispatch([make_event(1), make_event(2), make_event(3)])
+    assert [e.id for e in hub.replay("u1", 1)] == [2, 3]
+    assert hub.replay("u1", 3) == []
+
+
+def test_replay_reports_gap_once_buffer_has_rolled_over():
+    hub = EventHub(replay_size=2, replay_ttl=60)
+    hub.dispatch([make_event(1), make_event(2), make_event(3)])
+    assert hub.replay("u1", 0) is None
+    assert [e.id for e in hub.replay("u1", 1)] == [2, 3]
+    assert hub.replay("unknown", 0) is None
+
+
+def test_out_of_order_dispatch_keeps_buffer_sorted():
+    hub = EventHub(replay_size=10, replay_ttl=60)
+    hub.dispatch([make_event(2)])
+    hub.dispatch([make_event(1)])
+    assert [e.id for e in hub.replay("u1", 0)] == [1, 2]
+
+
+def test_notify_payloads_stay_under_limit():
+    big = TodoEvent(1, "u1", "created", "t1", {"id": "t1", "description": "x" * 10_000})
+    payloads = list(_notify_payloads([big] + [make_event(i) for i in range(2, 200)]))
+    assert all(len(payload.encode()) <= events.MAX_NOTIFY_PAYLOAD for payload in payloads)
+    decoded = [item for payload in payloads for item in json.loads(payload)]
+    assert decoded[0]["todo"] is None
+    assert [item["id"] for item in decoded] == list(range(1, 200))
+
+
+async def collect(stream, count: int) -> List[dict]:
+    frames = []
+    async for frame in stream:
+        if frame.startswith("retry:"):
+            continue
+        frames.append(parse_frame(frame))
+        if len(frames) == count:
+            break
+    await stream.aclose()
+    return frames
+
+
+async def test_stream_replays_missed_events_then_follows_live_ones():
+    hub = EventHub(replay_size=10, replay_ttl=60)
+    hub.dispatch([make_event(1), make_event(2, kind="created"), make_event(3, kind="deleted")])
+
+    stream = events.stream(hub, "u1", version=3, last_event_id=1, keepalive=5)
+    first = await stream.__anext__()
+    assert first.startswith("retry:")
+    replayed = [parse_frame(await stream.__anext__()) for _ in range(2)]
+    assert [(f["id"], f["event"]) for f in replayed] == [("2", "created"), ("3", "deleted")]
+
+    hub.dispatch([make_event(4)])
+    live = parse_frame(await asyncio.wait_for(stream.__anext__(), 1))
+    assert (live["id"], live["event"], live["data"]) == ("4", "updated", {"id": "todo-4"})
+    await stream.aclose()
+    assert hub.subscriber_count() == 0
+
+
+async def test_stream_asks_for_resync_when_gap_cannot_be_replayed():
+    hub = EventHub(replay_size=1, replay_ttl=60)
+    hub.dispatch([make_event(5), make_event(6)])
+    frames = await collect(events.stream(hub, "u1", version=6, last_event_id=2, keepalive=5), 1)
+    assert frames[0]["event"] == "resync"
+    assert frames[0]["id"] == "6"
+
+
+async def test_fresh_stream_starts_with_ready_and_sends_keepalives():
+    hub = EventHub(replay_size=10, replay_ttl=60)
+    stream = events.stream(hub, "u1", version=7, last_event_id=None, keepalive=0.01)
+    await stream.__anext__()
+    assert parse_frame(await stream.__anext__()) == {"id": "7", "event": "ready", "data": {"version": 7}}
+    assert await stream.__anext__() == ": keepalive\n\n"
+    await stream.aclose()
+
+
+def test_writes_publish_events_with_collection_versions(client):
+    token = create_user_and_token(client, email="events@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    user_id = client.get("/auth/me", headers=headers).json()["id"]
+
+    todo = client.post("/todos", json={"title": "Stream me"}, headers=headers).json()
+    client.patch(f"/todos/{todo['id']}", json={"is_completed": True}, headers=headers)
+    client.post(
+        "/todos/batch",
+        json={"operations": [{"op": "create", "data": {"title": "Two"}}, {"op": "delete", "id": todo["id"]}]},
+        headers=headers,
+    )
+
+    published = events.get_hub().replay(user_id, 0)
+    assert [(e.id, e.type) for e in published] == [(1, "created"), (2, "updated"), (3, "created"), (4, "deleted")]
+    assert published[0].todo["title"] == "Stream me"
+    assert published[1].todo["is_completed"] is True
+    assert published[3].todo_id == todo["id"]
+
+
+def test_rolled_back_writes_are_not_published(db_session):
+    db_session.execute(text("SELECT 1"))
+    db_session.info.setdefault(events._PENDING_KEY, []).append(make_event(1, owner_id="rolled-back"))
+    db_session.rollback()
+    db_session.commit()
+    assert events.get_hub().replay("rolled-back", 0) is None
+
+
+def test_stream_requires_authentication(client):
+    assert client.get("/todos/stream").status_code == 401
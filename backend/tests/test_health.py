@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import get_settings
+from app.services import hashing, readiness
+from tests.test_replicas import FakeClock
+
+
+def test_liveness_and_readiness(client):
+    assert client.get("/healthz").json() == {"status": "ok"}
+    assert client.get("/healthz/live").status_code == 200
+
+    resp = client.get("/healthz/ready")
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert body["status"] == "ready"
+    assert set(body["checks"]) == {"database", "pool", "event_loop", "hashing"}
+    assert all(check["ok"] for check in body["checks"].values())
+
+
+@pytest.mark.parametrize(
+    "check, overload",
+    [
+        ("pool", lambda monkeypatch: monkeypatch.setattr(readiness, "pool_utilization", lambda: 1.0)),
+        (
+            "hashing",
+            lambda monkeypatch: monkeypatch.setattr(hashing, "_pending", get_settings().password_hash_max_pending),
+        ),
+        ("event_loop", lambda monkeypatch: readiness.get_monitor().observe(0.5)),
+    ],
+)
+def test_overload_fails_readiness_but_not_liveness(client, monkeypatch, check, overload):
+    overload(monkeypatch)
+
+    resp = client.get("/healthz/ready")
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "1"
+    assert [name for name, result in resp.json()["checks"].items() if not result["ok"]] == [check]
+    assert client.get("/healthz").status_code == 200
+
+
+def test_pool_stats_need_the_profiling_token(client, monkeypatch):
+    assert client.get("/healthz/pool").status_code == 404
+
+    monkeypatch.setattr(get_settings(), "profiling_token", "pool-secret")
+    assert client.get("/healthz/pool", headers={"X-Profile-Token": "guess"}).status_code == 404
+    resp = client.get("/healthz/pool", headers={"X-Profile-Token": "pool-secret"})
+    assert resp.status_code == 200 and "checkouts" in resp.json()
+
+
+def test_database_probe_is_cached(monkeypatch):
+    calls = []
+
+    def select_one():
+        calls.append(1)
+        if len(calls) == 2:
+            raise ConnectionError("database is down")
+
+    monkeypatch.setattr(readiness, "_select_one", select_one)
+    clock = FakeClock()
+    probe = readiness.DatabaseProbe(interval=5.0, timeout=1.0, clock=clock)
+
+    async def scenario():
+        results = [await probe.check(use_async=False)]
+        clock.now += 4
+        results.append(await probe.check(use_async=False))
+        clock.now += 1
+        results.append(await probe.check(use_async=False))
+        return results
+
+    first, cached, failed = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert first.ok and cached.ok and cached.detail["age_seconds"] == 4
+    assert not failed.ok and failed.detail["error"] == "ConnectionError"
+
+
+def test_loop_lag_monitor_sees_a_blocked_loop():
+    monitor = readiness.LoopLagMonitor(interval=0.01)
+
+    async def scenario():
+        await monitor.start()
+        await asyncio.sleep(0.05)
+        time.sleep(0.2)  # a long GC pause or a bcrypt call on the event loop
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+    assert monitor.lag >= 0.15
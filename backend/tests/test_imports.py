@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+from app.core.config import get_settings
+from app.services.imports import ImportFormatError, TodoImportParser
+from tests.test_todos import create_user_and_token
+
+
+def parse_in_chunks(fmt: str, body: bytes, size: int):
+    parser = TodoImportParser(fmt, "owner")
+    rows = []
+    for start in range(0, len(body), size):
+        rows.extend(parser.feed(body[start : start + size]))
+    rows.extend(parser.close())
+    return parser, rows
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_ndjson_parsing_is_independent_of_chunk_boundaries(chunk_size):
+    body = b'{"title": "One"}\n{"title": "Two", "is_completed": true}\n\n{"title": "Three"}'
+    parser, rows = parse_in_chunks("ndjson", body, chunk_size)
+    assert [row[2] for row in rows] == ["One", "Two", "Three"]
+    assert rows[1][4] is True
+    assert parser.skipped == 0
+
+
+def test_csv_handles_quoted_newlines_and_empty_cells():
+    body = (
+        b'title,description,is_completed,created_at\r\n'
+        b'"Multi\nline","Says ""hi""",true,2024-01-02T03:04:05+02:00\r\n'
+        b"Plain,,,\r\n"
+    )
+    parser, rows = parse_in_chunks("csv", body, 5)
+    assert [(row[2], row[3], row[4]) for row in rows] == [("Multi\nline", 'Says "hi"', True), ("Plain", None, False)]
+    assert rows[0][5].isoformat() == "2024-01-02T01:04:05"
+    assert rows[0][6] == rows[0][5]
+
+
+def test_invalid_rows_are_skipped_with_line_numbers():
+    body = b'{"title": "ok"}\nnot json\n{"description": "no title"}\n[1]\n'
+    parser, rows = parse_in_chunks("ndjson", body, 1024)
+    assert len(rows) == 1
+    assert parser.skipped == 3
+    assert [error.line for error in parser.errors] == [2, 3, 4]
+    assert "title" in parser.errors[1].detail
+
+
+def test_csv_without_title_column_is_rejected():
+    with pytest.raises(ImportFormatError):
+        parse_in_chunks("csv", b"name\nx\n", 1024)
+
+
+def test_import_endpoint_loads_ndjson_in_batches(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "import_batch_size", 3)
+    token = create_user_and_token(client, email="import@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    etag = client.get("/todos", headers=headers).headers["etag"]
+
+    body = "\n".join(json.dumps({"title": f"Imported {n}"}) for n in range(10)) + "\n{}\n"
+    resp = client.post("/todos/import", content=body, headers={**headers, "Content-Type": "application/x-ndjson"})
+    assert resp.status_code == 200
+    result = resp.json()
+    assert (result["imported"], result["skipped"]) == (10, 1)
+    assert result["errors"][0]["line"] == 11
+
+    listing = client.get("/todos", headers={**headers, "If-None-Match": etag})
+    assert listing.status_code == 200
+    assert len(listing.json()) == 10
+
+
+def test_import_endpoint_accepts_csv_via_query(client):
+    token = create_user_and_token(client, email="import-csv@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    resp = client.post("/todos/import?format=csv", content=b"title,is_completed\nA,true\nB,false\n", headers=headers)
+    assert resp.json()["imported"] == 2
+    todos = client.get("/todos", headers=headers).json()
+    assert {todo["title"]: todo["is_completed"] for todo in todos} == {"A": True, "B": False}
+
+
+def test_import_endpoint_rejects_unknown_content_type(client):
+    token = create_user_and_token(client, email="import-type@example.com")
+    resp = client.post("/todos/import", content=b"x", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 415
+
+
+def test_oversized_import_is_rolled_back(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "import_max_rows", 2)
+    monkeypatch.setattr(get_settings(), "import_batch_size", 1)
+    token = create_user_and_token(client, email="import-big@example.com")
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"}
+    body = b'{"title": "a"}\n{"title": "b"}\n{"title": "c"}\n'
+    assert client.post("/todos/import", content=body, headers=headers).status_code == 413
+    assert client.get("/todos", headers=headers).json() == []
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_export_round_trips_through_import(client, monkeypatch, fmt):
+    monkeypatch.setattr("app.api.routes.todos.EXPORT_PARTITION_SIZE", 2)
+    source = {"Authorization": f"Bearer {create_user_and_token(client, email=f'export-{fmt}@example.com')}"}
+    for n in range(5):
+        todo = {"title": f"Todo, {n}", "description": "line\nbreak" if n == 0 else None}
+        client.post("/todos", json=todo, headers=source)
+    newest = client.get("/todos", headers=source).json()[0]
+    client.patch(f"/todos/{newest['id']}", json={"is_completed": True}, headers=source)
+
+    exported = client.get(f"/todos/export?format={fmt}", headers=source)
+    assert exported.status_code == 200
+    assert exported.headers["content-disposition"] == f'attachment; filename="todos.{fmt}"'
+
+    target = {"Authorization": f"Bearer {create_user_and_token(client, email=f'export-target-{fmt}@example.com')}"}
+    result = client.post(f"/todos/import?format={fmt}", content=exported.content, headers=target).json()
+    assert (result["imported"], result["skipped"]) == (5, 0)
+
+    def strip(todos):
+        return [{key: todo[key] for key in ("title", "description", "is_completed", "created_at")} for todo in todos]
+
+    assert strip(client.get("/todos", headers=target).json()) == strip(client.get("/todos", headers=source).json())
+
+
+def test_export_streams_ndjson_with_read_fields(client):
+    headers = {"Authorization": f"Bearer {create_user_and_token(client, email='export-fields@example.com')}"}
+    created = client.post("/todos", json={"title": "Only"}, headers=headers).json()
+    lines = client.get("/todos/export", headers=headers).text.splitlines()
+    assert [json.loads(line) for line in lines] == [created]
@@ -0,0 +1,67 @@
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.db import instrumentation
+from app.db.instrumentation import start_request_stats, statement_shape
+from tests.test_todos import create_user_and_token
+
+
+class RecordingLogger:
+    def __init__(self) -> None:
+        self.events = []
+
+    def warning(self, event, **fields):
+        self.events.append((event, fields))
+
+
+def test_statement_shape_folds_parameters():
+    assert statement_shape("SELECT *\n  FROM todos WHERE id IN (?, ?, ?) AND owner_id = ?") == (
+        "SELECT * FROM todos WHERE id IN (?, ...) AND owner_id = ?"
+    )
+    assert statement_shape("INSERT INTO t (a, b) VALUES (%(a_m0)s, %(b_m0)s), (%(a_m1)s, %(b_m1)s)") == (
+        "INSERT INTO t (a, b) VALUES (?, ...), ..."
+    )
+    assert statement_shape("SELECT $1::text") == "SELECT ?::text"
+
+
+def test_repeated_statement_shapes_are_counted(engine):
+    stats = start_request_stats()
+    with engine.connect() as connection:
+        for value in range(3):
+            connection.execute(text("SELECT :value"), {"value": value})
+        connection.execute(text("SELECT 1, 2"))
+
+    assert stats.count == 4
+    assert stats.repeated(3) == [("SELECT ?", 3)]
+    assert stats.repeated(4) == []
+
+
+def test_slow_statements_are_logged_with_shape_and_request_id(client, monkeypatch):
+    recorder = RecordingLogger()
+    monkeypatch.setattr(instrumentation, "logger", recorder)
+    monkeypatch.setattr(get_settings(), "db_slow_query_ms", 0.000001)
+
+    client.get("/todos", headers={"X-Request-ID": "slow-1", "Authorization": "Bearer invalid"})
+    client.post(
+        "/auth/register",
+        json={"email": "slow@example.com", "full_name": "Slow", "password": "password123"},
+        headers={"X-Request-ID": "slow-2"},
+    )
+
+    assert recorder.events
+    event, fields = recorder.events[0]
+    assert event == "db.slow_query"
+    assert fields["request_id"] == "slow-2"
+    assert fields["statement"].startswith("SELECT users.")
+    assert "slow@example.com" not in fields["statement"]
+
+
+def test_server_timing_only_when_profiling(client, monkeypatch):
+    headers = {"Authorization": f"Bearer {create_user_and_token(client, email='timing@example.com')}"}
+    assert "server-timing" not in client.get("/todos", headers=headers).headers
+
+    monkeypatch.setattr(get_settings(), "debug_profiling", True)
+    timing = client.get("/todos", headers=headers).headers["server-timing"]
+    names = [entry.split(";")[0] for entry in timing.split(", ")]
+    assert names == ["db", "auth", "app"]
+    assert 'desc="2 queries"' in timing
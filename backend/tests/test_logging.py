@@ -0,0 +1,112 @@
+import io
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+
+import pytest
+import structlog
+
+from app.core import logging as logging_module
+from app.core.logging import BatchingLogWriter, QueuedHandler, sample_access_logs
+
+
+def test_writer_flushes_all_lines_on_close():
+    stream = io.StringIO()
+    writer = BatchingLogWriter(stream, max_queue=100)
+    for i in range(50):
+        writer.write(f"line {i}")
+    writer.close()
+
+    assert stream.getvalue().splitlines() == [f"line {i}" for i in range(50)]
+    assert writer.dropped == 0
+
+
+class BlockedStream(io.StringIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text: str) -> int:
+        self.release.wait(5)
+        return super().write(text)
+
+
+def test_writer_drops_lines_when_queue_is_full():
+    stream = BlockedStream()
+    writer = BatchingLogWriter(stream, max_queue=5, flush_interval=0.01)
+    for i in range(100):
+        writer.write(f"line {i}")
+    stream.release.set()
+    writer.close()
+
+    written = [line for line in stream.getvalue().splitlines() if line.startswith("line")]
+    assert writer.dropped > 0
+    assert len(written) + writer.dropped == 100
+    assert '"log.dropped"' in stream.getvalue()
+
+
+def test_close_gives_up_on_a_stuck_stream():
+    stream = BlockedStream()
+    writer = BatchingLogWriter(stream, max_queue=1, flush_interval=0.01)
+    for i in range(5):
+        writer.write(f"line {i}")
+
+    start = time.monotonic()
+    writer.close(timeout=0.1)
+    assert time.monotonic() - start < 1
+    stream.release.set()
+
+
+def test_lines_after_shutdown_are_written_synchronously(monkeypatch):
+    stream = io.StringIO()
+    writer = BatchingLogWriter(stream)
+    handler = QueuedHandler(writer)
+    root = logging.getLogger()
+    monkeypatch.setattr(logging_module, "_writer", writer)
+    monkeypatch.setattr(root, "handlers", [handler])
+
+    logging_module.flush_logging()
+    writer.write("cached structlog logger")
+    assert stream.getvalue() == "cached structlog logger\n"
+    assert [type(h) for h in root.handlers] == [logging.StreamHandler]
+
+
+def test_access_log_sampling_only_drops_healthy_requests():
+    processor = sample_access_logs(0.0)
+
+    with pytest.raises(structlog.DropEvent):
+        processor(None, "info", {"event": "request.complete", "status_code": 200})
+
+    for event in (
+        {"event": "request.complete", "status_code": 500},
+        {"event": "request.complete", "status_code": 404},
+        {"event": "todo.created", "status_code": 200},
+    ):
+        assert processor(None, "info", dict(event)) == event
+
+
+def test_access_log_sampling_keeps_configured_fraction():
+    rolls = iter([0.05, 0.5, 0.09, 0.95])
+    processor = sample_access_logs(0.1, rand=lambda: next(rolls))
+    kept = 0
+    for _ in range(4):
+        try:
+            processor(None, "info", {"event": "request.complete", "status_code": 204})
+            kept += 1
+        except structlog.DropEvent:
+            pass
+    assert kept == 2
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_renderer_serializes_with_and_without_orjson(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(logging_module, "orjson", None)
+    elif logging_module.orjson is None:
+        pytest.skip("orjson is not installed")
+    render = structlog.processors.JSONRenderer(serializer=logging_module._dumps)
+
+    line = render(None, "info", {"event": "todo.created", "at": datetime(2026, 1, 2)})
+    assert json.loads(line)["event"] == "todo.created" and "2026" in json.loads(line)["at"]
@@ -0,0 +1,39 @@
+from prometheus_client.parser import text_string_to_metric_families
+
+from tests.test_todos import create_user_and_token
+
+
+def _samples(client):
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(resp.text)
+        for sample in family.samples
+    }
+
+
+def test_metrics_record_route_templates_and_db_usage(client):
+    token = create_user_and_token(client, email="metrics@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    todo = client.post("/todos", json={"title": "Measured"}, headers=headers).json()
+    before = _samples(client)
+    client.patch(f"/todos/{todo['id']}", json={"is_completed": True}, headers=headers)
+    after = _samples(client)
+
+    request_key = (
+        "http_requests_total",
+        (("method", "PATCH"), ("route", "/todos/{todo_id}"), ("status", "200")),
+    )
+    assert after[request_key] == before.get(request_key, 0) + 1
+
+    queries_key = ("http_request_db_queries_sum", (("route", "/todos/{todo_id}"),))
+    assert after[queries_key] > before.get(queries_key, 0)
+
+
+def test_unmatched_paths_share_one_label(client):
+    client.get("/does-not-exist/123")
+    samples = _samples(client)
+    key = ("http_requests_total", (("method", "GET"), ("route", "<unmatched>"), ("status", "404")))
+    assert samples[key] >= 1
@@ -0,0 +1,12 @@
+def test_request_id_is_echoed(client):
+    resp = client.get("/healthz", headers={"X-Request-ID": "abc-123"})
+    assert resp.headers["x-request-id"] == "abc-123"
+
+
+def test_request_id_is_generated_when_missing_or_oversized(client):
+    generated = client.get("/healthz").headers["x-request-id"]
+    assert len(generated) == 36
+
+    resp = client.get("/healthz", headers={"X-Request-ID": "x" * 500})
+    assert resp.headers["x-request-id"] != "x" * 500
+    assert len(resp.headers["x-request-id"]) == 36
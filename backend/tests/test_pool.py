@@ -0,0 +1,40 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.core.config import Settings
+from app.db.pool import TimedQueuePool, checkout_stats, engine_options, pool_status
+
+
+def _settings(**overrides) -> Settings:
+    values = {"DATABASE_URL": "postgresql://todo:todo@db/todo", "JWT_SECRET": "secret", **overrides}
+    return Settings(**values)
+
+
+def test_engine_options_follow_settings():
+    options = engine_options(_settings(DB_POOL_SIZE=20, DB_MAX_OVERFLOW=0, DB_POOL_TIMEOUT=2, DB_POOL_RECYCLE=300))
+    assert options["poolclass"] is TimedQueuePool
+    assert (options["pool_size"], options["max_overflow"]) == (20, 0)
+    assert (options["pool_timeout"], options["pool_recycle"]) == (2, 300)
+
+
+def test_pgbouncer_mode_disables_pooling_and_prepared_statements():
+    options = engine_options(_settings(DB_PGBOUNCER=True))
+    assert options["poolclass"] is NullPool
+    assert options["connect_args"]["prepare_threshold"] is None
+    assert "pool_size" not in options
+
+
+def test_pool_status_reports_checkouts(tmp_path):
+    settings = _settings(DATABASE_URL=f"sqlite:///{tmp_path / 'pool.db'}", DB_POOL_SIZE=2, DB_MAX_OVERFLOW=1)
+    engine = create_engine(settings.database_url, **engine_options(settings))
+    checkout_stats.reset()
+    try:
+        with engine.connect() as first, engine.connect() as second, engine.connect() as third:
+            for connection in (first, second, third):
+                connection.execute(text("select 1"))
+            status = pool_status({"sync": engine.pool})
+        assert status["checkouts"] == 3
+        assert status["engines"][0]["checked_out"] == 3
+        assert status["engines"][0]["overflow"] == 1
+    finally:
+        engine.dispose()
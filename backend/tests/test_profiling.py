@@ -0,0 +1,61 @@
+import pytest
+
+from app.core import profiling
+from app.core.config import get_settings
+
+TOKEN = "profile-secret"
+
+
+@pytest.fixture()
+def profiling_enabled(monkeypatch):
+    monkeypatch.setattr(get_settings(), "profiling_token", TOKEN)
+
+
+def test_profiling_is_off_by_default(client):
+    resp = client.get("/healthz", headers={"X-Profile": "cprofile", "X-Profile-Token": TOKEN})
+    assert resp.json() == {"status": "ok"}
+    assert client.get("/debug/profile", headers={"X-Profile-Token": TOKEN}).status_code == 404
+
+
+def test_wrong_token_is_ignored(client, profiling_enabled):
+    resp = client.get("/healthz", headers={"X-Profile": "cprofile", "X-Profile-Token": "guess"})
+    assert resp.json() == {"status": "ok"}
+    assert client.get("/debug/profile?seconds=0.01", headers={"X-Profile-Token": "guess"}).status_code == 404
+
+
+def test_request_cprofile(client, profiling_enabled):
+    resp = client.get("/healthz", headers={"X-Profile": "cprofile", "X-Profile-Token": TOKEN})
+    assert resp.status_code == 200
+    assert resp.headers["x-profiled-status"] == "200"
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert "function calls" in resp.text
+    # Routing runs on the event loop; the sync endpoint itself runs in the threadpool.
+    assert "fastapi/routing.py" in resp.text
+
+
+def test_request_collapsed_stacks(client, profiling_enabled):
+    resp = client.get("/todos", headers={"X-Profile": "collapsed", "X-Profile-Token": TOKEN})
+    assert resp.headers["x-profiled-status"] == "401"
+    for line in resp.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert ";" in stack and int(count) > 0
+
+
+def test_unknown_mode_and_concurrent_profiles_are_rejected(client, profiling_enabled):
+    headers = {"X-Profile-Token": TOKEN}
+    assert client.get("/healthz", headers={**headers, "X-Profile": "flame"}).status_code == 400
+
+    profiling.claim()
+    try:
+        assert client.get("/healthz", headers={**headers, "X-Profile": "cprofile"}).status_code == 409
+        assert client.get("/debug/profile?seconds=0.01", headers=headers).status_code == 409
+    finally:
+        profiling.release()
+
+
+def test_process_sampling(client, profiling_enabled):
+    headers = {"X-Profile-Token": TOKEN}
+    resp = client.get("/debug/profile?seconds=0.1", headers=headers)
+    assert resp.status_code == 200
+    assert "MainThread;" in resp.text
+    assert client.get("/debug/profile?seconds=301", headers=headers).status_code == 400
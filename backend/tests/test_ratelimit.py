@@ -0,0 +1,165 @@
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from app.core.config import get_settings
+from app.main import app
+from app.models import RateLimitBucket
+from app.services import ratelimit
+from app.services.ratelimit import DatabaseBackend, MemoryBackend, Rate, parse_rate
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_parse_rate():
+    assert parse_rate("10/minute") == Rate(10, 60.0)
+    assert parse_rate(" 5 / Seconds ") == Rate(5, 1.0)
+    assert parse_rate("") is None
+    for invalid in ("10", "0/minute", "ten/minute", "10/fortnight"):
+        with pytest.raises(ValueError):
+            parse_rate(invalid)
+
+
+def _exercise_bucket(backend, clock):
+    rate = Rate(2, 60.0)
+    assert backend.take("k", rate) == 0
+    assert backend.take("k", rate) == 0
+    assert backend.take("k", rate) == pytest.approx(30.0)
+    # Other keys have their own budget.
+    assert backend.take("other", rate) == 0
+
+    clock.now += 15
+    assert backend.take("k", rate) == pytest.approx(15.0)
+    clock.now += 15
+    assert backend.take("k", rate) == 0
+    assert backend.take("k", rate) > 0
+
+
+def test_memory_backend_token_bucket():
+    clock = FakeClock()
+    _exercise_bucket(MemoryBackend(max_keys=10, clock=clock), clock)
+
+
+def test_memory_backend_sweeps_refilled_buckets_and_caps_keys():
+    clock = FakeClock()
+    backend = MemoryBackend(max_keys=3, clock=clock)
+    for key in "abcd":
+        backend.take(key, Rate(1, 1.0))
+    assert len(backend) == 3
+
+    clock.now += ratelimit.SWEEP_INTERVAL
+    backend.take("e", Rate(1, 3600.0))
+    # Everything but the hour-long bucket just touched has refilled and is dropped.
+    assert len(backend) == 1
+
+
+def test_database_backend_token_bucket(engine, db_session):
+    clock = FakeClock()
+    _exercise_bucket(DatabaseBackend(engine, max_idle=60.0, clock=clock), clock)
+
+
+def test_database_backend_sweeps_idle_rows(engine, db_session):
+    clock = FakeClock()
+    backend = DatabaseBackend(engine, max_idle=60.0, clock=clock)
+    backend.take("idle", Rate(1, 60.0))
+    clock.now += ratelimit.SWEEP_INTERVAL + 1
+    backend.take("busy", Rate(1, 60.0))
+    assert [bucket.key for bucket in db_session.query(RateLimitBucket)] == ["busy"]
+
+
+def _login(client):
+    return client.post(
+        "/auth/token",
+        data={"username": "nobody@example.com", "password": "wrong-password"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+
+
+def _rejections(rule):
+    return REGISTRY.get_sample_value("rate_limit_rejections_total", {"rule": rule}) or 0
+
+
+def test_login_is_limited_per_client_and_route(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "rate_limit_auth", "2/minute")
+    ratelimit.reset()
+    before = _rejections("auth")
+
+    assert [_login(client).status_code for _ in range(2)] == [401, 401]
+    resp = _login(client)
+    assert resp.status_code == 429
+    assert 1 <= int(resp.headers["retry-after"]) <= 30
+    assert _rejections("auth") == before + 1
+
+    # Registration has a bucket of its own, and reads are not limited.
+    register = client.post(
+        "/auth/register",
+        json={"email": "limited@example.com", "full_name": "Limited", "password": "password123"},
+    )
+    assert register.status_code == 201
+    assert client.get("/healthz").status_code == 200
+
+
+def _behind_ingress(asgi_app, ingress_ip="10.0.0.4"):
+    """``asgi_app`` as uvicorn runs it in the container: connections come from the ingress."""
+
+    async def from_ingress(scope, receive, send):
+        scope["client"] = (ingress_ip, 40000)
+        await asgi_app(scope, receive, send)
+
+    return TestClient(from_ingress)
+
+
+def test_login_limit_is_per_forwarded_client(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "rate_limit_auth", "1/minute")
+    ratelimit.reset()
+    proxied = _behind_ingress(ProxyHeadersMiddleware(app, trusted_hosts="10.0.0.0/23"))
+
+    def login(forwarded_for):
+        return proxied.post(
+            "/auth/token",
+            data={"username": "nobody@example.com", "password": "wrong-password"},
+            headers={"X-Forwarded-For": forwarded_for},
+        ).status_code
+
+    assert [login("203.0.113.1"), login("203.0.113.1"), login("203.0.113.2")] == [401, 429, 401]
+    # Entries the client wrote itself precede the one the ingress appended and change nothing.
+    assert login("198.51.100.7, 203.0.113.1") == 429
+    assert login("198.51.100.8, 203.0.113.2") == 429
+
+
+def test_writes_are_limited_per_user(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "rate_limit_writes", "2/minute")
+    ratelimit.reset()
+
+    def headers_for(email):
+        client.post("/auth/register", json={"email": email, "full_name": "Writer", "password": "password123"})
+        token = client.post(
+            "/auth/token",
+            data={"username": email, "password": "password123"},
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        ).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+
+    first, second = headers_for("writer-a@example.com"), headers_for("writer-b@example.com")
+    statuses = [client.post("/todos", json={"title": str(n)}, headers=first).status_code for n in range(3)]
+    assert statuses == [201, 201, 429]
+    assert client.get("/todos", headers=first).status_code == 200
+    assert client.post("/todos", json={"title": "other user"}, headers=second).status_code == 201
+
+
+def test_backend_errors_let_requests_through(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "rate_limit_auth", "1/minute")
+    ratelimit.reset()
+
+    async def broken(key, rate):
+        raise RuntimeError("backend down")
+
+    monkeypatch.setattr(ratelimit.get_limiter().backend, "acquire", broken)
+    assert [_login(client).status_code for _ in range(3)] == [401, 401, 401]
@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlmodel import SQLModel
+
+from app.core.config import get_settings
+from app.db import session as db_session_module
+from app.db.replicas import RecentWriters, Replica, ReplicaSet
+from app.models import Todo
+from tests.test_todos import create_user_and_token
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _sqlite_replica(name, url):
+    def make_engine():
+        return create_engine(url, connect_args={"check_same_thread": False})
+
+    return Replica(name, make_engine, lambda: None)
+
+
+def test_recent_writers_expire_and_are_bounded():
+    clock = FakeClock()
+    writers = RecentWriters(5.0, max_users=2, clock=clock)
+    writers.note("a")
+    assert writers.recent("a") and not writers.recent("b")
+
+    clock.now += 5
+    assert not writers.recent("a")
+    writers.note("b")
+    writers.note("c")
+    writers.note("d")
+    # "a" expired and "b" was the oldest of three.
+    assert len(writers) == 2 and writers.recent("c") and writers.recent("d")
+
+    assert not RecentWriters(0.0).recent("a")
+
+
+def test_round_robin_skips_unhealthy_replicas(tmp_path):
+    replicas = ReplicaSet(
+        [
+            _sqlite_replica("replica-0", f"sqlite:///{tmp_path}/zero.db"),
+            _sqlite_replica("replica-1", f"sqlite:///{tmp_path}/missing/one.db"),
+            _sqlite_replica("replica-2", f"sqlite:///{tmp_path}/two.db"),
+        ]
+    )
+    assert replicas.choose() is None  # nothing is trusted before the first check
+
+    asyncio.run(replicas.check(use_async=False, timeout=5.0))
+    assert [replica.healthy for replica in replicas.replicas] == [True, False, True]
+    assert [replicas.choose().name for _ in range(4)] == ["replica-0", "replica-2", "replica-0", "replica-2"]
+
+
+@pytest.fixture()
+def replica_url(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path}/replica.db"
+    replica_engine = create_engine(url)
+    SQLModel.metadata.create_all(replica_engine)
+    monkeypatch.setattr(get_settings(), "database_replica_urls", [url])
+    db_session_module.reset_replicas()
+    asyncio.run(db_session_module.get_replicas().check(use_async=False, timeout=5.0))
+    yield replica_engine
+    db_session_module.reset_replicas()
+    replica_engine.dispose()
+
+
+def test_reads_use_the_replica_until_the_user_writes(client, replica_url):
+    headers = {"Authorization": f"Bearer {create_user_and_token(client, email='replica@example.com')}"}
+    user_id = client.get("/auth/me", headers=headers).json()["id"]
+    with replica_url.begin() as connection:
+        connection.execute(Todo.__table__.insert().values(id="r1", owner_id=user_id, title="From replica"))
+
+    assert [todo["title"] for todo in client.get("/todos", headers=headers).json()] == ["From replica"]
+    assert client.get("/todos/r1", headers=headers).status_code == 200
+
+    # Writes always go to the primary, and then so do this user's reads.
+    resp = client.post("/todos", json={"title": "On primary"}, headers=headers)
+    assert resp.status_code == 201
+    assert [todo["title"] for todo in client.get("/todos", headers=headers).json()] == ["On primary"]
+
+    # Another API process has not seen the write; the marker from its response is what keeps
+    # the next read on the primary there.
+    db_session_module.get_recent_writers()._until.clear()
+    assert [todo["title"] for todo in client.get("/todos", headers=headers).json()] == ["From replica"]
+    marker = {"X-Read-Primary-Until": resp.headers["x-read-primary-until"]}
+    assert [todo["title"] for todo in client.get("/todos", headers={**headers, **marker}).json()] == ["On primary"]
+    # Markers that have passed, or lie further ahead than a write sets, are ignored.
+    for until in (time.time() - 1, time.time() + 3600, "soon"):
+        marker = {"X-Read-Primary-Until": str(until)}
+        assert client.get("/todos", headers={**headers, **marker}).json()[0]["title"] == "From replica"
+    assert "x-read-primary-until" not in client.get("/todos", headers=headers).headers
+
+
+def test_reads_fall_back_to_the_primary(client, replica_url):
+    headers = {"Authorization": f"Bearer {create_user_and_token(client, email='fallback@example.com')}"}
+    user_id = client.get("/auth/me", headers=headers).json()["id"]
+    with replica_url.begin() as connection:
+        connection.execute(Todo.__table__.insert().values(id="r1", owner_id=user_id, title="From replica"))
+
+    for replica in db_session_module.get_replicas().replicas:
+        replica.healthy = False
+    assert client.get("/todos", headers=headers).json() == []
+
+
+def test_no_marker_without_replicas(client):
+    headers = {"Authorization": f"Bearer {create_user_and_token(client, email='no-replica@example.com')}"}
+    resp = client.post("/todos", json={"title": "Primary only"}, headers=headers)
+    assert resp.status_code == 201 and "x-read-primary-until" not in resp.headers
@@ -0,0 +1,70 @@
+from tests.test_todos import create_user_and_token
+
+
+def auth(client, email):
+    return {"Authorization": f"Bearer {create_user_and_token(client, email=email)}"}
+
+
+def test_search_ranks_title_matches_and_highlights(client):
+    headers = auth(client, "search@example.com")
+    client.post("/todos", json={"title": "Buy groceries", "description": "milk and eggs"}, headers=headers)
+    client.post("/todos", json={"title": "Call mom", "description": "ask about groceries list"}, headers=headers)
+    client.post("/todos", json={"title": "Unrelated"}, headers=headers)
+
+    hits = client.get("/todos/search", params={"q": "grocery"}, headers=headers).json()
+    assert [hit["title"] for hit in hits] == ["Buy groceries", "Call mom"]
+    assert hits[0]["rank"] > hits[1]["rank"]
+    assert "<mark>groceries</mark>" in hits[0]["snippet"]
+
+
+def test_snippet_escapes_todo_text(client):
+    headers = auth(client, "search-escape@example.com")
+    client.post("/todos", json={"title": "<img src=x onerror=alert(1)> groceries & more"}, headers=headers)
+
+    snippet = client.get("/todos/search", params={"q": "groceries"}, headers=headers).json()[0]["snippet"]
+    assert "<img" not in snippet
+    assert "&lt;img src=x onerror=alert(1)&gt; <mark>groceries</mark> &amp; more" in snippet
+
+
+def test_search_uses_last_term_as_prefix_and_requires_all_terms(client):
+    headers = auth(client, "search-prefix@example.com")
+    client.post("/todos", json={"title": "Renew passport", "description": "before the trip"}, headers=headers)
+    client.post("/todos", json={"title": "Pack for trip"}, headers=headers)
+
+    assert [h["title"] for h in client.get("/todos/search?q=pass", headers=headers).json()] == ["Renew passport"]
+    assert [h["title"] for h in client.get("/todos/search?q=trip+renew", headers=headers).json()] == ["Renew passport"]
+    # Query syntax characters are ignored instead of reaching the search engine.
+    assert len(client.get('/todos/search?q="trip" -(*', headers=headers).json()) == 2
+    assert client.get("/todos/search?q=%21%21", headers=headers).json() == []
+
+
+def test_search_sees_updates_and_deletes_and_other_users_todos_stay_hidden(client):
+    headers = auth(client, "search-owner@example.com")
+    other = auth(client, "search-other@example.com")
+    todo = client.post("/todos", json={"title": "Draft report"}, headers=headers).json()
+    client.post("/todos", json={"title": "Draft report"}, headers=other)
+
+    client.patch(f"/todos/{todo['id']}", json={"title": "Final summary"}, headers=headers)
+    assert client.get("/todos/search?q=draft", headers=headers).json() == []
+    assert [h["id"] for h in client.get("/todos/search?q=summary", headers=headers).json()] == [todo["id"]]
+
+    client.delete(f"/todos/{todo['id']}", headers=headers)
+    assert client.get("/todos/search?q=summary", headers=headers).json() == []
+
+
+def test_search_pages_with_cursor(client):
+    headers = auth(client, "search-pages@example.com")
+    for n in range(5):
+        client.post("/todos", json={"title": f"Chore {n}"}, headers=headers)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"q": "chore", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = client.get("/todos/search", params=params, headers=headers)
+        seen.extend(hit["id"] for hit in resp.json())
+        cursor = resp.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 5
+    assert client.get("/todos/search?q=chore&cursor=bogus", headers=headers).status_code == 400
@@ -0,0 +1,48 @@
+import asyncio
+import json
+import subprocess
+import sys
+
+import pytest
+
+from app import main
+from app.core.config import get_settings
+from app.db import session as db_session_module
+from app.services import security
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_prewarm_fills_the_pool_up_to_its_size(monkeypatch, use_async):
+    monkeypatch.setattr(get_settings(), "database_async", use_async)
+    monkeypatch.setattr(get_settings(), "db_pool_size", 3)
+
+    async def scenario():
+        await db_session_module.dispose_engines()  # engines made by earlier tests ignore the new size
+        try:
+            opened = await db_session_module.prewarm(5)
+            engine = db_session_module.get_async_engine() if use_async else db_session_module.get_engine()
+            pool = engine.sync_engine.pool if use_async else engine.pool
+            return opened, pool.checkedin()
+        finally:
+            await db_session_module.dispose_engines()
+
+    assert asyncio.run(scenario()) == (3, 3)
+    assert db_session_module._engine is None and db_session_module._async_engine is None
+
+
+def test_precomputed_openapi_is_served_from_file(tmp_path, monkeypatch):
+    path = tmp_path / "openapi.json"
+    path.write_text(json.dumps({"openapi": "3.1.0", "info": {"title": "precomputed"}, "paths": {}}))
+    monkeypatch.setattr(main.settings, "openapi_schema_path", str(path))
+    monkeypatch.setattr(main.app, "openapi_schema", None)
+
+    assert main._precomputed_openapi()["info"]["title"] == "precomputed"
+
+
+def test_app_import_leaves_jose_for_later():
+    code = "import sys, app.main; print(sorted(m for m in ('jose', 'cryptography') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+    # Hashing workers import the function's module, which must not drag in the app.
+    assert security.get_password_hash.__module__ == "app.core.passwords"
+    assert security.decode_access_token(security.create_access_token("user")) == "user"
@@ -0,0 +1,134 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+from app.models import TodoTombstone
+from app.services import todos as todo_service
+from tests.test_todos import _verbs, create_user_and_token
+
+
+def _headers(client, email):
+    return {"Authorization": f"Bearer {create_user_and_token(client, email=email)}"}
+
+
+def _sync(client, headers, since=None, **params):
+    if since is not None:
+        params["since"] = since
+    resp = client.get("/todos/changes", params=params, headers=headers)
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def test_full_sync_then_deltas(client):
+    headers = _headers(client, "sync@example.com")
+    ids = [client.post("/todos", json={"title": f"Todo {n}"}, headers=headers).json()["id"] for n in range(3)]
+
+    full = _sync(client, headers)
+    assert [todo["id"] for todo in full["todos"]] == ids
+    assert (full["deleted"], full["has_more"]) == ([], False)
+    assert set(full["todos"][0]) == {"id", "title", "description", "is_completed", "created_at", "updated_at"}
+
+    client.patch(f"/todos/{ids[0]}", json={"is_completed": True}, headers=headers)
+    client.delete(f"/todos/{ids[1]}", headers=headers)
+    created = client.post("/todos", json={"title": "Later"}, headers=headers).json()
+
+    delta = _sync(client, headers, full["next_token"])
+    assert [(todo["id"], todo["is_completed"]) for todo in delta["todos"]] == [(ids[0], True), (created["id"], False)]
+    assert delta["deleted"] == [ids[1]]
+
+    idle = _sync(client, headers, delta["next_token"])
+    assert (idle["todos"], idle["deleted"], idle["has_more"]) == ([], [], False)
+
+
+def test_unchanged_sync_is_one_primary_key_lookup(client, statements):
+    headers = _headers(client, "sync-idle@example.com")
+    client.post("/todos", json={"title": "Only"}, headers=headers)
+    token = _sync(client, headers)["next_token"]
+
+    statements.clear()
+    assert _sync(client, headers, token)["todos"] == []
+    assert _verbs(statements) == ["SELECT"]
+    assert "FROM users" in statements[0]
+
+
+def test_sync_pages_are_consistent_with_concurrent_writes(client):
+    headers = _headers(client, "sync-pages@example.com")
+    token = _sync(client, headers)["next_token"]
+    batch = {"operations": [{"op": "create", "data": {"title": f"Batch {n}"}} for n in range(5)]}
+    ids = [result["id"] for result in client.post("/todos/batch", json=batch, headers=headers).json()["results"]]
+
+    first = _sync(client, headers, token, limit=2)
+    assert first["has_more"] and len(first["todos"]) == 2
+    # A write between pages is left for the next sync rather than shifting the pages.
+    client.delete(f"/todos/{first['todos'][0]['id']}", headers=headers)
+
+    seen, page = [todo["id"] for todo in first["todos"]], first
+    while page["has_more"]:
+        page = _sync(client, headers, page["next_token"], limit=2)
+        assert page["deleted"] == []
+        seen.extend(todo["id"] for todo in page["todos"])
+    assert sorted(seen) == sorted(ids)
+
+    after = _sync(client, headers, page["next_token"])
+    assert (after["todos"], after["deleted"]) == ([], [first["todos"][0]["id"]])
+
+
+def test_full_sync_pages_from_no_token(client):
+    headers = _headers(client, "sync-full-pages@example.com")
+    ids = [client.post("/todos", json={"title": f"Todo {n}"}, headers=headers).json()["id"] for n in range(3)]
+
+    first = _sync(client, headers, limit=2)
+    assert first["has_more"] and [todo["id"] for todo in first["todos"]] == ids[:2]
+    second = _sync(client, headers, first["next_token"], limit=2)
+    assert not second["has_more"] and [todo["id"] for todo in second["todos"]] == ids[2:]
+
+    client.post("/todos", json={"title": "Later"}, headers=headers)
+    assert [todo["title"] for todo in _sync(client, headers, second["next_token"])["todos"]] == ["Later"]
+
+
+def test_imports_and_batches_show_up_in_deltas(client):
+    headers = _headers(client, "sync-import@example.com")
+    token = _sync(client, headers)["next_token"]
+
+    body = b'{"title": "Imported A"}\n{"title": "Imported B"}\n'
+    client.post("/todos/import", content=body, headers={**headers, "Content-Type": "application/x-ndjson"})
+    delta = _sync(client, headers, token)
+    assert sorted(todo["title"] for todo in delta["todos"]) == ["Imported A", "Imported B"]
+
+    batch = {"operations": [{"op": "delete", "id": delta["todos"][0]["id"]}], "action": "complete_all"}
+    client.post("/todos/batch", json=batch, headers=headers)
+    latest = _sync(client, headers, delta["next_token"])
+    assert [(todo["id"], todo["is_completed"]) for todo in latest["todos"]] == [(delta["todos"][1]["id"], True)]
+    assert latest["deleted"] == [delta["todos"][0]["id"]]
+
+
+def test_writes_that_match_nothing_keep_the_version(client):
+    headers = _headers(client, "sync-noop@example.com")
+    client.post("/todos", json={"title": "Keep"}, headers=headers)
+    etag = client.get("/todos", headers=headers).headers["etag"]
+
+    client.patch("/todos/missing", json={"title": "x"}, headers=headers)
+    client.delete("/todos/missing", headers=headers)
+    client.post("/todos/batch", json={"operations": [{"op": "delete", "id": "missing"}]}, headers=headers)
+    client.post("/todos/import", content=b"not json\n", headers={**headers, "Content-Type": "application/x-ndjson"})
+
+    assert client.get("/todos", headers=headers).headers["etag"] == etag
+
+
+def test_bad_and_expired_tokens(client):
+    headers = _headers(client, "sync-tokens@example.com")
+    assert client.get("/todos/changes?since=garbage", headers=headers).status_code == 400
+
+    stale = base64.urlsafe_b64encode(json.dumps({"v": 0, "t": 0}).encode()).decode()
+    resp = client.get("/todos/changes", params={"since": stale}, headers=headers)
+    assert resp.status_code == 410
+
+
+def test_prune_tombstones(db_session, client):
+    headers = _headers(client, "sync-prune@example.com")
+    todo = client.post("/todos", json={"title": "Gone"}, headers=headers).json()
+    client.delete(f"/todos/{todo['id']}", headers=headers)
+
+    assert todo_service.prune_tombstones(db_session, datetime.utcnow() - timedelta(days=1)) == 0
+    assert todo_service.prune_tombstones(db_session, datetime.utcnow() + timedelta(seconds=1)) == 1
+    assert db_session.query(TodoTombstone).count() == 0
@@ -1,3 +1,8 @@
+import pytest
+
+from app.core import serialization
+
+
 def create_user_and_token(client, email="todo@example.com"):
     payload = {"email": email, "full_name": "Todo User", "password": "password123"}
     client.post("/auth/register", json=payload)
@@ -39,3 +44,238 @@ def test_todo_crud_flow(client):
     empty_resp = client.get("/todos", headers=headers)
     assert empty_resp.status_code == 200
     assert empty_resp.json() == []
+
+
+def test_list_todos_keyset_pagination(client):
+    token = create_user_and_token(client, email="pages@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    created = [
+        client.post("/todos", json={"title": f"Item {i}"}, headers=headers).json() for i in range(5)
+    ]
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client.get("/todos", params=params, headers=headers)
+        assert resp.status_code == 200
+        page = resp.json()
+        assert len(page) <= 2
+        seen.extend(todo["id"] for todo in page)
+        cursor = resp.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+
+    assert seen == [todo["id"] for todo in reversed(created)]
+
+
+def test_list_todos_filters(client):
+    token = create_user_and_token(client, email="filters@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    client.post("/todos", json={"title": "Groceries"}, headers=headers)
+    client.post("/todos", json={"title": "Gym", "is_completed": True}, headers=headers)
+    client.post("/todos", json={"title": "100%_done"}, headers=headers)
+
+    resp = client.get("/todos", params={"is_completed": "true"}, headers=headers)
+    assert [todo["title"] for todo in resp.json()] == ["Gym"]
+
+    resp = client.get("/todos", params={"title_prefix": "Gr"}, headers=headers)
+    assert [todo["title"] for todo in resp.json()] == ["Groceries"]
+
+    resp = client.get("/todos", params={"title_prefix": "100%_"}, headers=headers)
+    assert [todo["title"] for todo in resp.json()] == ["100%_done"]
+
+    resp = client.get("/todos", params={"created_after": "2999-01-01T00:00:00"}, headers=headers)
+    assert resp.json() == []
+
+
+def test_list_todos_rejects_bad_cursor(client):
+    token = create_user_and_token(client, email="cursor@example.com")
+    resp = client.get("/todos", params={"cursor": "not-a-cursor"}, headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 400
+
+
+def test_batch_operations(client):
+    token = create_user_and_token(client, email="batch@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    keep = client.post("/todos", json={"title": "Keep"}, headers=headers).json()
+    drop = client.post("/todos", json={"title": "Drop"}, headers=headers).json()
+
+    resp = client.post(
+        "/todos/batch",
+        json={
+            "operations": [
+                {"op": "create", "data": {"title": "New A"}},
+                {"op": "create", "data": {"title": "New B", "is_completed": True}},
+                {"op": "update", "id": keep["id"], "data": {"is_completed": True}},
+                {"op": "update", "id": "missing-1", "data": {"is_completed": True}},
+                {"op": "delete", "id": drop["id"]},
+                {"op": "delete", "id": "missing-2"},
+            ]
+        },
+        headers=headers,
+    )
+    assert resp.status_code == 200, resp.text
+    results = resp.json()["results"]
+    assert [(r["op"], r["status"]) for r in results] == [
+        ("create", "ok"),
+        ("create", "ok"),
+        ("update", "ok"),
+        ("update", "not_found"),
+        ("delete", "ok"),
+        ("delete", "not_found"),
+    ]
+    assert [r["todo"]["title"] for r in results[:2]] == ["New A", "New B"]
+    assert results[2]["todo"]["is_completed"] is True
+
+    titles = sorted(todo["title"] for todo in client.get("/todos", headers=headers).json())
+    assert titles == ["Keep", "New A", "New B"]
+
+
+def test_batch_rejects_two_operations_on_one_todo(client):
+    headers = {"Authorization": f"Bearer {create_user_and_token(client, email='batch-twice@example.com')}"}
+    todo = client.post("/todos", json={"title": "Twice"}, headers=headers).json()
+
+    operations = [
+        {"op": "update", "id": todo["id"], "data": {"title": "Renamed"}},
+        {"op": "delete", "id": todo["id"]},
+    ]
+    resp = client.post("/todos/batch", json={"operations": operations}, headers=headers)
+    assert resp.status_code == 422
+    assert client.get(f"/todos/{todo['id']}", headers=headers).json()["title"] == "Twice"
+
+
+def test_batch_actions(client):
+    token = create_user_and_token(client, email="batch-actions@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    for title in ("One", "Two", "Three"):
+        client.post("/todos", json={"title": title}, headers=headers)
+
+    resp = client.post("/todos/batch", json={"action": "complete_all"}, headers=headers)
+    assert len(resp.json()["action_ids"]) == 3
+
+    resp = client.post("/todos/batch", json={"action": "delete_completed"}, headers=headers)
+    assert len(resp.json()["action_ids"]) == 3
+    assert client.get("/todos", headers=headers).json() == []
+
+
+def test_batch_cannot_touch_other_users_todos(client):
+    owner = {"Authorization": f"Bearer {create_user_and_token(client, email='owner@example.com')}"}
+    other = {"Authorization": f"Bearer {create_user_and_token(client, email='other@example.com')}"}
+    todo = client.post("/todos", json={"title": "Mine"}, headers=owner).json()
+
+    resp = client.post("/todos/batch", json={"operations": [{"op": "delete", "id": todo["id"]}]}, headers=other)
+    assert resp.json()["results"][0]["status"] == "not_found"
+    assert len(client.get("/todos", headers=owner).json()) == 1
+
+
+def test_conditional_get_returns_304_until_collection_changes(client):
+    token = create_user_and_token(client, email="etag@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    todo = client.post("/todos", json={"title": "Cache me"}, headers=headers).json()
+
+    first = client.get("/todos", headers=headers)
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+
+    cached = client.get("/todos", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    single = client.get(f"/todos/{todo['id']}", headers={**headers, "If-None-Match": etag})
+    assert single.status_code == 304
+    assert client.get("/todos/missing", headers={**headers, "If-None-Match": etag}).status_code == 404
+
+    client.patch(f"/todos/{todo['id']}", json={"is_completed": True}, headers=headers)
+    refreshed = client.get("/todos", headers={**headers, "If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+    assert refreshed.json()[0]["is_completed"] is True
+
+    client.delete(f"/todos/{todo['id']}", headers=headers)
+    after_delete = client.get("/todos", headers={**headers, "If-None-Match": refreshed.headers["etag"]})
+    assert after_delete.status_code == 200
+    assert after_delete.json() == []
+
+
+def test_etags_differ_between_users(client):
+    first = {"Authorization": f"Bearer {create_user_and_token(client, email='etag-a@example.com')}"}
+    second = {"Authorization": f"Bearer {create_user_and_token(client, email='etag-b@example.com')}"}
+
+    etag = client.get("/todos", headers=first).headers["etag"]
+    assert client.get("/todos", headers={**second, "If-None-Match": etag}).status_code == 200
+
+    # Another user's todo is not found, even with that user's current ETag.
+    todo = client.post("/todos", json={"title": "Mine"}, headers=first).json()
+    second_etag = client.get("/todos", headers=second).headers["etag"]
+    assert client.get(f"/todos/{todo['id']}", headers={**second, "If-None-Match": second_etag}).status_code == 404
+
+
+def test_read_single_todo(client):
+    token = create_user_and_token(client, email="single@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    todo = client.post("/todos", json={"title": "One"}, headers=headers).json()
+
+    resp = client.get(f"/todos/{todo['id']}", headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["title"] == "One"
+    assert client.get("/todos/missing", headers=headers).status_code == 404
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_list_body_matches_response_model_encoding(client, monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+    token = create_user_and_token(client, email=f"encoding-{use_orjson}@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    todo = client.post("/todos", json={"title": "Ünïcode ✓", "description": None}, headers=headers).json()
+
+    listed = client.get("/todos", headers=headers)
+    assert listed.headers["content-type"] == "application/json"
+    # The row-tuple fast path must produce exactly what ``response_model=TodoRead`` would.
+    assert listed.json() == [todo]
+    assert listed.json() == [client.get(f"/todos/{todo['id']}", headers=headers).json()]
+
+
+def _verbs(statements):
+    return [statement.split(None, 1)[0] for statement in statements]
+
+
+def test_write_statements(client, statements):
+    token = create_user_and_token(client, email="statements@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    client.get("/todos", headers=headers)  # warm the principal caches
+
+    statements.clear()
+    todo = client.post("/todos", json={"title": "Counted"}, headers=headers).json()
+    # The collection version claim, then the todo write; no refresh SELECT after commit.
+    assert _verbs(statements) == ["UPDATE", "INSERT"]
+    assert all("RETURNING" in statement for statement in statements)
+
+    statements.clear()
+    assert client.patch(f"/todos/{todo['id']}", json={"is_completed": True}, headers=headers).status_code == 200
+    assert _verbs(statements) == ["UPDATE", "UPDATE"]
+
+    statements.clear()
+    assert client.patch("/todos/missing", json={"is_completed": True}, headers=headers).status_code == 404
+    assert _verbs(statements) == ["UPDATE", "UPDATE"]  # and the claim is rolled back
+
+    statements.clear()
+    assert client.delete(f"/todos/{todo['id']}", headers=headers).status_code == 204
+    assert _verbs(statements) == ["UPDATE", "DELETE", "INSERT"]  # the tombstone
+
+
+def test_patch_bumps_updated_at(client):
+    token = create_user_and_token(client, email="updated-at@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    todo = client.post("/todos", json={"title": "Before"}, headers=headers).json()
+
+    updated = client.patch(f"/todos/{todo['id']}", json={"title": "After"}, headers=headers).json()
+    assert updated["title"] == "After"
+    assert updated["created_at"] == todo["created_at"]
+    assert updated["updated_at"] > todo["updated_at"]
+    assert client.get(f"/todos/{todo['id']}", headers=headers).json() == updated
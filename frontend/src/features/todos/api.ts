@@ -1,10 +1,18 @@
 import { api } from '@/lib/api'
 import type { Todo, TodoCreate, TodoUpdate } from '@/features/todos/types'
 
+const NEXT_CURSOR_HEADER = 'x-next-cursor'
+
 export const todosApi = {
   async list(): Promise<Todo[]> {
-    const { data } = await api.get<Todo[]>('/todos')
-    return data
+    const todos: Todo[] = []
+    let cursor: string | undefined
+    do {
+      const response = await api.get<Todo[]>('/todos', { params: cursor ? { cursor } : undefined })
+      todos.push(...response.data)
+      cursor = response.headers[NEXT_CURSOR_HEADER] ?? undefined
+    } while (cursor)
+    return todos
   },
   async create(payload: TodoCreate): Promise<Todo> {
     const { data } = await api.post<Todo>('/todos', payload)
@@ -1,11 +1,35 @@
-import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query'
+import { useEffect } from 'react'
+import { type QueryClient, useMutation, useQuery, useQueryClient } from '@tanstack/react-query'
 import { toast } from 'sonner'
 
 import { todosApi } from '@/features/todos/api'
-import type { TodoCreate, TodoUpdate } from '@/features/todos/types'
+import { subscribeToTodos, type TodoStreamEvent } from '@/features/todos/stream'
+import type { Todo, TodoCreate, TodoUpdate } from '@/features/todos/types'
 
 const TODOS_KEY = ['todos'] as const
 
+const upsertTodo = (queryClient: QueryClient, todo: Todo) =>
+  queryClient.setQueryData<Todo[]>(TODOS_KEY, (todos) => {
+    if (!todos) return todos
+    return todos.some((item) => item.id === todo.id)
+      ? todos.map((item) => (item.id === todo.id ? todo : item))
+      : [todo, ...todos]
+  })
+
+const removeTodo = (queryClient: QueryClient, id: string) =>
+  queryClient.setQueryData<Todo[]>(TODOS_KEY, (todos) => todos?.filter((item) => item.id !== id))
+
+const applyStreamEvent = (queryClient: QueryClient, event: TodoStreamEvent) => {
+  if (event.type === 'deleted') {
+    removeTodo(queryClient, event.id)
+  } else if (event.type === 'resync' || !('title' in event.todo)) {
+    // Changes were missed (or arrived without a body): fall back to reloading the list.
+    queryClient.invalidateQueries({ queryKey: TODOS_KEY })
+  } else {
+    upsertTodo(queryClient, event.todo)
+  }
+}
+
 export const useTodos = () => {
   const queryClient = useQueryClient()
 
@@ -14,10 +38,17 @@ export const useTodos = () => {
     queryFn: todosApi.list,
   })
 
+  // Other tabs and devices are kept current by the change stream instead of refetching.
+  useEffect(() => {
+    const controller = new AbortController()
+    void subscribeToTodos((event) => applyStreamEvent(queryClient, event), controller.signal)
+    return () => controller.abort()
+  }, [queryClient])
+
   const createMutation = useMutation({
     mutationFn: todosApi.create,
-    onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: TODOS_KEY })
+    onSuccess: (todo) => {
+      upsertTodo(queryClient, todo)
       toast.success('Todo created')
     },
     onError: () => toast.error('Unable to create todo'),
@@ -25,8 +56,8 @@ export const useTodos = () => {
 
   const updateMutation = useMutation({
     mutationFn: ({ id, payload }: { id: string; payload: TodoUpdate }) => todosApi.update(id, payload),
-    onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: TODOS_KEY })
+    onSuccess: (todo) => {
+      upsertTodo(queryClient, todo)
       toast.success('Todo updated')
     },
     onError: () => toast.error('Unable to update todo'),
@@ -34,8 +65,8 @@ export const useTodos = () => {
 
   const deleteMutation = useMutation({
     mutationFn: (id: string) => todosApi.remove(id),
-    onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: TODOS_KEY })
+    onSuccess: (_, id) => {
+      removeTodo(queryClient, id)
       toast.success('Todo removed')
     },
     onError: () => toast.error('Unable to delete todo'),
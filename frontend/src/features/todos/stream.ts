@@ -0,0 +1,87 @@
+import { getAuthToken } from '@/lib/api'
+import { env } from '@/lib/env'
+import { getRequestId } from '@/lib/request-id'
+import type { Todo } from '@/features/todos/types'
+
+export type TodoStreamEvent =
+  | { type: 'created' | 'updated'; todo: Todo | { id: string } }
+  | { type: 'deleted'; id: string }
+  | { type: 'resync' }
+
+type Frame = { id?: string; event?: string; data: string }
+
+const DEFAULT_RETRY_MS = 3000
+
+const parseFrame = (block: string): Frame | null => {
+  const frame: Frame = { data: '' }
+  for (const line of block.split('\n')) {
+    if (!line || line.startsWith(':')) continue
+    const separator = line.indexOf(':')
+    const field = separator === -1 ? line : line.slice(0, separator)
+    const value = separator === -1 ? '' : line.slice(separator + 1).replace(/^ /, '')
+    if (field === 'id') frame.id = value
+    else if (field === 'event') frame.event = value
+    else if (field === 'data') frame.data += value
+  }
+  return frame.event ? frame : null
+}
+
+const toEvent = (frame: Frame): TodoStreamEvent | null => {
+  switch (frame.event) {
+    case 'created':
+    case 'updated':
+      return { type: frame.event, todo: JSON.parse(frame.data) }
+    case 'deleted':
+      return { type: 'deleted', id: JSON.parse(frame.data).id }
+    case 'resync':
+      return { type: 'resync' }
+    default:
+      return null
+  }
+}
+
+/**
+ * Follows `GET /todos/stream` until `signal` aborts, reconnecting with `Last-Event-ID` so the
+ * server replays missed changes. Uses fetch rather than EventSource to send the bearer token.
+ */
+export const subscribeToTodos = async (onEvent: (event: TodoStreamEvent) => void, signal: AbortSignal) => {
+  let lastEventId: string | undefined
+  let retryMs = DEFAULT_RETRY_MS
+
+  while (!signal.aborted) {
+    try {
+      const headers: Record<string, string> = { Accept: 'text/event-stream', 'x-request-id': getRequestId() }
+      const token = getAuthToken()
+      if (token) headers.Authorization = `Bearer ${token}`
+      if (lastEventId) headers['Last-Event-ID'] = lastEventId
+
+      const response = await fetch(`${env.apiBaseUrl}/todos/stream`, { headers, signal })
+      if (response.status === 401 || !response.body) return
+
+      const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+      let buffer = ''
+      for (;;) {
+        const { value, done } = await reader.read()
+        if (done) break
+        buffer += value.replace(/\r\n?/g, '\n')
+        let boundary = buffer.indexOf('\n\n')
+        while (boundary !== -1) {
+          const block = buffer.slice(0, boundary)
+          buffer = buffer.slice(boundary + 2)
+          boundary = buffer.indexOf('\n\n')
+
+          const retry = /^retry: ?(\d+)$/m.exec(block)
+          if (retry) retryMs = Number(retry[1])
+          const frame = parseFrame(block)
+          if (!frame) continue
+          if (frame.id) lastEventId = frame.id
+          const event = toEvent(frame)
+          if (event) onEvent(event)
+        }
+      }
+    } catch {
+      if (signal.aborted) return
+    }
+    await new Promise((resolve) => setTimeout(resolve, retryMs))
+  }
+}
@@ -4,11 +4,16 @@ import { getRequestId } from '@/lib/request-id'
 
 let tokenGetter: (() => string | null) | null = null
 let unauthorizedHandler: (() => void) | null = null
+// Echoed back so our reads see our own writes on any API replica; the server ignores it once
+// it has passed (by the server's clock, not ours).
+let readPrimaryUntil: string | null = null
 
 export const setAuthTokenGetter = (getter: () => string | null) => {
   tokenGetter = getter
 }
 
+export const getAuthToken = () => tokenGetter?.() ?? null
+
 export const setUnauthorizedHandler = (handler: () => void) => {
   unauthorizedHandler = handler
 }
@@ -28,12 +33,22 @@ api.interceptors.request.use((config) => {
 
   headers.set('x-request-id', getRequestId())
 
+  if (readPrimaryUntil) {
+    headers.set('x-read-primary-until', readPrimaryUntil)
+  }
+
   config.headers = headers
   return config
 })
 
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const until = response.headers['x-read-primary-until']
+    if (typeof until === 'string') {
+      readPrimaryUntil = until
+    }
+    return response
+  },
   (error) => {
     if (error.response?.status === 401) {
       unauthorizedHandler?.()
@@ -161,6 +161,8 @@ module "container_app" {
     LOG_LEVEL         = "INFO"
     CORS_ORIGINS      = "http://localhost:5173,${local.frontend_origin}"
     CORS_ORIGIN_REGEX = local.frontend_origin_regex
+    # Read by uvicorn --proxy-headers; the auth rate limit keys on the client IP it yields.
+    FORWARDED_ALLOW_IPS = var.containerapp_forwarded_allow_ips
   }
   secret_env = {
     DATABASE_URL = azurerm_key_vault_secret.database_url.name
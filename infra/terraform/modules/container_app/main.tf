@@ -49,6 +49,27 @@ resource "azurerm_container_app" "this" {
       cpu    = 0.5
       memory = "1Gi"
 
+      # Restart only when the process stops answering at all; /healthz checks nothing else.
+      liveness_probe {
+        transport               = "HTTP"
+        port                    = var.target_port
+        path                    = "/healthz"
+        interval_seconds        = 10
+        timeout                 = 5
+        failure_count_threshold = 3
+      }
+
+      # Take the replica out of rotation while its database is unreachable or it is at capacity.
+      readiness_probe {
+        transport               = "HTTP"
+        port                    = var.target_port
+        path                    = "/healthz/ready"
+        interval_seconds        = 5
+        timeout                 = 3
+        failure_count_threshold = 2
+        success_count_threshold = 1
+      }
+
       dynamic "env" {
         for_each = var.plain_env
         content {
@@ -19,6 +19,14 @@ resource "azurerm_postgresql_flexible_server" "this" {
   tags = var.tags
 }
 
+# Flexible Server only creates allow-listed extensions. btree_gin lets the full-text index lead
+# with owner_id (backend migration 20261018_0004).
+resource "azurerm_postgresql_flexible_server_configuration" "extensions" {
+  name      = "azure.extensions"
+  server_id = azurerm_postgresql_flexible_server.this.id
+  value     = "BTREE_GIN"
+}
+
 resource "azurerm_postgresql_flexible_server_firewall_rule" "azure_services" {
   name             = "allow-azure-services"
   server_id        = azurerm_postgresql_flexible_server.this.id
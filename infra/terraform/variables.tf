@@ -108,6 +108,16 @@ variable "containerapp_max_replicas" {
   default     = 2
 }
 
+variable "containerapp_forwarded_allow_ips" {
+  description = "Comma-separated CIDRs of the ingress proxies whose X-Forwarded-For the API trusts"
+  type        = string
+
+  validation {
+    condition     = !contains([for cidr in split(",", var.containerapp_forwarded_allow_ips) : trimspace(cidr)], "*")
+    error_message = "List the ingress CIDRs; a wildcard lets clients pick the IP the auth rate limit is keyed on."
+  }
+}
+
 variable "enable_container_registry" {
   description = "Whether to provision an Azure Container Registry"
   type        = bool